@@ -6,28 +6,66 @@ Uso basico:
 Genera:
   - outputs/resultados_metricas.csv : tabla resumen con pruebas y tamaños de efecto
   - outputs/resultados_metricas_fdr.csv : idem con p-valores corregidos (FDR)
+  - outputs/resultados_metricas_por_<col>.csv : idem por subgrupo (con --group-by Semestre Sexo...)
+  - outputs/resultados_medidas_repetidas.csv : Friedman sobre todas las entregas (AP1..APk), global y por subgrupo
+  - outputs/resultados_issues.csv : AP1 vs AP2 del numero de issues por regla, extension y etiqueta (con --issues)
   - outputs/fig_boxplots.png : boxplots AP1 vs AP2
   - outputs/fig_spaghetti_<metric>.png : grafico pareado por estudiante
   - outputs/fig_heatmap_correlaciones.png : matriz de correlaciones (AP1 y AP2)
+  - outputs/.cache_figuras.json : huellas de las figuras; solo se redibujan las que cambian (--no-plot-cache)
 
 Notas:
-  - El dataset contiene columnas *_AP1 y *_AP2 para cada métrica.
+  - El dataset contiene columnas *_AP1 y *_AP2 para cada métrica (y opcionalmente *_AP3...). También se acepta
+    un CSV en formato largo con columnas student, assignment, metric, value (+ Semestre, Sexo...).
+  - Medidas repetidas (--repeated, automatico con 3 o mas entregas): Friedman y W de Kendall por metrica en una
+    sola pasada vectorizada para la cohorte y cada columna de --group-by; --mixed añade un modelo mixto
+    (value ~ entrega + (1|estudiante), LRT) que usa tambien a los estudiantes con entregas incompletas.
+  - --issues issues_detallados_*.csv construye matrices dispersas proyecto x regla / extension / etiqueta por bloques,
+    las une a cada estudiante por Sonar_Ap1/Sonar_Ap2 (= project_key) y aplica las pruebas pareadas con FDR sobre
+    todas las reglas (y aparte extensiones y etiquetas); solo se prueban los rasgos presentes en al menos
+    --issues-min-projects proyectos de la cohorte. El archivo tiene una fila por estudiante: un issue de un proyecto
+    compartido se cuenta una vez (por project_key + issue_key). Un proyecto sin ningun issue en el archivo cuenta con
+    cero issues; solo falta el dato si el estudiante no tiene clave en Sonar_ApK.
+    El separador y la codificacion del CSV se detectan (--issues-sep / --issues-encoding para fijarlos).
+  - --csv admite también un archivo .parquet (requiere pyarrow) o el almacen SQLite de
+    notebooks/almacen_analitico.py (.sqlite/.db, vista metricas_por_estudiante).
   - Se aplican pruebas pareadas (t de Student o Wilcoxon según normalidad de las diferencias).
   - Tamaño del efecto: Cohen's d para datos pareados (mean(diff)/sd(diff)).
   - Corrección por comparaciones múltiples: FDR (Benjamini-Hochberg).
+  - IC 95% bootstrap (percentil) de la diferencia media y de d, y p-valor de permutación pareada
+    (exacto con pocas diferencias no nulas, Monte Carlo si no); --n-resamples y --seed.
+  - Las pruebas de todas las metricas de un subgrupo se calculan a la vez sobre la matriz estudiantes x metricas
+    (medias, d, t y rangos de Wilcoxon vectorizados; SciPy solo para Shapiro-Wilk y los p exactos de Wilcoxon).
+    --all-metrics analiza toda columna *_AP1/*_AP2 del dataset (p. ej. cientos de conteos por regla).
+  - --jobs N reparte los lotes de métricas de cada subgrupo entre N procesos; el resultado es idéntico al serie.
+  - Pipeline incremental: cada prueba (metrica x subgrupo), CSV y reporte guarda en outputs/.cache_analisis.json
+    la huella de sus entradas (datos, parametros y codigo); una nueva ejecucion solo recalcula y reescribe lo
+    que cambio (--no-cache recalcula todo, incluidas las figuras).
+  - --stats-only solo escribe resultados_metricas*.csv (sin gráficos ni reportes). matplotlib/seaborn se
+    importan solo al dibujar y scipy al analizar; el FDR se calcula con numpy (sin statsmodels), asi que
+    --help y --stats-only arrancan sin cargar las librerias de graficos.
+  - --metrics-json guarda el tiempo y la memoria pico de cada etapa (load, analyze, plot, report) y sus
+    contadores, con el mismo formato que extrae_issues.py --metricas-json; --progress muestra cada etapa en stderr.
 """
 from __future__ import annotations
 import argparse
+import contextlib
+import functools
+import hashlib
+import json
 import os
+import re
+import sqlite3
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from typing import List
+from typing import List, Optional
 import numpy as np
 import pandas as pd
-import scipy.stats as stats
-from statsmodels.stats.multitest import multipletests
-import seaborn as sns
-import matplotlib.pyplot as plt
 import datetime
+# scipy, matplotlib y seaborn se importan dentro de las funciones que los usan (arranque rapido sin graficos)
 
 METRICS_BASE = [
     "code_smells","bugs","vulnerabilities","security_hotspots",
@@ -40,11 +78,13 @@ NEUTRAL = set(METRICS_BASE) - LOWER_IS_BETTER
 class MetricResult:
     metric: str; test_used: str; n_paired: int; mean_ap1: float; mean_ap2: float; delta: float; pct_change: float | None
     p_value: float; effect_size_d: float | None; effect_magnitude: str | None; direction: str; improved: str; normality_p: float | None
+    resampling: dict | None = None
     def to_dict(self):
         return {"metric":self.metric,"test_used":self.test_used,"n_paired":self.n_paired,"mean_ap1":self.mean_ap1,
                 "mean_ap2":self.mean_ap2,"delta_ap2_minus_ap1":self.delta,"pct_change":self.pct_change,
                 "p_value":self.p_value,"effect_size_d":self.effect_size_d,"effect_magnitude":self.effect_magnitude,
-                "direction":self.direction,"improved":self.improved,"normality_p":self.normality_p}
+                "direction":self.direction,"improved":self.improved,"normality_p":self.normality_p,
+                **{k:(self.resampling or {}).get(k,np.nan) for k in RESAMPLING_COLUMNS}}
 
 def cohen_d_paired(a: np.ndarray, b: np.ndarray) -> float:
     diff = b - a; sd = diff.std(ddof=1); return 0.0 if sd==0 else diff.mean()/sd
@@ -62,58 +102,484 @@ def compute_improvement(metric: str, mean_ap1: float, mean_ap2: float) -> str:
 def safe_pct_change(ap1: float, ap2: float) -> float | None:
     return None if ap1==0 else (ap2-ap1)/ap1*100.0
 
+# ---------------------------- Remuestreo (bootstrap / permutaciones) ---------------------------- #
+
+RESAMPLING_COLUMNS=["delta_ci_low","delta_ci_high","d_ci_low","d_ci_high","perm_p_value","perm_method"]
+RESAMPLE_CELLS=2_000_000  # elementos por bloque de la matriz de remuestreo (acota la memoria)
+EXACT_PERM_MAX=16  # hasta 2^16 asignaciones de signo se enumeran todas
+
+def task_rng(seed: int, metric: str) -> np.random.Generator:
+    # Semilla por metrica: el resultado no depende del orden de ejecucion (--jobs)
+    return np.random.default_rng([seed, zlib.crc32(metric.encode())])
+
+def bootstrap_ci(diffs: np.ndarray, n_resamples: int, rng: np.random.Generator, alpha: float=0.05) -> tuple:
+    """IC percentil bootstrap de la media de las diferencias y de d pareado; remuestras como matriz por bloques"""
+    n=len(diffs); means=np.empty(n_resamples); ds=np.empty(n_resamples); step=max(1,RESAMPLE_CELLS//n)
+    for i in range(0,n_resamples,step):
+        sample=diffs[rng.integers(0,n,size=(min(step,n_resamples-i),n))]
+        s1=sample.sum(axis=1); sd=np.sqrt(np.maximum(np.einsum('ij,ij->i',sample,sample)-s1*s1/n,0)/(n-1))
+        means[i:i+len(s1)]=s1/n; ds[i:i+len(s1)]=np.divide(s1/n,sd,out=np.zeros_like(s1),where=sd>0)
+    q=[100*alpha/2,100*(1-alpha/2)]
+    return tuple(np.percentile(means,q))+tuple(np.percentile(ds,q))
+
+def paired_permutation_p(diffs: np.ndarray, n_resamples: int, rng: np.random.Generator) -> tuple:
+    """p-valor bilateral por cambio de signo de las diferencias: exacto si hay pocas, Monte Carlo si no"""
+    absd=np.abs(diffs[diffs!=0]); k=len(absd)
+    if k==0: return 1.0,"exact"
+    obs=abs(diffs.sum()); tol=1e-9*max(1.0,absd.sum())
+    if k<=EXACT_PERM_MAX:
+        signs=((np.arange(2**k)[:,None]>>np.arange(k))&1)*2-1
+        return float(np.mean(np.abs(signs@absd)>=obs-tol)),"exact"
+    hits=0; step=max(1,RESAMPLE_CELLS//k)
+    for i in range(0,n_resamples,step):
+        signs=rng.integers(0,2,size=(min(step,n_resamples-i),k),dtype=np.int8)*2-1
+        hits+=int(np.count_nonzero(np.abs(signs@absd)>=obs-tol))
+    return (hits+1)/(n_resamples+1),"monte_carlo"
+
+def resample_stats(diffs: np.ndarray, n_resamples: int, rng: np.random.Generator) -> dict:
+    lo,hi,dlo,dhi=bootstrap_ci(diffs,n_resamples,rng); p,method=paired_permutation_p(diffs,n_resamples,rng)
+    return {"delta_ci_low":lo,"delta_ci_high":hi,"d_ci_low":dlo,"d_ci_high":dhi,"perm_p_value":p,"perm_method":method}
+
 def load_dataset(path: str) -> pd.DataFrame:
-    df=pd.read_csv(path)
-    for m in METRICS_BASE:
-        for suf in ("AP1","AP2"):
-            col=f"{m}_{suf}"; 
-            if col in df.columns: df[col]=pd.to_numeric(df[col], errors="coerce")
+    # Parquet (requiere pyarrow) conserva los tipos; SQLite se lee de la vista ancha del almacen; el resto como CSV
+    ext=str(path).lower()
+    if ext.endswith((".sqlite",".db")):
+        with sqlite3.connect(path) as con: df=pd.read_sql_query("SELECT * FROM metricas_por_estudiante",con,index_col="row_index").rename_axis(None)
+    else: df=pd.read_parquet(path) if ext.endswith((".parquet",".pq")) else pd.read_csv(path)
+    if is_long(df): df=from_long(df)
+    for col in [c for c in df.columns if WAVE_RE.match(c)]: df[col]=pd.to_numeric(df[col], errors="coerce")
     return df
 
-def analyze_metric(df: pd.DataFrame, metric: str) -> MetricResult:
-    col_ap1=f"{metric}_AP1"; col_ap2=f"{metric}_AP2"
-    if col_ap1 not in df.columns or col_ap2 not in df.columns:
-        return MetricResult(metric,"NA",0,np.nan,np.nan,np.nan,None,np.nan,None,infer_direction(metric),"NA",None,None)
-    data=df[[col_ap1,col_ap2]].dropna(); a=data[col_ap1].values; b=data[col_ap2].values; n=len(data)
-    if n<3: return MetricResult(metric,"Insuficiente",n,float("nan"),float("nan"),float("nan"),None,float("nan"),None,infer_direction(metric),"NA",None,None)
-    diffs=b-a
-    try: _,p_norm=stats.shapiro(diffs)
-    except Exception: p_norm=None
-    if p_norm is not None and p_norm>0.05:
-        _,p_val=stats.ttest_rel(a,b,nan_policy='omit'); test_used="paired_t"
-    else:
-        if np.allclose(diffs,0): p_val=1.0; test_used="wilcoxon_allzero"
+# ---------------------------- Kernel por lotes ---------------------------- #
+# Todas las metricas de un subgrupo a la vez sobre la matriz estudiantes x metricas (NaN por columna enmascarados):
+# medias, d pareado, t y rangos de Wilcoxon con numpy. SciPy solo se llama por columna para Shapiro-Wilk (no admite
+# axis) y para los p de Wilcoxon exactos o por permutacion (n<=50 sin empates ni ceros, o n<=13 con ellos)
+WILCOXON_EXACT_MAX=50; WILCOXON_PERM_MAX=13  # umbrales de method='auto' de scipy.stats.wilcoxon
+
+def rank_abs(D: np.ndarray, valid: np.ndarray) -> tuple:
+    """Rangos promedio de |D| por columna entre las celdas validas, suma de t^3-t de los empates y si hay empates"""
+    rows,cols=np.nonzero(valid); vals=np.abs(D[rows,cols]); order=np.lexsort((vals,cols)); rows,cols,vals=rows[order],cols[order],vals[order]
+    new=np.ones(len(vals),dtype=bool); new[1:]=(cols[1:]!=cols[:-1])|(vals[1:]!=vals[:-1])
+    starts=np.flatnonzero(new); sizes=np.diff(np.append(starts,len(vals))); first=np.searchsorted(cols,cols[starts])
+    R=np.full(D.shape,np.nan); R[rows,cols]=np.repeat(starts-first+(sizes+1)/2.0,sizes)
+    m=D.shape[1]; gcols=cols[starts]
+    return R,np.bincount(gcols,weights=(sizes**3-sizes).astype(float),minlength=m),np.bincount(gcols,weights=sizes>1,minlength=m)>0
+
+def paired_tests_batch(df: pd.DataFrame, metrics: List[str]) -> List[MetricResult]:
+    """Pruebas AP1 vs AP2 de varias metricas en una pasada (sin remuestreo); una por metrica, en el orden de `metrics`"""
+    import scipy.stats as stats
+    from scipy.special import ndtr, stdtr
+    present=[m for m in metrics if f"{m}_AP1" in df.columns and f"{m}_AP2" in df.columns]
+    A=np.asfortranarray(df[[f"{m}_AP1" for m in present]].to_numpy(dtype=float).reshape(len(df),len(present)))
+    B=np.asfortranarray(df[[f"{m}_AP2" for m in present]].to_numpy(dtype=float).reshape(len(df),len(present)))
+    mask=~(np.isnan(A)|np.isnan(B)); n=mask.sum(axis=0); D=np.where(mask,B-A,0.0)
+    with np.errstate(divide="ignore",invalid="ignore"):
+        mean1=np.where(mask,A,0.0).sum(axis=0)/n; mean2=np.where(mask,B,0.0).sum(axis=0)/n; mean_d=D.sum(axis=0)/n
+        sd=np.sqrt((np.where(mask,D-mean_d,0.0)**2).sum(axis=0)/(n-1)); d=np.where(sd==0,0.0,mean_d/sd)
+        t=-mean_d/(sd/np.sqrt(n)); p_t=2*stdtr(n-1,-np.abs(t))  # ttest_rel(a,b) contrasta a-b
+        # Wilcoxon zero_method='wilcox': se descartan los ceros; aproximacion normal sin correccion de continuidad
+        nz=mask&(D!=0); k=nz.sum(axis=0); R,ties,has_ties=rank_abs(D,nz); r_plus=np.where(nz&(D>0),R,0.0).sum(axis=0)
+        se=np.sqrt((k*(k+1.0)*(2*k+1.0)-ties/2)/24); p_w=2*ndtr(-np.abs((r_plus-k*(k+1)*0.25)/se))
+    allzero=((np.abs(D)<=1e-8)|~mask).all(axis=0); col={m:j for j,m in enumerate(present)}; out=[]
+    for m in metrics:
+        j=col.get(m); direction=infer_direction(m)
+        if j is None: out.append(MetricResult(m,"NA",0,np.nan,np.nan,np.nan,None,np.nan,None,direction,"NA",None,None)); continue
+        nj=int(n[j])
+        if nj<3: out.append(MetricResult(m,"Insuficiente",nj,float("nan"),float("nan"),float("nan"),None,float("nan"),None,direction,"NA",None,None)); continue
+        diffs=D[mask[:,j],j]
+        try: _,p_norm=stats.shapiro(diffs)
+        except Exception: p_norm=None
+        if p_norm is not None and p_norm>0.05:
+            test_used="paired_t"
+            if sd[j]>0: p_val=p_t[j]
+            else: _,p_val=stats.ttest_rel(A[mask[:,j],j],B[mask[:,j],j])  # diferencias constantes: t infinito o indefinido
+        elif allzero[j]: p_val=1.0; test_used="wilcoxon_allzero"
+        elif nj>WILCOXON_EXACT_MAX or (nj>WILCOXON_PERM_MAX and (has_ties[j] or k[j]<nj)): p_val=p_w[j]; test_used="wilcoxon"
         else:
-            try: _,p_val=stats.wilcoxon(a,b,zero_method='wilcox',alternative='two-sided'); test_used="wilcoxon"
+            try: _,p_val=stats.wilcoxon(A[mask[:,j],j],B[mask[:,j],j],zero_method='wilcox',alternative='two-sided'); test_used="wilcoxon"
             except ValueError: p_val=1.0; test_used="wilcoxon_error"
-    mean_ap1=float(np.mean(a)); mean_ap2=float(np.mean(b)); delta=mean_ap2-mean_ap1; pct=safe_pct_change(mean_ap1,mean_ap2)
-    d=cohen_d_paired(a,b); magnitude=classify_effect_size(d); improved=compute_improvement(metric,mean_ap1,mean_ap2)
-    return MetricResult(metric,test_used,n,mean_ap1,mean_ap2,delta,pct,p_val,d,magnitude,infer_direction(metric),improved,p_norm)
+        mean_ap1=float(mean1[j]); mean_ap2=float(mean2[j])
+        out.append(MetricResult(m,test_used,nj,mean_ap1,mean_ap2,mean_ap2-mean_ap1,safe_pct_change(mean_ap1,mean_ap2),p_val,float(d[j]),
+                                classify_effect_size(d[j]),direction,compute_improvement(m,mean_ap1,mean_ap2),p_norm))
+    return out
 
-def run_analysis(df: pd.DataFrame) -> pd.DataFrame:
-    res=[analyze_metric(df,m) for m in METRICS_BASE]
-    res_df=pd.DataFrame([r.to_dict() for r in res])
+def analyze_batch(df: pd.DataFrame, metrics: List[str], n_resamples: int=0, seed: int=42) -> List[MetricResult]:
+    """paired_tests_batch mas el remuestreo de cada metrica (semilla por metrica: no depende de como se agrupen en lotes)"""
+    res=paired_tests_batch(df,metrics)
+    if n_resamples>0:
+        for r in res:
+            if r.test_used in ("NA","Insuficiente"): continue
+            data=df[[f"{r.metric}_AP1",f"{r.metric}_AP2"]].dropna(); diffs=data.iloc[:,1].values-data.iloc[:,0].values
+            r.resampling=resample_stats(diffs.astype(float),n_resamples,task_rng(seed,r.metric))
+    return res
+
+def analyze_metric(df: pd.DataFrame, metric: str, n_resamples: int=0, seed: int=42) -> MetricResult:
+    return analyze_batch(df,[metric],n_resamples,seed)[0]
+
+def fdr_bh(pvals: np.ndarray, alpha: float=0.05):
+    """Benjamini-Hochberg, igual que statsmodels multipletests(method='fdr_bh'): (rechazadas, p corregidos)"""
+    p=np.asarray(pvals,dtype=float); n=len(p); order=np.argsort(p,kind="mergesort"); ps=p[order]; ecdf=np.arange(1,n+1)/n
+    below=np.nonzero(ps<=ecdf*alpha)[0]; rej=np.zeros(n,dtype=bool); rej[:below.max()+1 if len(below) else 0]=True
+    adj=np.minimum(np.minimum.accumulate((ps/ecdf)[::-1])[::-1],1.0); p_corr=np.empty(n); p_corr[order]=adj; rejected=np.empty(n,dtype=bool); rejected[order]=rej
+    return rejected,p_corr
+
+def analysis_tasks(df: pd.DataFrame, group_by: Optional[str]=None, metrics: List[str]=METRICS_BASE) -> list:
+    """Tareas (metrica, subgrupo, columnas AP1/AP2) en orden determinista: subgrupos ordenados y `metrics`"""
+    groups=[(None,df)] if not group_by else list(df.groupby(group_by,sort=True))
+    return [(m,g,sub[[c for c in (f"{m}_AP1",f"{m}_AP2") if c in sub.columns]]) for g,sub in groups for m in metrics]
+
+def batch_items(tasks: list, pending: List[int], jobs: int=1) -> list:
+    """Agrupa las tareas pendientes por subgrupo en lotes (indices, metricas, columnas); con jobs>1, varios lotes por subgrupo"""
+    by_group={}
+    for i in pending: by_group.setdefault(tasks[i][1],[]).append(i)
+    size=max(1,-(-len(pending)//(4*jobs))) if jobs>1 else len(pending)
+    return [(idx,[tasks[i][0] for i in idx],pd.concat([tasks[i][2] for i in idx],axis=1))
+            for ids in by_group.values() for idx in (ids[k:k+size] for k in range(0,len(ids),size))]
+
+def _run_batch(item, n_resamples: int=0, seed: int=42) -> List[MetricResult]:
+    _,metrics,sub=item; return analyze_batch(sub,metrics,n_resamples,seed)
+
+def add_fdr(res_df: pd.DataFrame) -> pd.DataFrame:
+    """Añade p_value_fdr, significant_raw y significant_fdr (BH sobre todas las filas con p-valor, como una familia)"""
     mask=res_df["p_value"].notna(); pvals=res_df.loc[mask,"p_value"].values
     if len(pvals)>0:
-        rejected,p_corr,_,_=multipletests(pvals,alpha=0.05,method='fdr_bh')
+        rejected,p_corr=fdr_bh(pvals,alpha=0.05)
         res_df.loc[mask,"p_value_fdr"]=p_corr
         res_df.loc[mask,"significant_raw"]=res_df.loc[mask,"p_value"]<0.05
         res_df.loc[mask,"significant_fdr"]=rejected
     return res_df
 
+def run_analysis(df: pd.DataFrame, jobs: int=1, group_by: Optional[str]=None, n_resamples: int=0, seed: int=42,
+                 cache: Optional[AnalysisCache]=None, metrics: List[str]=METRICS_BASE, fdr: bool=True) -> pd.DataFrame:
+    # Las metricas pendientes de cada subgrupo van en un lote al kernel vectorizado; jobs>1 reparte los lotes en procesos.
+    # Cada columna se calcula con independencia de las demas, asi que el resultado es identico al serie
+    # Con cache solo se ejecutan las tareas cuya huella (datos + parametros + codigo) no esta guardada
+    tasks=analysis_tasks(df,group_by,metrics); jobs=(os.cpu_count() or 1) if jobs<=0 else jobs
+    hashes=[task_hash(m,sub,n_resamples,seed) for m,_,sub in tasks] if cache is not None else [None]*len(tasks)
+    rows=[cache.get(h) if cache is not None else None for h in hashes]; pending=[i for i,r in enumerate(rows) if r is None]
+    items=batch_items(tasks,pending,jobs); run_batch=functools.partial(_run_batch,n_resamples=n_resamples,seed=seed)
+    if jobs>1 and len(items)>1:
+        with ProcessPoolExecutor(max_workers=min(jobs,len(items))) as ex: batches=list(ex.map(run_batch,items))
+    else: batches=[run_batch(item) for item in items]
+    pending=[i for idx,_,_ in items for i in idx]; res=[r for batch in batches for r in batch]
+    for i,r in zip(pending,res):
+        rows[i]=r.to_dict()
+        if cache is not None: cache.put(hashes[i],rows[i])
+    res_df=pd.DataFrame(rows)
+    if group_by: res_df.insert(0,group_by,[g for _,g,_ in tasks])
+    return add_fdr(res_df) if fdr else res_df
+
 def ensure_dir(p: str): os.makedirs(p, exist_ok=True)
 
-def plot_boxplots(df: pd.DataFrame, outdir: str, metrics: List[str]):
+# ---------------------------- Formato largo y medidas repetidas ---------------------------- #
+# Una fila por (estudiante, entrega, metrica): cualquier numero de entregas (AP1..APk) y de columnas de subgrupo
+
+LONG_COLUMNS=["student","assignment","metric","value"]
+WAVE_RE=re.compile(r"^(?P<metric>.+)_(?P<assignment>AP\d+)$")
+ALL_GROUPS="(todos)"
+
+def assignment_order(a: str) -> tuple:
+    # AP2 antes que AP10
+    m=re.search(r"\d+$",str(a)); return (int(m.group()) if m else float("inf"),str(a))
+
+def wave_columns(df: pd.DataFrame, metric: str) -> List[str]:
+    """Columnas {metric}_APk del dataset ancho, en orden de entrega"""
+    cols=[c for c in df.columns if (w:=WAVE_RE.match(c)) and w["metric"]==metric]
+    return sorted(cols,key=lambda c: assignment_order(WAVE_RE.match(c)["assignment"]))
+
+def all_metrics(df: pd.DataFrame) -> List[str]:
+    """METRICS_BASE y despues cualquier otra metrica con columnas _AP1 y _AP2 (p. ej. conteos por regla)"""
+    extra=[m for m in dict.fromkeys(WAVE_RE.match(c)["metric"] for c in df.columns if WAVE_RE.match(c)) if m not in METRICS_BASE]
+    return METRICS_BASE+[m for m in extra if f"{m}_AP1" in df.columns and f"{m}_AP2" in df.columns]
+
+def is_long(df: pd.DataFrame) -> bool: return set(LONG_COLUMNS)<=set(df.columns)
+
+def to_long(df: pd.DataFrame, metrics: List[str]=METRICS_BASE, keep: Optional[List[str]]=None) -> pd.DataFrame:
+    """Dataset ancho a formato largo (student = indice de fila); `keep` son las columnas de subgrupo a conservar"""
+    cols={c:WAVE_RE.match(c) for m in metrics for c in wave_columns(df,m)}; keep=[c for c in (keep or []) if c in df.columns]
+    long=df[keep+list(cols)].rename_axis("student").reset_index().melt(id_vars=["student",*keep],var_name="column",value_name="value")
+    long["metric"]=long["column"].map({c:w["metric"] for c,w in cols.items()}); long["assignment"]=long["column"].map({c:w["assignment"] for c,w in cols.items()})
+    return long.dropna(subset=["value"])[["student",*keep,"assignment","metric","value"]].reset_index(drop=True)
+
+def from_long(long: pd.DataFrame) -> pd.DataFrame:
+    """Formato largo a dataset ancho ({metric}_{assignment}); el resto de columnas se toma por estudiante"""
+    keep=[c for c in long.columns if c not in LONG_COLUMNS]
+    wide=long.pivot_table(index="student",columns=["metric","assignment"],values="value",aggfunc="first")
+    wide.columns=[f"{m}_{a}" for m,a in wide.columns]
+    if keep: wide=long.groupby("student")[keep].first().join(wide)
+    return wide.rename_axis(None)
+
+def friedman_blocks(x: pd.DataFrame, keys: List[str]) -> pd.DataFrame:
+    """Friedman con correccion por empates (igual que scipy.stats.friedmanchisquare) para todos los bloques a la vez
+
+    `x` tiene una fila por (bloque, student, assignment) y solo casos completos: cada estudiante tiene las k entregas
+    de su bloque. Los rangos se calculan por estudiante con groupby, sin bucles por metrica o subgrupo.
+    """
+    from scipy.special import chdtrc
+    x=x.assign(rank=x.groupby(keys+["student"],sort=False)["value"].rank(method="average"))
+    blk=x.groupby(keys).agg(n_subjects=("student","nunique"),k_assignments=("assignment","nunique"))
+    ties=x.groupby(keys+["student","value"]).size(); ties=(ties**3-ties).groupby(level=keys).sum()
+    sum_r2=(x.groupby(keys+["assignment"])["rank"].sum()**2).groupby(level=keys).sum()
+    n=blk["n_subjects"].astype(float); k=blk["k_assignments"].astype(float)
+    chi2=12.0/(n*k*(k+1))*sum_r2-3.0*n*(k+1); corr=1.0-ties.reindex(blk.index,fill_value=0)/(n*k*(k*k-1))
+    # Todos los valores empatados dentro de cada estudiante: sin evidencia de cambio
+    stat=(chi2/corr).where(corr>0,0.0)
+    blk["statistic"]=stat; blk["p_value"]=chdtrc(k-1,stat); blk["kendall_w"]=stat/(n*(k-1))
+    return blk
+
+def mixed_model_lrt(block: pd.DataFrame) -> tuple:
+    """LRT (ML) de la entrega en value ~ C(assignment) + (1|student); usa todas las observaciones del bloque"""
+    import warnings
+    import statsmodels.formula.api as smf
+    from scipy.special import chdtrc
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        try:
+            full=smf.mixedlm("value ~ C(assignment)",block,groups=block["student"]).fit(reml=False)
+            null=smf.mixedlm("value ~ 1",block,groups=block["student"]).fit(reml=False)
+        except (ValueError,np.linalg.LinAlgError): return np.nan,np.nan
+    lr=max(2.0*(full.llf-null.llf),0.0); return lr,float(chdtrc(block["assignment"].nunique()-1,lr))
+
+def repeated_measures(long: pd.DataFrame, group_by: Optional[List[str]]=None, min_subjects: int=3, mixed: bool=False) -> pd.DataFrame:
+    """Friedman por metrica sobre todas las entregas, para la cohorte y cada columna de group_by en una pasada
+
+    Las filas de cada subgrupo se apilan (group_by, group) y un unico groupby calcula todos los bloques. FDR
+    (Benjamini-Hochberg) dentro de cada familia: la cohorte completa y cada columna de subgrupo por separado.
+    """
+    parts=[long.assign(group_by=ALL_GROUPS,group=ALL_GROUPS)]+[long.assign(group_by=c,group=long[c].astype(str)) for c in (group_by or []) if c in long.columns]
+    x=pd.concat(parts,ignore_index=True)[["group_by","group","metric","student","assignment","value"]].dropna(subset=["value"])
+    keys=["group_by","group","metric"]
+    # Casos completos: estudiantes con valor en todas las entregas que tiene el bloque
+    k=x.groupby(keys)["assignment"].transform("nunique"); per_student=x.groupby(keys+["student"])["assignment"].transform("nunique")
+    complete=x[per_student==k]
+    res=friedman_blocks(complete,keys) if len(complete) else pd.DataFrame(columns=["n_subjects","k_assignments","statistic","p_value","kendall_w"])
+    means=x.groupby(keys+["assignment"])["value"].mean().unstack("assignment")
+    means=means[sorted(means.columns,key=assignment_order)].add_prefix("mean_")
+    res=means.join(res,how="left"); res["n_subjects"]=res["n_subjects"].fillna(0).astype(int)
+    res["k_assignments"]=x.groupby(keys)["assignment"].nunique()
+    ok=(res["n_subjects"]>=min_subjects)&(res["k_assignments"]>=2)
+    res["test_used"]=np.where(ok,"friedman","Insuficiente"); res.loc[~ok,["statistic","p_value","kendall_w"]]=np.nan
+    if mixed:
+        lrt={key:mixed_model_lrt(block) for key,block in x.groupby(keys) if ok.get(key,False)}
+        res["mixed_lr_stat"]=pd.Series({k:v[0] for k,v in lrt.items()},dtype=float); res["mixed_p_value"]=pd.Series({k:v[1] for k,v in lrt.items()},dtype=float)
+    res=res.reset_index()
+    for fam,idx in res.groupby("group_by").groups.items():
+        sub=res.loc[idx]; mask=sub["p_value"].notna()
+        if mask.any():
+            rejected,p_corr=fdr_bh(sub.loc[mask,"p_value"].values); res.loc[sub.index[mask],"p_value_fdr"]=p_corr; res.loc[sub.index[mask],"significant_fdr"]=rejected
+    # Orden: cohorte completa primero, subgrupos ordenados, metricas en el orden de METRICS_BASE
+    order=res["metric"].map({m:i for i,m in enumerate(METRICS_BASE)}).fillna(len(METRICS_BASE))
+    res=res.assign(_f=res["group_by"]!=ALL_GROUPS,_o=order).sort_values(["_f","group_by","group","_o"]).drop(columns=["_f","_o"])
+    lead=["group_by","group","metric","test_used","n_subjects","k_assignments"]
+    return res[lead+[c for c in res.columns if c not in lead]].reset_index(drop=True)
+
+# ---------------------------- Matrices dispersas de issues ---------------------------- #
+# Conteos proyecto x regla, proyecto x extension y proyecto x etiqueta a partir de issues_detallados_*.csv, bloque a
+# bloque: cada bloque se reduce a tripletas (proyecto, rasgo, conteo) y la matriz CSR se arma al final. Para las pruebas
+# solo se densifica un lote de columnas a la vez (estudiantes x ISSUE_BATCH rasgos)
+
+ISSUE_COLUMNS=["project_key","issue_key","rule","component","tags"]
+ISSUE_DIMENSIONS=["rule","extension","tag"]
+ISSUE_BATCH=256  # rasgos densificados por llamada a run_analysis
+PROJECT_COLUMN_RE=re.compile(r"^Sonar_Ap(?P<k>\d+)$",re.IGNORECASE)  # columna del dataset con la clave del proyecto de cada entrega
+NO_EXTENSION="(sin extension)"
+
+def _codes(index: dict, values) -> np.ndarray:
+    return np.fromiter((index.setdefault(v,len(index)) for v in values),dtype=np.int64,count=len(values))
+
+def issue_features(chunk: pd.DataFrame, dim: str) -> tuple:
+    """(project_key, rasgo) de cada issue del bloque para una dimension; una fila por etiqueta en 'tag'"""
+    if dim=="rule": feats=chunk["rule"]
+    elif dim=="extension":
+        # "org_proyecto:src/Archivo.cs" -> ".cs"; los componentes sin archivo (issues del proyecto) no cuentan
+        path=chunk["component"].astype("string").str.partition(":"); file=path[2].where((path[1]==":")&(path[2]!=""))
+        feats=file.str.extract(r"(\.[^./\\]+)$",expand=False).str.lower().fillna(NO_EXTENSION).where(file.notna())
+    else: feats=chunk["tags"].astype("string").str.split(",").explode().str.strip().replace("",pd.NA)
+    keep=feats.notna(); return chunk["project_key"].reindex(feats.index)[keep].to_numpy(),feats[keep].to_numpy()
+
+class IssueMatrices:
+    """Conteos dispersos de issues por proyecto para cada dimension de ISSUE_DIMENSIONS (indices por orden de aparicion)"""
+    def __init__(self):
+        self.projects={}; self.features={d:{} for d in ISSUE_DIMENSIONS}; self._parts={d:[] for d in ISSUE_DIMENSIONS}; self.n_issues=0
+        self._seen=np.empty(0,dtype=np.uint64)  # huellas de (project_key, issue_key) ya contados
+    def _first_seen(self, chunk: pd.DataFrame) -> np.ndarray:
+        # Una fila por estudiante: el issue de un proyecto compartido se repite por estudiante (tambien entre bloques)
+        keyed=chunk["issue_key"].notna().to_numpy(); h=pd.util.hash_pandas_object(chunk[["project_key","issue_key"]],index=False).to_numpy()
+        new=keyed&~np.isin(h,self._seen)&~pd.Series(h).duplicated().to_numpy(); self._seen=np.union1d(self._seen,h[new]); return new|~keyed
+    def add(self, chunk: pd.DataFrame) -> "IssueMatrices":
+        # Todo proyecto del flujo tiene fila en las tres matrices (de ceros si, p. ej., no tiene etiquetas)
+        chunk=chunk.dropna(subset=["project_key"]).reset_index(drop=True); chunk=chunk[self._first_seen(chunk)].reset_index(drop=True)
+        if chunk.empty: return self
+        self.n_issues+=len(chunk); pu=chunk["project_key"].unique()
+        pmap=dict(zip(pu,_codes(self.projects,pu)))
+        for dim in ISSUE_DIMENSIONS:
+            projects,feats=issue_features(chunk,dim)
+            if not len(feats): continue
+            fc,fu=pd.factorize(feats); key=np.fromiter((pmap[p] for p in projects),dtype=np.int64,count=len(projects))*len(fu)+fc
+            pairs,counts=np.unique(key,return_counts=True)
+            self._parts[dim].append((pairs//len(fu),_codes(self.features[dim],fu)[pairs%len(fu)],counts))
+        return self
+    def matrix(self, dim: str):
+        """CSR proyectos x rasgos con el numero de issues (las partes acumuladas quedan compactadas en una)"""
+        from scipy.sparse import csr_matrix
+        parts=self._parts[dim]; rows,cols,counts=(np.concatenate(x) for x in zip(*parts)) if parts else (np.empty(0,dtype=np.int64),)*3
+        m=csr_matrix((counts,(rows,cols)),shape=(len(self.projects),len(self.features[dim])),dtype=np.int64); m.sum_duplicates()
+        c=m.tocoo(); self._parts[dim]=[(c.row.astype(np.int64),c.col.astype(np.int64),c.data)]
+        return m
+    def feature_names(self, dim: str) -> List[str]: return list(self.features[dim])
+    def project_index(self, keys) -> np.ndarray:
+        """Fila de cada proyecto; los que no tienen issues en el archivo se registran con una fila de ceros"""
+        return _codes(self.projects,list(keys))
+
+def sniff_csv(path: str) -> tuple:
+    """(separador, codificacion) por los primeros bytes: BOM -> utf-8-sig, UTF-8 valido -> utf-8, si no latin-1"""
+    import codecs
+    with open(path,"rb") as f: head=f.read(64*1024)
+    if head.startswith(codecs.BOM_UTF8): enc="utf-8-sig"
+    else:
+        try: codecs.getincrementaldecoder("utf-8")().decode(head,final=False); enc="utf-8"
+        except UnicodeDecodeError: enc="latin-1"
+    header=(head.decode(enc,errors="replace").splitlines() or [""])[0]; sep=max([",","\t",";","|"],key=header.count)
+    return (sep if header.count(sep) else ","),enc
+
+def read_issue_chunks(path: str, sep: Optional[str]=None, encoding: Optional[str]=None, chunksize: int=200_000):
+    """Bloques de issues_detallados_*.csv (o .parquet) con ISSUE_COLUMNS; separador y codificacion se detectan si faltan"""
+    if path.lower().endswith((".parquet",".pq")): yield pd.read_parquet(path,columns=ISSUE_COLUMNS); return
+    local=os.path.exists(path)
+    if local and (sep is None or encoding is None): found=sniff_csv(path); sep=sep or found[0]; encoding=encoding or found[1]
+    with pd.read_csv(path,usecols=ISSUE_COLUMNS,sep=sep or ",",encoding=encoding or "utf-8-sig",dtype=str,chunksize=chunksize,memory_map=local) as reader: yield from reader
+
+def build_issue_matrices(chunks) -> IssueMatrices:
+    im=IssueMatrices()
+    for chunk in chunks: im.add(chunk)
+    return im
+
+def project_rows(df: pd.DataFrame, im: IssueMatrices) -> dict:
+    """Entrega -> fila de cada estudiante en las matrices (NaN solo si falta la clave en Sonar_ApK; sin issues = fila de ceros)"""
+    waves={f"AP{int(w['k'])}":c for c in df.columns if (w:=PROJECT_COLUMN_RE.match(c))}; rows={}
+    for wave in sorted(waves,key=assignment_order):
+        keys=df[waves[wave]].astype("string").str.strip(); has=(keys.notna()&(keys!="")).to_numpy(dtype=bool)
+        r=np.full(len(df),np.nan); r[has]=im.project_index(keys[has]); rows[wave]=r
+    return rows
+
+def issue_feature_frame(matrix, rows: dict, names: List[str], features: np.ndarray, index: pd.Index) -> pd.DataFrame:
+    """Lote denso estudiantes x {rasgo}_APk de los rasgos indicados"""
+    cols={}
+    for wave,r in rows.items():
+        found=~np.isnan(r); block=np.full((len(r),len(features)),np.nan); block[found]=matrix[r[found].astype(np.int64)][:,features].toarray()
+        cols.update({f"{names[j]}_{wave}":block[:,i] for i,j in enumerate(features)})
+    return pd.DataFrame(cols,index=index)
+
+def analyze_issue_features(df: pd.DataFrame, im: IssueMatrices, jobs: int=1, n_resamples: int=0, seed: int=42,
+                           cache: Optional[AnalysisCache]=None, min_projects: int=3) -> pd.DataFrame:
+    """Pruebas AP1 vs AP2 de cada regla / extension / etiqueta presente en >= min_projects proyectos de la cohorte; FDR por dimension"""
+    rows=project_rows(df,im)
+    if not {"AP1","AP2"}<=set(rows): raise SystemExit("--issues requiere las columnas Sonar_Ap1 y Sonar_Ap2 (clave del proyecto de cada entrega)")
+    cohort=np.unique(np.concatenate([r[~np.isnan(r)] for r in rows.values()])).astype(np.int64); out=[]
+    for dim in ISSUE_DIMENSIONS:
+        m=im.matrix(dim); names=im.feature_names(dim); n_projects=np.diff(m[cohort].tocsc().indptr); keep=np.flatnonzero(n_projects>=min_projects)
+        if not len(keep): continue
+        parts=[run_analysis(issue_feature_frame(m,rows,names,keep[i:i+ISSUE_BATCH],df.index),jobs=jobs,n_resamples=n_resamples,seed=seed,
+                            cache=cache,metrics=[names[j] for j in keep[i:i+ISSUE_BATCH]],fdr=False) for i in range(0,len(keep),ISSUE_BATCH)]
+        res=pd.concat(parts,ignore_index=True); res.insert(0,"dimension",dim); res.insert(2,"n_projects",n_projects[keep])
+        # Menos issues es mejor en cualquier regla, extension o etiqueta
+        tested=res["improved"]!="NA"; res["direction"]="lower_better"
+        res.loc[tested,"improved"]=np.where(res.loc[tested,"mean_ap2"]<res.loc[tested,"mean_ap1"],"Yes","No")
+        out.append(add_fdr(res))
+    return pd.concat(out,ignore_index=True) if out else pd.DataFrame()
+
+# ---------------------------- Pipeline incremental ---------------------------- #
+# Huellas de entradas (datos, parametros, codigo) por prueba y por archivo de salida; lo que no cambio no se recalcula
+
+ANALYSIS_CACHE=".cache_analisis.json"
+
+def _hash_code(h, code):
+    # Recorre las funciones anidadas (comprensiones, lambdas): su repr incluye la direccion de memoria
+    h.update(code.co_code)
+    for c in code.co_consts:
+        if hasattr(c,"co_code"): _hash_code(h,c)
+        else: h.update(repr(c).encode())
+
+def code_hash(*funcs) -> str:
+    h=hashlib.sha256()
+    for f in funcs: _hash_code(h,f.__code__)
+    return h.hexdigest()
+
+@functools.lru_cache(maxsize=1)
+def analysis_code_hash() -> str:
+    """Huella del codigo y las constantes que determinan el resultado de una prueba"""
+    return code_hash(paired_tests_batch,rank_abs,analyze_batch,MetricResult.to_dict,classify_effect_size,infer_direction,compute_improvement,
+                     safe_pct_change,task_rng,bootstrap_ci,paired_permutation_p,resample_stats)+repr((sorted(LOWER_IS_BETTER),RESAMPLE_CELLS,EXACT_PERM_MAX,WILCOXON_EXACT_MAX,WILCOXON_PERM_MAX))
+
+def frame_hash(data: pd.DataFrame, *extra) -> str:
+    h=hashlib.sha256(); h.update(repr((list(data.columns),)+extra).encode())
+    h.update(pd.util.hash_pandas_object(data,index=False).values.tobytes()); return h.hexdigest()
+
+def task_hash(metric: str, sub: pd.DataFrame, n_resamples: int, seed: int) -> str:
+    return frame_hash(sub,metric,n_resamples,seed,analysis_code_hash())
+
+def read_json_cache(path: str) -> dict:
+    if not os.path.exists(path): return {}
+    try:
+        with open(path,encoding='utf-8') as f: return json.load(f)
+    except (OSError,ValueError): return {}
+
+class AnalysisCache:
+    """Resultados por prueba y huellas de los archivos generados, en outdir/.cache_analisis.json"""
+    def __init__(self, outdir: str):
+        self.path=os.path.join(outdir,ANALYSIS_CACHE); data=read_json_cache(self.path)
+        self.tasks=data.get("tasks",{}); self.outputs=data.get("outputs",{}); self.used=set(); self.hits=0; self.misses=0
+    def get(self, h: str) -> Optional[dict]:
+        row=self.tasks.get(h); self.used.add(h)
+        if row is None: self.misses+=1
+        else: self.hits+=1
+        return row
+    def put(self, h: str, row: dict): self.tasks[h]=row; self.used.add(h)
+    def write(self, path: str, fingerprint: str, writer) -> bool:
+        """Llama a writer(path) solo si la huella de sus entradas cambio o el archivo no existe; True si se escribio"""
+        name=os.path.basename(path)
+        if self.outputs.get(name)==fingerprint and os.path.exists(path): return False
+        writer(path); self.outputs[name]=fingerprint; return True
+    def save(self):
+        # Solo se conservan las pruebas usadas en esta ejecucion (el archivo no crece con datos antiguos)
+        data={"tasks":{h:r for h,r in self.tasks.items() if h in self.used},"outputs":self.outputs}
+        with open(self.path,"w",encoding="utf-8") as f: json.dump(data,f,indent=1)  # sin sort_keys: el orden de las claves es el de las columnas
+
+def write_output(cache: Optional[AnalysisCache], path: str, fingerprint: str, writer) -> bool:
+    """writer(path) si no hay cache o si las entradas del archivo cambiaron; True si se escribio"""
+    if cache is None: writer(path); return True
+    return cache.write(path,fingerprint,writer)
+
+def report_hash(res_df: pd.DataFrame, outdir: str, generator, *params) -> str:
+    # Los informes enlazan las figuras presentes en outdir: su lista forma parte de la huella
+    figs=sorted(f for f in os.listdir(outdir) if f.startswith("fig_") and f.endswith(".png"))
+    return frame_hash(res_df,generator.__name__,figs,code_hash(generator,format_pct),*params)
+
+# ---------------------------- Gráficos ---------------------------- #
+# Cada figura es un trabajo independiente (funcion de dibujo, datos de entrada, archivo de salida).
+# Los trabajos se reparten entre procesos (--jobs) y se omiten si su huella (datos + codigo) no cambio.
+
+RENDER_CACHE=".cache_figuras.json"
+
+def _pyplot():
+    # Backend sin pantalla; se importa al dibujar la primera figura (tambien en cada proceso de --jobs)
+    import matplotlib; matplotlib.use("Agg"); import matplotlib.pyplot as plt; return plt
+
+def boxplot_job(df: pd.DataFrame, outdir: str, metrics: List[str]):
     rows=[]
     for m in metrics:
-        c1,c2=f"{m}_AP1",f"{m}_AP2"; 
-        if c1 in df.columns and c2 in df.columns:
-            sub=df[[c1,c2]].copy(); sub.columns=["AP1","AP2"]
+        cols=wave_columns(df,m)
+        if len(cols)>=2:
+            sub=df[cols].copy(); sub.columns=[WAVE_RE.match(c)["assignment"] for c in cols]
             if sub.dropna().empty:
                 continue
             long=sub.melt(var_name="asignatura", value_name="valor"); long["metric"]=m; rows.append(long)
-    if not rows: return
-    long_df=pd.concat(rows,ignore_index=True); metrics_present=sorted(long_df["metric"].unique())
+    if not rows: return None
+    return (_render_boxplots,pd.concat(rows,ignore_index=True),os.path.join(outdir,"fig_boxplots.png"))
+
+def _render_boxplots(long_df: pd.DataFrame, out: str):
+    import seaborn as sns; plt=_pyplot()
+    metrics_present=sorted(long_df["metric"].unique())
     n_metrics=len(metrics_present); ncols=4; nrows=int(np.ceil(n_metrics/ncols))
     fig,axes=plt.subplots(nrows,ncols,figsize=(4*ncols,4*nrows))
     axes=np.atleast_2d(axes).reshape(nrows,ncols)
@@ -125,43 +591,140 @@ def plot_boxplots(df: pd.DataFrame, outdir: str, metrics: List[str]):
     # Desactivar ejes sobrantes
     used=len(metrics_present)
     for ax in axes.flat[used:]: ax.axis('off')
-    plt.tight_layout(); out=os.path.join(outdir,"fig_boxplots.png"); plt.savefig(out,dpi=150); plt.close(fig)
+    plt.tight_layout(); plt.savefig(out,dpi=150); plt.close(fig)
 
-def plot_spaghetti(df: pd.DataFrame, outdir: str, metrics: List[str]):
+def spaghetti_jobs(df: pd.DataFrame, outdir: str, metrics: List[str]) -> list:
+    jobs=[]
     for m in metrics:
-        c1,c2=f"{m}_AP1",f"{m}_AP2"
-        if c1 not in df.columns or c2 not in df.columns: continue
-        sub=df[[c1,c2]].dropna(); 
+        cols=wave_columns(df,m)
+        if len(cols)<2: continue
+        sub=df[cols].dropna(); 
         if sub.empty: continue
-        fig,ax=plt.subplots(figsize=(4,4)); x=[1,2]
-        for _,row in sub.iterrows(): ax.plot(x,[row[c1],row[c2]],color="#999",alpha=0.5)
-        ax.scatter([1]*len(sub),sub[c1],color="#1f77b4",label="AP1",s=25)
-        ax.scatter([2]*len(sub),sub[c2],color="#ff7f0e",label="AP2",s=25)
-        ax.set_xticks(x); ax.set_xticklabels(["AP1","AP2"]); ax.set_title(f"Evolución pareada: {m}"); ax.grid(alpha=0.3); ax.legend(frameon=False)
-        plt.tight_layout(); out=os.path.join(outdir,f"fig_spaghetti_{m}.png"); plt.savefig(out,dpi=130); plt.close(fig)
+        jobs.append((_render_spaghetti,sub,os.path.join(outdir,f"fig_spaghetti_{m}.png")))
+    return jobs
 
-def plot_correlation_heatmap(df: pd.DataFrame, outdir: str, metrics: List[str]):
-    cols=[]
-    for m in metrics:
-        for suf in ("AP1","AP2"):
-            c=f"{m}_{suf}"; 
-            if c in df.columns: cols.append(c)
+def _render_spaghetti(sub: pd.DataFrame, out: str):
+    from matplotlib.collections import LineCollection; plt=_pyplot()
+    m=WAVE_RE.match(sub.columns[0])["metric"]; labels=[WAVE_RE.match(c)["assignment"] for c in sub.columns]
+    fig,ax=plt.subplots(figsize=(max(4,1.5*len(labels)),4)); x=np.arange(1,len(labels)+1)
+    # Todas las lineas por estudiante (una polilinea por entrega) en una sola coleccion (un unico objeto a dibujar)
+    segs=np.stack([np.column_stack([np.full(len(sub),float(xi)),sub[c].values]) for xi,c in zip(x,sub.columns)],axis=1)
+    ax.add_collection(LineCollection(segs,colors="#999",alpha=0.5,linewidths=plt.rcParams["lines.linewidth"],capstyle="projecting"))
+    for i,(xi,c) in enumerate(zip(x,sub.columns)): ax.scatter([xi]*len(sub),sub[c],color=f"C{i}",label=labels[i],s=25)
+    ax.set_xticks(x); ax.set_xticklabels(labels); ax.set_title(f"Evolución pareada: {m}"); ax.grid(alpha=0.3); ax.legend(frameon=False)
+    plt.tight_layout(); plt.savefig(out,dpi=130); plt.close(fig)
+
+def heatmap_job(df: pd.DataFrame, outdir: str, metrics: List[str]):
+    cols=[c for m in metrics for c in wave_columns(df,m)]
     corr_df=df[cols].copy(); 
-    if corr_df.empty: return
+    if corr_df.empty: return None
+    return (_render_heatmap,corr_df,os.path.join(outdir,"fig_heatmap_correlaciones.png"))
+
+def _render_heatmap(corr_df: pd.DataFrame, out: str):
+    import seaborn as sns; plt=_pyplot()
     corr=corr_df.corr(); plt.figure(figsize=(min(1+0.5*len(corr.columns),18),min(1+0.5*len(corr.columns),18)))
-    sns.heatmap(corr,cmap="coolwarm",center=0,annot=False,linewidths=0.3); plt.title("Matriz de Correlaciones (AP1 & AP2)"); plt.tight_layout()
-    out=os.path.join(outdir,"fig_heatmap_correlaciones.png"); plt.savefig(out,dpi=160); plt.close()
+    waves=sorted({WAVE_RE.match(c)["assignment"] for c in corr.columns},key=assignment_order)
+    sns.heatmap(corr,cmap="coolwarm",center=0,annot=False,linewidths=0.3); plt.title(f"Matriz de Correlaciones ({' & '.join(waves)})"); plt.tight_layout()
+    plt.savefig(out,dpi=160); plt.close()
+
+def figure_hash(render, data: pd.DataFrame) -> str:
+    """Huella de una figura: codigo de la funcion de dibujo, columnas y valores de entrada"""
+    h=hashlib.sha256(); _hash_code(h,render.__code__); h.update(repr(list(data.columns)).encode())
+    h.update(pd.util.hash_pandas_object(data,index=True).values.tobytes())
+    return h.hexdigest()
+
+def _render_job(job):
+    render,data,out=job; render(data,out); return out
+
+def render_figures(jobs: list, outdir: str, n_jobs: int=1, use_cache: bool=True) -> list:
+    """Dibuja los trabajos cuya huella cambio (en paralelo si n_jobs>1); devuelve las figuras redibujadas"""
+    jobs=[j for j in jobs if j is not None]; cache_path=os.path.join(outdir,RENDER_CACHE); cache={}
+    if use_cache and os.path.exists(cache_path):
+        try:
+            with open(cache_path,encoding='utf-8') as f: cache=json.load(f)
+        except (OSError,ValueError): cache={}
+    hashes={out:figure_hash(render,data) for render,data,out in jobs}
+    pending=[j for j in jobs if not (use_cache and cache.get(os.path.basename(j[2]))==hashes[j[2]] and os.path.exists(j[2]))]
+    n_jobs=(os.cpu_count() or 1) if n_jobs<=0 else n_jobs
+    if n_jobs>1 and len(pending)>1:
+        with ProcessPoolExecutor(max_workers=min(n_jobs,len(pending))) as ex: done=list(ex.map(_render_job,pending))
+    else: done=[_render_job(j) for j in pending]
+    if use_cache:
+        cache.update({os.path.basename(out):hashes[out] for out in done})
+        with open(cache_path,'w',encoding='utf-8') as f: json.dump(cache,f,indent=1,sort_keys=True)
+    return done
+
+def plot_boxplots(df: pd.DataFrame, outdir: str, metrics: List[str]):
+    render_figures([boxplot_job(df,outdir,metrics)],outdir)
+
+def plot_spaghetti(df: pd.DataFrame, outdir: str, metrics: List[str], jobs: int=1):
+    render_figures(spaghetti_jobs(df,outdir,metrics),outdir,jobs)
+
+def plot_correlation_heatmap(df: pd.DataFrame, outdir: str, metrics: List[str]):
+    render_figures([heatmap_job(df,outdir,metrics)],outdir)
+
+def plot_all(df: pd.DataFrame, outdir: str, metrics: List[str], jobs: int=1, use_cache: bool=True) -> list:
+    """Boxplots, spaghetti (primeras 10 metricas) y heatmap como un solo lote de trabajos independientes"""
+    figs=[boxplot_job(df,outdir,metrics),*spaghetti_jobs(df,outdir,metrics[:10]),heatmap_job(df,outdir,metrics)]
+    return render_figures(figs,outdir,jobs,use_cache)
+
+# ---------------------------- Instrumentacion ---------------------------- #
+# Mismo formato JSON que notebooks/instrumentacion.py (etapas, contadores, memoria pico), sin peticiones HTTP
+
+def peak_memory_mb() -> Optional[float]:
+    try: import resource
+    except ImportError: return None  # Windows
+    peak=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss; return round(peak/(1024**2 if sys.platform=="darwin" else 1024),1)
+
+class Stages:
+    """Tiempo de pared, llamadas y memoria pico por etapa, y contadores de filas/pruebas/figuras"""
+    def __init__(self, progress: bool=False):
+        self.start=datetime.datetime.now(); self.t0=time.perf_counter(); self.progress=progress; self.stages={}; self.counters={}
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        if self.progress: print(f"⏱️  {name}...",file=sys.stderr,flush=True)
+        t=time.perf_counter()
+        try: yield self
+        finally:
+            st=self.stages.setdefault(name,{"segundos":0.0,"llamadas":0,"memoria_pico_mb":None})
+            st["segundos"]+=time.perf_counter()-t; st["llamadas"]+=1; st["memoria_pico_mb"]=peak_memory_mb()
+            if self.progress: print(f"⏱️  {name}: {st['segundos']:.2f}s ({time.perf_counter()-self.t0:.1f}s en total)",file=sys.stderr,flush=True)
+    def count(self, name: str, n: int=1): self.counters[name]=self.counters.get(name,0)+n
+    def summary(self) -> dict:
+        return {"inicio":self.start.isoformat(timespec="seconds"),"duracion_s":round(time.perf_counter()-self.t0,3),"memoria_pico_mb":peak_memory_mb(),
+                "etapas":{k:{**v,"segundos":round(v["segundos"],3)} for k,v in self.stages.items()},"contadores":dict(self.counters)}
+    def save(self, path: str) -> str:
+        with open(path,'w',encoding='utf-8') as f: json.dump(self.summary(),f,indent=2,ensure_ascii=False)
+        return path
 
 def parse_args():
     p=argparse.ArgumentParser(description="Análisis de métricas de calidad AP1 vs AP2")
-    p.add_argument("--csv",default="https://raw.githubusercontent.com/TesisEnel/Recopilacion_Datos_CalidadCodigo/refs/heads/main/data/Estudiantes_2023-2024_con_metricas_sonarcloud.csv",help="Ruta al CSV de estudiantes con métricas")
+    p.add_argument("--csv",default="https://raw.githubusercontent.com/TesisEnel/Recopilacion_Datos_CalidadCodigo/refs/heads/main/data/Estudiantes_2023-2024_con_metricas_sonarcloud.csv",help="Ruta al CSV (o Parquet / almacen SQLite) de estudiantes con métricas")
     p.add_argument("--out",default="outputs",help="Directorio de salida")
     p.add_argument("--no-plots",action="store_true",help="Omitir generación de gráficos")
+    p.add_argument("--stats-only",action="store_true",help="Solo resultados_metricas*.csv: sin gráficos ni reportes (no carga matplotlib/seaborn)")
+    p.add_argument("--no-plot-cache",action="store_true",help="Redibujar todas las figuras aunque sus datos no hayan cambiado")
+    p.add_argument("--no-cache",action="store_true",help="Recalcular todas las pruebas y reescribir todos los archivos (ignora outputs/.cache_analisis.json)")
     p.add_argument("--metrics",nargs="*",help="Subconjunto de métricas base a analizar (default: todas)")
+    p.add_argument("--all-metrics",action="store_true",help="Analizar toda columna <metrica>_AP1/_AP2 del dataset (p. ej. conteos por regla), no solo las métricas base; los gráficos siguen siendo de las base")
+    p.add_argument("--jobs",type=int,default=1,help="Procesos para el análisis por métrica/subgrupo (0 = todos los núcleos)")
+    p.add_argument("--n-resamples",type=int,default=10000,help="Remuestras bootstrap/permutación por métrica (0 = sin IC ni p de permutación)")
+    p.add_argument("--seed",type=int,default=42,help="Semilla del remuestreo (resultados reproducibles)")
+    p.add_argument("--metrics-json",help="Guardar tiempos por etapa, memoria pico y contadores en este JSON")
+    p.add_argument("--progress",action="store_true",help="Mostrar el inicio y la duración de cada etapa en stderr")
+    p.add_argument("--group-by",nargs="+",help="Columnas de subgrupo (p. ej. Semestre Sexo); genera resultados_metricas_por_<col>.csv por columna")
+    p.add_argument("--repeated",action="store_true",help="Friedman sobre todas las entregas (resultados_medidas_repetidas.csv); automatico con 3 o mas entregas")
+    p.add_argument("--mixed",action="store_true",help="Añadir a --repeated un modelo mixto por metrica/subgrupo (requiere statsmodels; mas lento)")
+    p.add_argument("--issues",help="CSV/Parquet de issues (issues_detallados_*.csv): pruebas AP1 vs AP2 por regla, extensión y etiqueta")
+    p.add_argument("--issues-sep",help="Separador del CSV de issues (por defecto se detecta)")
+    p.add_argument("--issues-encoding",help="Codificación del CSV de issues (por defecto se detecta)")
+    p.add_argument("--issues-min-projects",type=int,default=3,help="Probar solo reglas/extensiones/etiquetas presentes en al menos N proyectos de la cohorte")
     p.add_argument("--report-md",action="store_true",default=True,help="Generar reporte interpretativo en Markdown")
     p.add_argument("--report-formal",action="store_true",default=True,help="Generar informe formal con gráficos")
     p.add_argument("--report-exec",action="store_true",default=True,help="Generar resumen ejecutivo con gráficos")
-    return p.parse_args()
+    args=p.parse_args()
+    if args.stats_only: args.no_plots=True; args.report_md=args.report_formal=args.report_exec=False
+    return args
 
 # ---------------------------- Reporte Markdown ---------------------------- #
 
@@ -299,35 +862,90 @@ def generate_executive_summary(res_df: pd.DataFrame,outdir:str):
     return path
 
 def main():
-    args=parse_args(); ensure_dir(args.out); df=load_dataset(args.csv)
-    metrics=METRICS_BASE if not args.metrics else [m for m in args.metrics if m in METRICS_BASE]
-    res_df=run_analysis(df)
-    if metrics!=METRICS_BASE: res_df=res_df[res_df["metric"].isin(metrics)].reset_index(drop=True)
-    out_raw=os.path.join(args.out,"resultados_metricas.csv"); res_df.to_csv(out_raw,index=False)
+    args=parse_args(); ensure_dir(args.out); st=Stages(progress=args.progress)
+    cache=None if args.no_cache else AnalysisCache(args.out); written=[]
+    def save_csv(frame: pd.DataFrame, path: str):
+        if write_output(cache,path,frame_hash(frame),lambda p: frame.to_csv(p,index=False)): written.append(path)
+    with st.stage("load"): df=load_dataset(args.csv)
+    st.count("filas",len(df))
+    analyzed=all_metrics(df) if args.all_metrics else METRICS_BASE
+    metrics=analyzed if not args.metrics else [m for m in args.metrics if m in analyzed]
+    with st.stage("analyze"): res_df=run_analysis(df,jobs=args.jobs,n_resamples=args.n_resamples,seed=args.seed,cache=cache,metrics=analyzed)
+    st.count("pruebas",len(res_df))
+    if metrics!=analyzed: res_df=res_df[res_df["metric"].isin(metrics)].reset_index(drop=True)
+    out_raw=os.path.join(args.out,"resultados_metricas.csv"); save_csv(res_df,out_raw)
     res_sorted=res_df.sort_values("p_value_fdr") if "p_value_fdr" in res_df.columns else res_df.sort_values("p_value")
-    out_fdr=os.path.join(args.out,"resultados_metricas_fdr.csv"); res_sorted.to_csv(out_fdr,index=False)
+    out_fdr=os.path.join(args.out,"resultados_metricas_fdr.csv"); save_csv(res_sorted,out_fdr)
+    out_groups=[]; group_cols=args.group_by or []
+    for col in group_cols:
+        if col not in df.columns: raise SystemExit(f"Columna de subgrupo no encontrada: {col}")
+    for col in group_cols:
+        with st.stage("analyze"): grp_df=run_analysis(df,jobs=args.jobs,group_by=col,n_resamples=args.n_resamples,seed=args.seed,cache=cache,metrics=analyzed)
+        st.count("pruebas",len(grp_df))
+        if metrics!=analyzed: grp_df=grp_df[grp_df["metric"].isin(metrics)].reset_index(drop=True)
+        out_groups.append(os.path.join(args.out,f"resultados_metricas_por_{col}.csv")); save_csv(grp_df,out_groups[-1])
+    out_rep=None; n_waves=max((len(wave_columns(df,m)) for m in metrics),default=0)
+    if args.repeated or args.mixed or n_waves>=3:
+        # Todas las entregas a la vez; la cohorte y cada columna de subgrupo en un unico groupby
+        with st.stage("analyze"): rep_df=repeated_measures(to_long(df,metrics,keep=group_cols),group_cols,mixed=args.mixed)
+        st.count("pruebas",len(rep_df))
+        out_rep=os.path.join(args.out,"resultados_medidas_repetidas.csv"); save_csv(rep_df,out_rep)
+    out_issues=None
+    if args.issues:
+        with st.stage("issues"): im=build_issue_matrices(read_issue_chunks(args.issues,args.issues_sep,args.issues_encoding))
+        st.count("issues",im.n_issues)
+        with st.stage("analyze"): iss_df=analyze_issue_features(df,im,jobs=args.jobs,n_resamples=args.n_resamples,seed=args.seed,cache=cache,min_projects=args.issues_min_projects)
+        st.count("pruebas",len(iss_df))
+        out_issues=os.path.join(args.out,"resultados_issues.csv"); save_csv(iss_df,out_issues)
+    if cache is not None:
+        st.count("pruebas_recalculadas",cache.misses); print(f"Pruebas: {cache.misses} recalculadas, {cache.hits} sin cambios (reutilizadas)")
     print("\n=== RESUMEN MÉTRICAS (ordenadas por p corregido) ===")
     cols_show=["metric","n_paired","mean_ap1","mean_ap2","delta_ap2_minus_ap1","pct_change","test_used","p_value","p_value_fdr","effect_size_d","effect_magnitude","improved"]
     print(res_sorted[cols_show].to_string(index=False,float_format=lambda x:f"{x:0.3f}"))
+    if out_rep:
+        print(f"\n=== MEDIDAS REPETIDAS ({n_waves} entregas como maximo, Friedman) ===")
+        cols_rep=["group_by","group","metric","n_subjects","k_assignments","statistic","p_value","p_value_fdr","kendall_w"]+(["mixed_p_value"] if args.mixed else [])
+        print(rep_df[rep_df["group_by"]==ALL_GROUPS][[c for c in cols_rep if c in rep_df.columns]].to_string(index=False,float_format=lambda x:f"{x:0.3f}"))
+    if out_issues and "p_value_fdr" in iss_df.columns:
+        sig=iss_df[iss_df["significant_fdr"]==True]
+        print(f"\n=== ISSUES ({im.n_issues} issues, {len(im.projects)} proyectos): {len(iss_df)} pruebas, {len(sig)} significativas tras FDR ===")
+        cols_iss=["dimension","metric","n_projects","n_paired","mean_ap1","mean_ap2","test_used","p_value","p_value_fdr","improved"]
+        top=iss_df.sort_values("p_value_fdr",kind="stable").groupby("dimension",sort=False).head(5)
+        print(top.sort_values("dimension",key=lambda c: c.map(ISSUE_DIMENSIONS.index),kind="stable")[cols_iss].to_string(index=False,float_format=lambda x:f"{x:0.3f}"))
     if not args.no_plots:
-        print("\nGenerando gráficos..."); plot_boxplots(df,args.out,metrics); plot_spaghetti(df,args.out,metrics[:10]); plot_correlation_heatmap(df,args.out,metrics); print("Gráficos guardados en:",args.out)
-    if args.report_md:
-        md_path=generate_markdown_report(res_sorted,args.out,metrics,args.csv)
-        print("Reporte Markdown generado:",md_path)
-    if args.report_formal:
-        if args.no_plots:
-            print("(Aviso) --report-formal solicitado sin gráficos; considere omitir --no-plots")
-        formal_path=generate_formal_report(res_sorted,args.out,metrics,args.csv)
-        print("Informe formal generado:",formal_path)
-    if args.report_exec:
-        if args.no_plots:
-            print("(Aviso) --report-exec solicitado sin gráficos; considere omitir --no-plots")
-        exec_path=generate_executive_summary(res_sorted,args.out)
-        print("Resumen ejecutivo generado:",exec_path)
+        print("\nGenerando gráficos...")
+        with st.stage("plot"): rendered=plot_all(df,args.out,[m for m in metrics if m in METRICS_BASE],jobs=args.jobs,use_cache=not (args.no_plot_cache or args.no_cache))
+        st.count("figuras_redibujadas",len(rendered))
+        print(f"Gráficos guardados en: {args.out} ({len(rendered)} redibujados, el resto sin cambios)")
+    with st.stage("report"):
+        # Cada informe se regenera solo si cambian sus resultados, parametros, figuras enlazadas o su codigo
+        if args.report_md:
+            md_path=os.path.join(args.out,'reporte_metricas.md')
+            if write_output(cache,md_path,report_hash(res_sorted,args.out,generate_markdown_report,metrics,args.csv),lambda p: generate_markdown_report(res_sorted,args.out,metrics,args.csv)):
+                written.append(md_path); print("Reporte Markdown generado:",md_path)
+        if args.report_formal:
+            if args.no_plots:
+                print("(Aviso) --report-formal solicitado sin gráficos; considere omitir --no-plots")
+            formal_path=os.path.join(args.out,'reporte_formal.md')
+            if write_output(cache,formal_path,report_hash(res_sorted,args.out,generate_formal_report,metrics,args.csv),lambda p: generate_formal_report(res_sorted,args.out,metrics,args.csv)):
+                written.append(formal_path); print("Informe formal generado:",formal_path)
+        if args.report_exec:
+            if args.no_plots:
+                print("(Aviso) --report-exec solicitado sin gráficos; considere omitir --no-plots")
+            exec_path=os.path.join(args.out,'resumen_ejecutivo.md')
+            if write_output(cache,exec_path,report_hash(res_sorted,args.out,generate_executive_summary),lambda p: generate_executive_summary(res_sorted,args.out)):
+                written.append(exec_path); print("Resumen ejecutivo generado:",exec_path)
+    if cache is not None: cache.save()
+    st.count("archivos_reescritos",len(written))
+    if cache is not None and not written: print("\nResultados y reportes sin cambios: no se reescribio ningun archivo")
     print("\nArchivos generados:"); print(" -",out_raw); print(" -",out_fdr)
+    for out_group in out_groups: print(" -",out_group)
+    if out_rep: print(" -",out_rep)
+    if out_issues: print(" -",out_issues)
     if args.report_md: print(" - reporte_metricas.md")
     if args.report_formal: print(" - reporte_formal.md")
     if args.report_exec: print(" - resumen_ejecutivo.md")
     if not args.no_plots: print(" - fig_boxplots.png\n - fig_spaghetti_<metric>.png (varios)\n - fig_heatmap_correlaciones.png")
+    if args.metrics_json: print("Métricas de ejecución:",st.save(args.metrics_json))
     print("\n✔ Análisis completado.")
 if __name__=="__main__": main()
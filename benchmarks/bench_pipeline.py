@@ -0,0 +1,392 @@
+"""
+Benchmarks reproducibles del pipeline de extracción y análisis
+
+Mide, con datos sintéticos deterministas (semilla fija):
+
+- extraccion  extraer_issues_proyecto contra la API simulada (servidor_simulado)
+              con latencia y número de páginas configurables
+- agrupacion  procesar_y_agrupar_issues sobre 10k, 100k y 1M de issues
+- lectura     conteo filtrado sobre un CSV de issues (Latin-1, tabuladores):
+              pd.read_csv completo frente a lector_issues.contar_issues_por_lotes
+- analisis    run_analysis de 6_Analisis_Metricas_de_Calidad.py sobre cohortes
+              sintéticas (con y sin subgrupos por Semestre)
+- graficos    plot_all sobre una cohorte sintética, sin caché y con la caché de figuras
+
+Cada caso se ejecuta una vez de calentamiento y `--repeticiones` veces
+medidas. Los resultados (tiempos, mediana, métricas del caso y entorno:
+versiones, CPU, commit) se guardan en JSON para compararlos entre cambios:
+
+    python benchmarks/bench_pipeline.py --salida benchmarks/resultados/base.json
+    ... cambios ...
+    python benchmarks/bench_pipeline.py --comparar benchmarks/resultados/base.json
+
+Con `--comparar`, un caso cuya mediana empeora más de `--tolerancia`
+(20 % por defecto) se marca como regresión y el proceso termina con código 1.
+`--rapido` reduce los tamaños para una comprobación de pocos segundos.
+"""
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RAIZ, 'notebooks'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from servidor_simulado import SEVERIDADES, TIPOS, ServidorSimulado  # noqa: E402
+
+VERSION_RESULTADOS = 1
+DIRECTORIO_RESULTADOS = os.path.join(RAIZ, 'benchmarks', 'resultados')
+BENCHMARKS = ['extraccion', 'agrupacion', 'lectura', 'analisis', 'graficos']
+PAQUETES = ['numpy', 'pandas', 'scipy', 'statsmodels', 'matplotlib', 'seaborn', 'requests']
+
+
+def _silencioso():
+    # Los módulos del pipeline informan del progreso con print
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def cargar_modulo_analisis():
+    """6_Analisis_Metricas_de_Calidad.py como módulo (su nombre no es un identificador válido)"""
+    ruta = os.path.join(RAIZ, '6_Analisis_Metricas_de_Calidad.py')
+    spec = importlib.util.spec_from_file_location('analisis_metricas', ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = modulo  # dataclasses y pickle (jobs > 1) buscan el módulo por nombre
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+# ---------------------------------------------------------------------------
+# Datos sintéticos
+# ---------------------------------------------------------------------------
+
+def issues_sinteticos(n: int, semilla: int = 42) -> pd.DataFrame:
+    """n issues con el formato de issues_detallados_*.csv (distribuciones parecidas a las reales)"""
+    rng = np.random.default_rng(semilla)
+    n_proyectos = max(1, n // 500)
+    proyectos = np.array([f'org_estudiante{i:05d}_ap' for i in range(n_proyectos)], dtype=object)
+    reglas = np.array([f'csharpsquid:S{i}' for i in range(100, 400)], dtype=object)
+    # Pocas reglas concentran la mayoría de los issues (como en los datos reales)
+    pesos = 1.0 / np.arange(1, len(reglas) + 1)
+    proyecto = rng.integers(0, n_proyectos, n)
+    archivo = rng.integers(0, 40, n)
+    return pd.DataFrame({
+        'issue_key': [f'AX{i:09d}' for i in range(n)],
+        'message': np.array([f'Mensaje de la regla {i}' for i in range(300)], dtype=object)[rng.integers(0, 300, n)],
+        'severity': np.array(SEVERIDADES, dtype=object)[rng.choice(5, n, p=[.02, .08, .5, .3, .1])],
+        'type': np.array(TIPOS, dtype=object)[rng.choice(3, n, p=[.1, .05, .85])],
+        'rule': reglas[rng.choice(len(reglas), n, p=pesos / pesos.sum())],
+        'component': [f'{proyectos[p]}:src/Clase{a}.cs' for p, a in zip(proyecto, archivo)],
+        'line': rng.integers(1, 800, n),
+        'status': 'OPEN',
+    })
+
+
+def cohorte_sintetica(n: int, metricas: List[str], semilla: int = 42) -> pd.DataFrame:
+    """Dataset combinado sintético: n estudiantes con {metrica}_AP1/_AP2, Semestre y Sexo"""
+    rng = np.random.default_rng(semilla)
+    df = pd.DataFrame({
+        'Id': np.arange(n), 'Semestre': rng.choice(['2023-01', '2023-02', '2024-01', '2024-02'], n),
+        'Sexo': rng.choice(['M', 'F'], n),
+    })
+    for metrica in metricas:
+        if metrica.endswith('_rating'):
+            ap1 = rng.integers(1, 6, n).astype(float)
+            ap2 = np.clip(ap1 + rng.integers(-1, 2, n), 1, 5)
+        else:
+            ap1 = np.round(rng.lognormal(3, 1, n))
+            ap2 = np.round(ap1 * rng.lognormal(0.1, 0.3, n))
+        for sufijo, valores in (('AP1', ap1), ('AP2', ap2)):
+            valores = valores.copy()
+            valores[rng.random(n) < 0.1] = np.nan  # entregas sin métricas
+            df[f'{metrica}_{sufijo}'] = valores
+    return df
+
+
+# ---------------------------------------------------------------------------
+# Medición
+# ---------------------------------------------------------------------------
+
+def medir(benchmark: str, caso: str, funcion: Callable[[], Optional[Dict]], repeticiones: int,
+          parametros: Dict, memoria: bool = False, preparar: Optional[Callable[[], None]] = None) -> Dict:
+    """
+    Ejecuta `funcion` (una vez de calentamiento y `repeticiones` medidas)
+
+    `funcion` puede devolver un diccionario de métricas del caso (p. ej.
+    peticiones o issues procesados), que se añade al resultado junto con el
+    rendimiento por segundo de cada métrica a partir de la mediana.
+    `preparar` se ejecuta antes de cada llamada, fuera del tiempo medido.
+    """
+    def una_vez():
+        if preparar is not None:
+            preparar()
+        inicio = time.perf_counter()
+        with _silencioso():
+            metricas = funcion() or {}
+        return time.perf_counter() - inicio, metricas
+
+    una_vez()
+    tiempos, metricas = [], {}
+    for _ in range(repeticiones):
+        tiempo, metricas = una_vez()
+        tiempos.append(tiempo)
+
+    mediana = statistics.median(tiempos)
+    resultado = {
+        'benchmark': benchmark, 'caso': caso, 'parametros': parametros, 'repeticiones': repeticiones,
+        'tiempos_s': [round(t, 6) for t in tiempos], 'min_s': round(min(tiempos), 6),
+        'mediana_s': round(mediana, 6), 'media_s': round(statistics.fmean(tiempos), 6),
+        'desviacion_s': round(statistics.stdev(tiempos), 6) if len(tiempos) > 1 else 0.0,
+        'metricas': {**metricas, **{f'{k}_por_s': round(v / mediana, 2) for k, v in metricas.items()
+                                    if isinstance(v, (int, float)) and mediana > 0}},
+    }
+    if memoria:
+        if preparar is not None:
+            preparar()
+        tracemalloc.start()
+        with _silencioso():
+            funcion()
+        resultado['memoria_pico_mb'] = round(tracemalloc.get_traced_memory()[1] / 1024 ** 2, 2)
+        tracemalloc.stop()
+    print(f"  {benchmark:<11} {caso:<42} mediana {mediana:9.4f}s  (min {min(tiempos):.4f}s)")
+    return resultado
+
+
+# ---------------------------------------------------------------------------
+# Benchmarks
+# ---------------------------------------------------------------------------
+
+def bench_extraccion(args) -> List[Dict]:
+    with _silencioso():
+        from extrae_issues import extraer_issues_proyecto
+    from sonarcloud_cliente import ClienteSonarCloud
+
+    resultados = []
+    for paginas in args.paginas:
+        servidor = ServidorSimulado(latencia=args.latencia, issues_por_proyecto=paginas * 500)
+        with servidor:
+            cliente = ClienteSonarCloud(servidor.url, max_reintentos=0)
+
+            def extraer():
+                antes = servidor.peticiones
+                issues = extraer_issues_proyecto('org_benchmark', cliente=cliente, verbose=False)
+                return {'issues': len(issues), 'peticiones': servidor.peticiones - antes}
+
+            resultados.append(medir('extraccion', f'paginas={paginas},latencia={args.latencia}', extraer,
+                                    args.repeticiones, {'paginas': paginas, 'latencia_s': args.latencia},
+                                    args.memoria))
+            cliente.cerrar()
+    return resultados
+
+
+def bench_agrupacion(args) -> List[Dict]:
+    with _silencioso():
+        from extrae_issues import procesar_y_agrupar_issues
+
+    resultados = []
+    for n in args.issues:
+        df = issues_sinteticos(n, args.semilla)
+
+        def agrupar():
+            agrupaciones = procesar_y_agrupar_issues(df)
+            for nombre in agrupaciones:
+                conteos = agrupaciones.conteos(nombre)
+                agrupaciones[nombre][conteos.index[0]][:10]
+            return {'issues': n}
+
+        resultados.append(medir('agrupacion', f'issues={n}', agrupar, args.repeticiones, {'issues': n},
+                                args.memoria))
+    return resultados
+
+
+def bench_lectura(args) -> List[Dict]:
+    from lector_issues import contar_issues_por_lotes
+
+    resultados = []
+    with tempfile.TemporaryDirectory() as directorio:
+        for n in args.issues:
+            # Mismo formato que issues_detallados_latest.csv
+            ruta = os.path.join(directorio, f'issues_{n}.csv')
+            df = issues_sinteticos(n, args.semilla)
+            df.insert(0, 'assignment', np.where(np.arange(n) % 2, 'AP2', 'AP1'))
+            df.insert(1, 'project_key', df['component'].str.partition(':')[0])
+            df.to_csv(ruta, sep='\t', encoding='latin-1', index=False)
+            filtro = [('type', '==', 'CODE_SMELL')]
+
+            def completo():
+                tabla = pd.read_csv(ruta, sep='\t', encoding='latin-1')
+                tabla[tabla['type'] == 'CODE_SMELL'].groupby(['assignment', 'severity']).size()
+                return {'issues': n}
+
+            def por_lotes():
+                contar_issues_por_lotes(ruta, ['assignment', 'severity'], filtro)
+                return {'issues': n}
+
+            for caso, funcion in (('completo', completo), ('lotes', por_lotes)):
+                resultados.append(medir('lectura', f'issues={n},{caso}', funcion, args.repeticiones,
+                                        {'issues': n, 'lector': caso}, args.memoria))
+    return resultados
+
+
+def bench_analisis(args, analisis) -> List[Dict]:
+    resultados = []
+    for n in args.estudiantes:
+        df = cohorte_sintetica(n, analisis.METRICS_BASE, args.semilla)
+        for group_by in (None, 'Semestre'):
+            def analizar():
+                res = analisis.run_analysis(df, jobs=args.jobs, group_by=group_by,
+                                            n_resamples=args.n_resamples, seed=args.semilla)
+                return {'pruebas': len(res)}
+
+            caso = f'estudiantes={n},resamples={args.n_resamples}' + (f',por={group_by}' if group_by else '')
+            resultados.append(medir('analisis', caso, analizar, args.repeticiones,
+                                    {'estudiantes': n, 'n_resamples': args.n_resamples, 'group_by': group_by,
+                                     'jobs': args.jobs}, args.memoria))
+    return resultados
+
+
+def bench_graficos(args, analisis) -> List[Dict]:
+    df = cohorte_sintetica(args.estudiantes_graficos, analisis.METRICS_BASE, args.semilla)
+    resultados = []
+    with tempfile.TemporaryDirectory() as directorio:
+        def sin_cache():
+            return {'figuras': len(analisis.plot_all(df, directorio, analisis.METRICS_BASE, jobs=args.jobs,
+                                                     use_cache=False))}
+
+        def con_cache():
+            analisis.plot_all(df, directorio, analisis.METRICS_BASE, jobs=args.jobs, use_cache=True)
+
+        parametros = {'estudiantes': args.estudiantes_graficos, 'jobs': args.jobs}
+        resultados.append(medir('graficos', f'estudiantes={args.estudiantes_graficos},sin_cache', sin_cache,
+                                args.repeticiones, parametros))
+        resultados.append(medir('graficos', f'estudiantes={args.estudiantes_graficos},con_cache', con_cache,
+                                args.repeticiones, parametros))
+    return resultados
+
+
+# ---------------------------------------------------------------------------
+# Entorno, resultados y comparación
+# ---------------------------------------------------------------------------
+
+def entorno() -> Dict:
+    """Versiones, hardware y commit con los que se midió"""
+    versiones = {}
+    for paquete in PAQUETES:
+        try:
+            versiones[paquete] = __import__(paquete).__version__
+        except ImportError:
+            versiones[paquete] = None
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=RAIZ, capture_output=True, text=True,
+                                timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {'python': platform.python_version(), 'plataforma': platform.platform(),
+            'procesador': platform.processor() or platform.machine(), 'cpus': os.cpu_count(),
+            'paquetes': versiones, 'commit': commit}
+
+
+def comparar(actual: List[Dict], base: List[Dict], tolerancia: float) -> List[Dict]:
+    """Casos comunes con su variación de mediana; `regresion` si empeora más de `tolerancia`"""
+    previos = {(r['benchmark'], r['caso']): r for r in base}
+    comparacion = []
+    for r in actual:
+        previo = previos.get((r['benchmark'], r['caso']))
+        if previo is None or not previo['mediana_s']:
+            continue
+        cambio = r['mediana_s'] / previo['mediana_s'] - 1
+        comparacion.append({'benchmark': r['benchmark'], 'caso': r['caso'], 'base_s': previo['mediana_s'],
+                            'actual_s': r['mediana_s'], 'cambio': round(cambio, 4),
+                            'regresion': cambio > tolerancia})
+    return comparacion
+
+
+def parsear_argumentos(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks del pipeline de extracción y análisis")
+    parser.add_argument("--solo", nargs="+", choices=BENCHMARKS, default=BENCHMARKS, help="Benchmarks a ejecutar")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Ejecuciones medidas por caso (más una de calentamiento)")
+    parser.add_argument("--semilla", type=int, default=42, help="Semilla de los datos sintéticos")
+    parser.add_argument("--latencia", type=float, default=0.02, help="Latencia por petición de la API simulada (s)")
+    parser.add_argument("--paginas", type=int, nargs="+", default=[1, 5, 20, 30],
+                        help="Páginas de 500 issues por proyecto (más de 20 obliga a particionar)")
+    parser.add_argument("--issues", type=int, nargs="+", default=[10_000, 100_000, 1_000_000],
+                        help="Tamaños de los conjuntos de issues para la agrupación y la lectura")
+    parser.add_argument("--estudiantes", type=int, nargs="+", default=[200, 2000, 20000],
+                        help="Tamaños de las cohortes sintéticas para run_analysis")
+    parser.add_argument("--n-resamples", type=int, default=1000, help="Remuestras bootstrap/permutación en run_analysis")
+    parser.add_argument("--estudiantes-graficos", type=int, default=500, help="Tamaño de la cohorte para los gráficos")
+    parser.add_argument("--jobs", type=int, default=1, help="Procesos para run_analysis y plot_all")
+    parser.add_argument("--memoria", action="store_true", help="Medir también el pico de memoria (una ejecución extra con tracemalloc)")
+    parser.add_argument("--rapido", action="store_true", help="Tamaños reducidos (comprobación en pocos segundos)")
+    parser.add_argument("--salida", help="Archivo JSON de resultados (por defecto benchmarks/resultados/bench_<fecha>.json)")
+    parser.add_argument("--comparar", help="JSON de una ejecución anterior con el que comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.2, help="Empeoramiento relativo de la mediana que cuenta como regresión")
+    args = parser.parse_args(argv)
+    if args.rapido:
+        args.repeticiones = min(args.repeticiones, 2)
+        args.paginas, args.issues, args.estudiantes = [1, 5], [10_000], [200]
+        args.n_resamples, args.estudiantes_graficos = min(args.n_resamples, 200), 100
+    return args
+
+
+def main(argv=None) -> int:
+    args = parsear_argumentos(argv)
+    fecha = datetime.now()
+    print(f"⏱️  Benchmarks: {', '.join(args.solo)} ({args.repeticiones} repeticiones por caso)")
+
+    resultados = []
+    if 'extraccion' in args.solo:
+        resultados += bench_extraccion(args)
+    if 'agrupacion' in args.solo:
+        resultados += bench_agrupacion(args)
+    if 'lectura' in args.solo:
+        resultados += bench_lectura(args)
+    if 'analisis' in args.solo or 'graficos' in args.solo:
+        analisis = cargar_modulo_analisis()
+        if 'analisis' in args.solo:
+            resultados += bench_analisis(args, analisis)
+        if 'graficos' in args.solo:
+            resultados += bench_graficos(args, analisis)
+
+    salida = args.salida or os.path.join(DIRECTORIO_RESULTADOS, f"bench_{fecha.strftime('%Y%m%d_%H%M%S')}.json")
+    documento = {'version': VERSION_RESULTADOS, 'fecha': fecha.isoformat(timespec='seconds'),
+                 'entorno': entorno(), 'parametros': {k: v for k, v in vars(args).items()
+                                                      if k not in ('salida', 'comparar')},
+                 'resultados': resultados}
+
+    codigo = 0
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            base = json.load(f)
+        documento['comparacion'] = {'base': args.comparar, 'tolerancia': args.tolerancia,
+                                    'casos': comparar(resultados, base['resultados'], args.tolerancia)}
+        print(f"\n📊 Comparación con {args.comparar} (tolerancia {args.tolerancia:.0%}):")
+        for c in documento['comparacion']['casos']:
+            marca = "❌ REGRESIÓN" if c['regresion'] else "✅"
+            print(f"  {marca} {c['benchmark']} {c['caso']}: {c['base_s']:.4f}s -> {c['actual_s']:.4f}s ({c['cambio']:+.1%})")
+        if any(c['regresion'] for c in documento['comparacion']['casos']):
+            codigo = 1
+
+    os.makedirs(os.path.dirname(os.path.abspath(salida)), exist_ok=True)
+    with open(salida, 'w', encoding='utf-8') as f:
+        json.dump(documento, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Resultados guardados en: {salida}")
+    return codigo
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+"""
+Servidor local que simula la API de SonarCloud para los benchmarks
+
+Responde a /api/issues/search (paginación, facetas, filtros por tipo,
+severidad y fecha de creación, orden `s=UPDATE_DATE`/`asc` y el límite de
+10.000 resultados por consulta)
+y a /api/measures/component y /api/measures/search, con una latencia
+configurable por petición. Los issues de cada proyecto se generan de forma
+determinista a partir de su clave, de modo que dos ejecuciones reciben
+exactamente los mismos datos.
+
+Uso:
+    servidor = ServidorSimulado(latencia=0.05, issues_por_proyecto=2000)
+    with servidor:
+        cliente = ClienteSonarCloud(servidor.url)
+        ...
+    servidor.peticiones  # número de peticiones atendidas
+    servidor.consultas_proyecto['clave']  # peticiones a /issues/search de un proyecto
+
+`errores={'clave': 403}` hace que las consultas de issues de ese proyecto
+respondan con ese código (p. ej. para probar que un proyecto fallido no
+detiene al resto de la cohorte).
+
+`servidor.modificar_issues('clave', ['clave-0000003'], status='CLOSED',
+updateDate='2025-06-01T00:00:00+0000')` cambia campos de issues concretos en
+las respuestas siguientes (p. ej. para probar la sincronización incremental).
+"""
+import json
+import random
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+SEVERIDADES = ['BLOCKER', 'CRITICAL', 'MAJOR', 'MINOR', 'INFO']
+TIPOS = ['BUG', 'VULNERABILITY', 'CODE_SMELL']
+LIMITE_RESULTADOS = 10000
+
+
+@lru_cache(maxsize=64)
+def issues_proyecto(project_key: str, n: int) -> List[Dict]:
+    """Issues sintéticos (deterministas) de un proyecto, ordenados por fecha de creación"""
+    rng = random.Random(project_key)
+    issues = []
+    for i in range(n):
+        dia = 1 + (i * 365) // max(n, 1)
+        fecha = time.strftime('%Y-%m-%dT%H:%M:%S+0000', time.gmtime(1704067200 + dia * 86400 + i))
+        issues.append({
+            'key': f'{project_key}-{i:07d}', 'rule': f'csharpsquid:S{rng.randint(100, 400)}',
+            'severity': SEVERIDADES[rng.randrange(5)], 'type': TIPOS[rng.randrange(3)],
+            'component': f'{project_key}:src/Modulo{rng.randrange(40)}/Clase{rng.randrange(25)}.cs',
+            'project': project_key, 'line': rng.randint(1, 800), 'status': 'OPEN',
+            'message': f'Mensaje de la regla {rng.randrange(200)}', 'effort': '5min', 'debt': '5min',
+            'creationDate': fecha, 'updateDate': fecha, 'tags': ['convention'] if i % 3 else [],
+            'textRange': {'startLine': 1, 'endLine': 1, 'startOffset': 0, 'endOffset': 10}, 'flows': [],
+        })
+    return issues
+
+
+class _Manejador(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    servidor: 'ServidorSimulado'
+
+    def log_message(self, *args):
+        pass
+
+    def _responder(self, codigo: int, cuerpo: Dict):
+        datos = json.dumps(cuerpo).encode('utf-8')
+        self.send_response(codigo)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        q = {k: v[0] for k, v in parse_qs(url.query).items()}
+        self.servidor.registrar()
+        if self.servidor.latencia:
+            time.sleep(self.servidor.latencia)
+        if url.path.endswith('/issues/search'):
+            return self._issues(q)
+        if url.path.endswith('/measures/component'):
+            return self._responder(200, {'component': {'key': q['component'], 'measures': self._medidas(q)}})
+        if url.path.endswith('/measures/search'):
+            medidas = [{**m, 'component': k} for k in q['projectKeys'].split(',') for m in self._medidas(q)]
+            return self._responder(200, {'measures': medidas})
+        self._responder(404, {'errors': [{'msg': 'Unknown url'}]})
+
+    @staticmethod
+    def _medidas(q: Dict) -> List[Dict]:
+        return [{'metric': m, 'value': str(10 + i)} for i, m in enumerate(q['metricKeys'].split(','))]
+
+    def _issues(self, q: Dict):
+        proyecto = q.get('componentKeys') or q.get('projects', '')
+        self.servidor.registrar_consulta(proyecto)
+        if proyecto in self.servidor.errores:
+            codigo = self.servidor.errores[proyecto]
+            return self._responder(codigo, {'errors': [{'msg': f'Error simulado {codigo} para {proyecto}'}]})
+        issues = issues_proyecto(proyecto, self.servidor.issues_por_proyecto)
+        cambios = self.servidor.cambios.get(proyecto)
+        if cambios:
+            issues = [{**i, **cambios[i['key']]} if i['key'] in cambios else i for i in issues]
+        for filtro, campo in (('types', 'type'), ('severities', 'severity')):
+            if filtro in q:
+                valores = set(q[filtro].split(','))
+                issues = [i for i in issues if i[campo] in valores]
+        if 'createdAfter' in q:
+            issues = [i for i in issues if i['creationDate'] >= q['createdAfter']]
+        if 'createdBefore' in q:
+            issues = [i for i in issues if i['creationDate'] < q['createdBefore']]
+        if q.get('s') == 'UPDATE_DATE':
+            issues = sorted(issues, key=lambda i: i['updateDate'], reverse=q.get('asc', 'true') == 'false')
+
+        pagina, tamano = int(q.get('p', 1)), int(q.get('ps', 100))
+        if (pagina - 1) * tamano >= LIMITE_RESULTADOS:
+            return self._responder(400, {'errors': [{'msg': f'Can return only the first {LIMITE_RESULTADOS} results'}]})
+        facetas = []
+        for faceta in filter(None, q.get('facets', '').split(',')):
+            campo = {'types': 'type', 'severities': 'severity'}.get(faceta)
+            if campo:
+                conteos = {}
+                for issue in issues:
+                    conteos[issue[campo]] = conteos.get(issue[campo], 0) + 1
+                facetas.append({'property': faceta, 'values': [{'val': v, 'count': c} for v, c in conteos.items()]})
+        self._responder(200, {
+            'total': len(issues), 'p': pagina, 'ps': tamano,
+            'paging': {'pageIndex': pagina, 'pageSize': tamano, 'total': len(issues)},
+            'issues': issues[(pagina - 1) * tamano:pagina * tamano], 'facets': facetas,
+        })
+
+
+class ServidorSimulado:
+    """
+    API simulada de SonarCloud en un hilo, en 127.0.0.1 y un puerto libre
+
+    Args:
+        latencia (float): Segundos de espera antes de cada respuesta
+        issues_por_proyecto (int): Issues que devuelve cada proyecto
+        puerto (int): Puerto (0 = uno libre)
+        errores (dict): project_key -> código HTTP con el que responden sus consultas de issues
+    """
+
+    def __init__(self, latencia: float = 0.0, issues_por_proyecto: int = 1000, puerto: int = 0,
+                 errores: Optional[Dict[str, int]] = None):
+        self.latencia = latencia
+        self.issues_por_proyecto = issues_por_proyecto
+        self.errores = dict(errores or {})
+        self.cambios: Dict[str, Dict[str, Dict]] = {}
+        self.peticiones = 0
+        self.consultas_proyecto: Counter = Counter()
+        self._lock = threading.Lock()
+        manejador = type('Manejador', (_Manejador,), {'servidor': self})
+        self._http = ThreadingHTTPServer(('127.0.0.1', puerto), manejador)
+        self._http.daemon_threads = True
+        self._hilo: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._http.server_address[1]}/api"
+
+    def registrar(self):
+        with self._lock:
+            self.peticiones += 1
+
+    def registrar_consulta(self, proyecto: str):
+        with self._lock:
+            self.consultas_proyecto[proyecto] += 1
+
+    def modificar_issues(self, proyecto: str, claves: List[str], **campos):
+        """Sobrescribe campos (status, updateDate...) de esos issues en las respuestas siguientes"""
+        with self._lock:
+            cambios = self.cambios.setdefault(proyecto, {})
+            for clave in claves:
+                cambios[clave] = {**cambios.get(clave, {}), **campos}
+
+    def iniciar(self) -> 'ServidorSimulado':
+        self._hilo = threading.Thread(target=self._http.serve_forever, daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self._http.shutdown()
+        self._http.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.detener()
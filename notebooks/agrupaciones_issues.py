@@ -0,0 +1,153 @@
+"""
+Agrupación de issues sobre una única tabla columnar
+
+Sustituye a los cuatro `defaultdict(list)` que copiaban cada issue una vez
+por agrupación. Los issues se guardan una sola vez en un DataFrame; para cada
+agrupación (severidad, tipo, regla y archivo) se calcula un código por fila
+(`pd.factorize`) y, solo cuando se pide el detalle de un grupo, un índice
+ordenado que permite obtener sus filas sin recorrer la tabla.
+
+La interfaz se mantiene compatible con la anterior:
+`agrupaciones['por_regla'][regla]` admite len(), índices y slices, y los
+elementos son diccionarios con key, message, severity, type, rule,
+component, line y status.
+"""
+from collections.abc import Mapping, Sequence
+from typing import Dict, Iterable, Union
+
+import numpy as np
+import pandas as pd
+
+CAMPOS_DETALLE = ['key', 'message', 'severity', 'type', 'rule', 'component', 'line', 'status']
+
+# Valores por defecto de los campos ausentes (mismos que la versión con diccionarios)
+VALORES_POR_DEFECTO = {
+    'key': '', 'message': '', 'severity': 'UNKNOWN', 'type': 'UNKNOWN',
+    'rule': 'UNKNOWN', 'component': '', 'line': 'N/A', 'status': 'UNKNOWN'
+}
+
+# Nombre de la agrupación -> columna de la tabla
+DIMENSIONES = {
+    'por_severidad': 'severity',
+    'por_tipo': 'type',
+    'por_regla': 'rule',
+    'por_archivo': 'archivo',
+}
+
+
+def tabla_issues(issues: Union[Iterable[Dict], pd.DataFrame]) -> pd.DataFrame:
+    """
+    Construye la tabla de detalle a partir de issues de la API o de un DataFrame
+
+    Args:
+        issues: Lista de issues tal como los devuelve /api/issues/search, un
+            DataFrame con el formato de issues_detallados_*.csv (issue_key, ...) o
+            una ColeccionIssues / VistaIssues (ver modelo_issues)
+
+    Returns:
+        DataFrame: Columnas CAMPOS_DETALLE más `archivo` (ruta sin el proyecto)
+    """
+    if hasattr(issues, 'a_dataframe'):
+        issues = issues.a_dataframe()
+    if isinstance(issues, pd.DataFrame):
+        df = issues.rename(columns={'issue_key': 'key'}).reindex(columns=CAMPOS_DETALLE)
+    else:
+        df = pd.DataFrame.from_records(list(issues), columns=CAMPOS_DETALLE)
+    if pd.api.types.is_float_dtype(df['line']):
+        # Los huecos convierten la línea a float; se recuperan los enteros
+        df['line'] = df['line'].astype('Int64')
+    for campo, defecto in VALORES_POR_DEFECTO.items():
+        if df[campo].isna().any():
+            df[campo] = df[campo].astype(object).where(df[campo].notna(), defecto)
+    # rsplit y no rpartition: con pandas 3, rpartition de una serie vacía no devuelve columnas
+    df['archivo'] = df['component'].astype(str).str.rsplit(':', n=1).str[-1]
+    return df
+
+
+class GrupoIssues(Sequence):
+    """Vista de solo lectura sobre las filas de un grupo (sin copiar la tabla)"""
+
+    def __init__(self, tabla: pd.DataFrame, posiciones: np.ndarray):
+        self._tabla = tabla
+        self._posiciones = posiciones
+
+    def __len__(self):
+        return len(self._posiciones)
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            filas = self._tabla.iloc[self._posiciones[indice]]
+            return filas[CAMPOS_DETALLE].to_dict('records')
+        return self._tabla.iloc[self._posiciones[indice]][CAMPOS_DETALLE].to_dict()
+
+    def a_dataframe(self) -> pd.DataFrame:
+        """Filas del grupo como DataFrame"""
+        return self._tabla.iloc[self._posiciones]
+
+
+class AgrupacionIssues(Mapping):
+    """
+    Una agrupación (p. ej. por regla): grupo -> GrupoIssues
+
+    Los grupos se recorren en orden de primera aparición, como en la versión anterior.
+    """
+
+    def __init__(self, tabla: pd.DataFrame, columna: str):
+        self._tabla = tabla
+        self._codigos, self._grupos = pd.factorize(tabla[columna], sort=False)
+        self._conteos = np.bincount(self._codigos, minlength=len(self._grupos))
+        self._posicion_grupo = {grupo: i for i, grupo in enumerate(self._grupos)}
+        self._orden = None
+        self._inicios = None
+
+    def _indexar(self):
+        # Índice ordenado por grupo (estable: conserva el orden original dentro de cada grupo)
+        if self._orden is None:
+            self._orden = np.argsort(self._codigos, kind='stable')
+            self._inicios = np.concatenate(([0], np.cumsum(self._conteos)))
+
+    def __getitem__(self, grupo) -> GrupoIssues:
+        i = self._posicion_grupo[grupo]
+        self._indexar()
+        return GrupoIssues(self._tabla, self._orden[self._inicios[i]:self._inicios[i + 1]])
+
+    def __iter__(self):
+        return iter(self._grupos)
+
+    def __len__(self):
+        return len(self._grupos)
+
+    def conteos(self) -> pd.Series:
+        """Número de issues por grupo, de mayor a menor (empates en orden de aparición)"""
+        return pd.Series(self._conteos, index=self._grupos).sort_values(ascending=False, kind='stable')
+
+
+class AgrupacionesIssues(Mapping):
+    """
+    Agrupaciones de issues por severidad, tipo, regla y archivo
+
+    Args:
+        issues: Lista de issues de la API o DataFrame con formato issues_detallados
+    """
+
+    def __init__(self, issues: Union[Iterable[Dict], pd.DataFrame]):
+        self.tabla = tabla_issues(issues)
+        self._agrupaciones = {}
+
+    def __getitem__(self, nombre: str) -> AgrupacionIssues:
+        if nombre not in DIMENSIONES:
+            raise KeyError(nombre)
+        if nombre not in self._agrupaciones:
+            self._agrupaciones[nombre] = AgrupacionIssues(self.tabla, DIMENSIONES[nombre])
+        return self._agrupaciones[nombre]
+
+    def __iter__(self):
+        return iter(DIMENSIONES)
+
+    def __len__(self):
+        return len(DIMENSIONES)
+
+    def conteos(self, nombre: str) -> pd.Series:
+        """Número de issues por grupo de una agrupación, de mayor a menor"""
+        return self[nombre].conteos()
+
@@ -0,0 +1,356 @@
+"""
+Almacén analítico local (SQLite) de estudiantes, proyectos, métricas e issues
+
+Hasta ahora el análisis unía CSV por posición y por sufijo de columna
+(`{metrica}_AP1` / `{metrica}_AP2`) y los resúmenes por estudiante
+(`issues_por_tipo_*`, `issues_por_severidad_*`, `issues_resumen_proyecto_*`)
+se recalculaban y se escribían como CSV en cada ejecución. Aquí todo vive en
+un único esquema normalizado e indexado:
+
+    estudiantes (row_index, id, semestre, estudiante, sexo, email)
+    proyectos   (row_index, assignment, project_key, repo_original, repo_sonar)
+    medidas     (project_key, metric, value)
+    medidas_archivo (component, metric, project_key, path, value)
+    issues      (issue_key, project_key, rule, severity, type, message, ...)
+
+y los resúmenes son vistas que se calculan al consultarlas:
+
+    v_issues                  Issues con los datos del estudiante y la entrega
+    issues_por_tipo           Issues por estudiante, entrega y tipo
+    issues_por_severidad      Issues por estudiante, entrega y severidad
+    issues_resumen_proyecto   Total y distribuciones (JSON) por proyecto
+    issues_por_regla          Issues por semestre, entrega y regla
+    metricas_largo            Una fila por estudiante, entrega y métrica
+    metricas_por_estudiante   Formato ancho del dataset combinado ({metrica}_AP1/_AP2)
+
+Ejemplo: reglas más frecuentes en AP2 de los estudiantes de 2024-01
+
+    almacen.consultar("SELECT rule, SUM(issues) AS n FROM issues_por_regla "
+                      "WHERE assignment = 'AP2' AND semestre = '2024-01' "
+                      "GROUP BY rule ORDER BY n DESC LIMIT 10")
+
+Las medidas por archivo (medidas_lote.medidas_archivos) se unen con los
+issues por la columna `component`:
+
+    almacen.consultar("SELECT i.component, COUNT(*) AS issues, m.value AS ncloc FROM issues i "
+                      "JOIN medidas_archivo m ON m.component = i.component AND m.metric = 'ncloc' "
+                      "GROUP BY i.component ORDER BY issues DESC")
+
+Uso por línea de comandos:
+    python almacen_analitico.py --dataset ../data/Estudiantes_2023-2024_con_metricas_sonarcloud.csv \\
+        --issues ../data/issues_detallados_latest.csv --sql "SELECT * FROM issues_por_tipo LIMIT 5"
+"""
+import argparse
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Union
+
+import pandas as pd
+
+from almacen_issues import COLUMNAS_ISSUES
+
+RUTA_ALMACEN = '../data/calidad.sqlite'
+
+ASIGNACIONES = ('AP1', 'AP2')
+
+# Columnas del CSV de estudiantes -> columnas de la tabla estudiantes
+COLUMNAS_ESTUDIANTE = {'Id': 'id', 'Semestre': 'semestre', 'Estudiante': 'estudiante',
+                       'Sexo': 'sexo', 'Email': 'email'}
+
+# Columnas de issues_detallados_*.csv que se guardan en la tabla issues
+COLUMNAS_ISSUE = [c for c in COLUMNAS_ISSUES if c not in ('student_id', 'nombre', 'assignment', 'row_index')]
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS estudiantes (
+    row_index INTEGER PRIMARY KEY, id, semestre TEXT, estudiante TEXT, sexo, email TEXT
+);
+CREATE TABLE IF NOT EXISTS proyectos (
+    row_index INTEGER NOT NULL, assignment TEXT NOT NULL, project_key TEXT NOT NULL,
+    repo_original TEXT, repo_sonar TEXT,
+    PRIMARY KEY (row_index, assignment)
+);
+CREATE TABLE IF NOT EXISTS medidas (
+    project_key TEXT NOT NULL, metric TEXT NOT NULL, value REAL,
+    PRIMARY KEY (project_key, metric)
+);
+CREATE TABLE IF NOT EXISTS medidas_archivo (
+    component TEXT NOT NULL, metric TEXT NOT NULL, project_key TEXT NOT NULL, path TEXT, value REAL,
+    PRIMARY KEY (component, metric)
+);
+CREATE TABLE IF NOT EXISTS issues (
+    issue_key TEXT PRIMARY KEY, project_key TEXT NOT NULL, rule TEXT, severity TEXT, type TEXT,
+    message TEXT, component TEXT, line INTEGER, status TEXT, creation_date TEXT, update_date TEXT,
+    effort TEXT, debt TEXT, tags TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_estudiantes_semestre ON estudiantes (semestre);
+CREATE INDEX IF NOT EXISTS idx_proyectos_project_key ON proyectos (project_key);
+CREATE INDEX IF NOT EXISTS idx_proyectos_assignment ON proyectos (assignment);
+CREATE INDEX IF NOT EXISTS idx_medidas_metric ON medidas (metric);
+CREATE INDEX IF NOT EXISTS idx_medidas_archivo_project_key ON medidas_archivo (project_key);
+CREATE INDEX IF NOT EXISTS idx_issues_project_key ON issues (project_key);
+CREATE INDEX IF NOT EXISTS idx_issues_rule ON issues (rule);
+CREATE INDEX IF NOT EXISTS idx_issues_severity ON issues (severity);
+CREATE INDEX IF NOT EXISTS idx_issues_type ON issues (type);
+CREATE INDEX IF NOT EXISTS idx_issues_component ON issues (component);
+
+CREATE VIEW IF NOT EXISTS v_issues AS
+SELECT e.id AS student_id, e.estudiante AS nombre, p.assignment, p.row_index, e.semestre, i.*
+FROM issues i
+JOIN proyectos p ON p.project_key = i.project_key
+LEFT JOIN estudiantes e ON e.row_index = p.row_index;
+
+CREATE VIEW IF NOT EXISTS issues_por_tipo AS
+SELECT student_id, nombre, assignment, type, COUNT(*) AS count
+FROM v_issues GROUP BY row_index, assignment, type;
+
+CREATE VIEW IF NOT EXISTS issues_por_severidad AS
+SELECT student_id, nombre, assignment, severity, COUNT(*) AS count
+FROM v_issues GROUP BY row_index, assignment, severity;
+
+CREATE VIEW IF NOT EXISTS issues_por_regla AS
+SELECT semestre, assignment, rule, COUNT(*) AS issues, COUNT(DISTINCT row_index) AS estudiantes
+FROM v_issues GROUP BY semestre, assignment, rule;
+
+CREATE VIEW IF NOT EXISTS issues_resumen_proyecto AS
+WITH por_tipo AS (
+    SELECT row_index, assignment, type, COUNT(*) AS n FROM v_issues GROUP BY row_index, assignment, type
+), por_severidad AS (
+    SELECT row_index, assignment, severity, COUNT(*) AS n FROM v_issues GROUP BY row_index, assignment, severity
+)
+SELECT e.id AS student_id, e.estudiante AS nombre, p.project_key, p.assignment,
+       (SELECT SUM(n) FROM por_tipo t WHERE t.row_index = p.row_index AND t.assignment = p.assignment) AS total_issues,
+       (SELECT json_group_object(type, n) FROM por_tipo t
+         WHERE t.row_index = p.row_index AND t.assignment = p.assignment) AS types_distribution,
+       (SELECT json_group_object(severity, n) FROM por_severidad s
+         WHERE s.row_index = p.row_index AND s.assignment = p.assignment) AS severity_distribution
+FROM proyectos p
+LEFT JOIN estudiantes e ON e.row_index = p.row_index
+WHERE EXISTS (SELECT 1 FROM issues i WHERE i.project_key = p.project_key);
+
+CREATE VIEW IF NOT EXISTS metricas_largo AS
+SELECT p.row_index, e.semestre, p.assignment, p.project_key, m.metric, m.value
+FROM proyectos p
+JOIN medidas m ON m.project_key = p.project_key
+LEFT JOIN estudiantes e ON e.row_index = p.row_index;
+"""
+
+
+def _valores(df: pd.DataFrame, columnas: List[str]) -> List[tuple]:
+    # NaN/NA -> None y escalares de numpy -> tipos de Python para sqlite3
+    df = df[columnas].astype(object).where(df[columnas].notna(), None)
+    return [tuple(v.item() if hasattr(v, 'item') else v for v in fila) for fila in df.itertuples(index=False)]
+
+
+class AlmacenAnalitico:
+    """
+    Base SQLite con el esquema analítico de estudiantes, proyectos, medidas e issues
+
+    Args:
+        ruta (str): Archivo de la base de datos (se crea si no existe; ':memory:' para pruebas)
+    """
+
+    def __init__(self, ruta: str = RUTA_ALMACEN):
+        self.ruta = ruta
+        self.conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self.conexion:
+            self.conexion.executescript(ESQUEMA)
+
+    def cargar_estudiantes(self, df_estudiantes: pd.DataFrame) -> int:
+        """
+        Upsert de estudiantes y de sus proyectos (columnas Sonar_Ap1 / Sonar_Ap2)
+
+        El índice del DataFrame es el row_index, como en el resto de los notebooks.
+
+        Returns:
+            int: Número de estudiantes cargados
+        """
+        df = df_estudiantes.reindex(columns=list(COLUMNAS_ESTUDIANTE)).rename(columns=COLUMNAS_ESTUDIANTE)
+        df.insert(0, 'row_index', df_estudiantes.index)
+        filas_proyectos = []
+        for asignacion in ASIGNACIONES:
+            sufijo = asignacion.capitalize()
+            claves = df_estudiantes.get(f'Sonar_{sufijo}')
+            if claves is None:
+                continue
+            claves = claves.astype(object).where(claves.notna(), None)
+            for row_index, clave in claves.items():
+                if clave is not None and str(clave).strip():
+                    filas_proyectos.append((
+                        int(row_index), asignacion, str(clave).strip(),
+                        df_estudiantes.at[row_index, f'Original_Repo_{sufijo}'] if f'Original_Repo_{sufijo}' in df_estudiantes else None,
+                        df_estudiantes.at[row_index, f'Sonar_Repo_{sufijo}'] if f'Sonar_Repo_{sufijo}' in df_estudiantes else None,
+                    ))
+        filas_proyectos = [tuple(None if pd.isna(v) else v for v in fila) for fila in filas_proyectos]
+
+        with self._lock, self.conexion:
+            self.conexion.executemany(
+                'INSERT OR REPLACE INTO estudiantes (row_index, id, semestre, estudiante, sexo, email) '
+                'VALUES (?, ?, ?, ?, ?, ?)', _valores(df, list(df.columns)))
+            self.conexion.executemany(
+                'INSERT OR REPLACE INTO proyectos (row_index, assignment, project_key, repo_original, repo_sonar) '
+                'VALUES (?, ?, ?, ?, ?)', filas_proyectos)
+        return len(df)
+
+    def cargar_medidas(self, df_metricas: pd.DataFrame, metricas: Optional[List[str]] = None) -> int:
+        """
+        Upsert de medidas a partir de las métricas extraídas (una fila por proyecto)
+
+        Args:
+            df_metricas (DataFrame): Con `project_key` y una columna por métrica
+                (p. ej. metricas_sonarcloud_raw.csv)
+            metricas (list): Métricas a cargar (por defecto las columnas numéricas)
+
+        Returns:
+            int: Número de medidas cargadas
+        """
+        if metricas is None:
+            excluidas = {'student_id', 'row_index'}
+            metricas = [c for c in df_metricas.select_dtypes('number').columns if c not in excluidas]
+        largo = df_metricas.melt(id_vars='project_key', value_vars=metricas, var_name='metric')
+        # Los valores ausentes se guardan como NULL: la métrica sigue formando parte del esquema
+        largo = largo.drop_duplicates(['project_key', 'metric'], keep='last')
+        with self._lock, self.conexion:
+            self.conexion.executemany(
+                'INSERT OR REPLACE INTO medidas (project_key, metric, value) VALUES (?, ?, ?)',
+                _valores(largo, ['project_key', 'metric', 'value']))
+        self._crear_vista_ancha()
+        return len(largo)
+
+    def cargar_medidas_archivo(self, df_archivos: pd.DataFrame, metricas: List[str]) -> int:
+        """
+        Upsert de medidas por archivo (una fila por archivo, como devuelve medidas_lote.medidas_archivos)
+
+        Returns:
+            int: Número de medidas cargadas
+        """
+        largo = df_archivos.melt(id_vars=['component', 'project_key', 'path'], value_vars=metricas, var_name='metric')
+        largo = largo.drop_duplicates(['component', 'metric'], keep='last')
+        columnas = ['component', 'metric', 'project_key', 'path', 'value']
+        with self._lock, self.conexion:
+            self.conexion.executemany(
+                'INSERT OR REPLACE INTO medidas_archivo (component, metric, project_key, path, value) '
+                'VALUES (?, ?, ?, ?, ?)', _valores(largo, columnas))
+        return len(largo)
+
+    def cargar_dataset_combinado(self, df_combinado: pd.DataFrame, metricas: List[str]) -> int:
+        """
+        Carga estudiantes, proyectos y medidas desde el dataset combinado
+        (Estudiantes_*_con_metricas_sonarcloud.csv, columnas {metrica}_AP1 / {metrica}_AP2)
+
+        Returns:
+            int: Número de medidas cargadas
+        """
+        self.cargar_estudiantes(df_combinado)
+        cargadas = 0
+        for asignacion in ASIGNACIONES:
+            clave = df_combinado.get(f'Sonar_{asignacion.capitalize()}')
+            columnas = {f'{m}_{asignacion}': m for m in metricas if f'{m}_{asignacion}' in df_combinado}
+            if clave is None or not columnas:
+                continue
+            df = df_combinado.loc[clave.notna(), list(columnas)].rename(columns=columnas)
+            df = df.apply(pd.to_numeric, errors='coerce')
+            df['project_key'] = clave[clave.notna()].astype(str).str.strip()
+            cargadas += self.cargar_medidas(df, list(columnas.values()))
+        return cargadas
+
+    def cargar_issues(self, issues: Union[pd.DataFrame, Iterable[Dict]]) -> int:
+        """
+        Upsert de issues con el formato de issues_detallados_*.csv
+
+        Los proyectos de las filas (row_index, assignment, project_key) se
+        registran si aún no estaban cargados desde el CSV de estudiantes.
+
+        Returns:
+            int: Número de issues cargados
+        """
+        df = issues if isinstance(issues, pd.DataFrame) else pd.DataFrame(list(issues), columns=COLUMNAS_ISSUES)
+        df = df.drop_duplicates('issue_key', keep='last')
+        columnas = ', '.join(COLUMNAS_ISSUE)
+        marcadores = ', '.join('?' for _ in COLUMNAS_ISSUE)
+        with self._lock, self.conexion:
+            self.conexion.executemany(f'INSERT OR REPLACE INTO issues ({columnas}) VALUES ({marcadores})',
+                                      _valores(df, COLUMNAS_ISSUE))
+            if {'row_index', 'assignment'} <= set(df.columns):
+                proyectos = df[['row_index', 'assignment', 'project_key']].drop_duplicates()
+                self.conexion.executemany(
+                    'INSERT OR IGNORE INTO proyectos (row_index, assignment, project_key) VALUES (?, ?, ?)',
+                    _valores(proyectos, ['row_index', 'assignment', 'project_key']))
+        return len(df)
+
+    def metricas(self) -> List[str]:
+        """Métricas presentes en la tabla medidas, en orden de primera carga"""
+        with self._lock:
+            return [fila[0] for fila in self.conexion.execute(
+                'SELECT metric FROM medidas GROUP BY metric ORDER BY MIN(rowid)')]
+
+    def _crear_vista_ancha(self):
+        # metricas_por_estudiante depende de las métricas cargadas: se regenera al cargar medidas
+        columnas = ',\n'.join(
+            f"  MAX(CASE WHEN p.assignment = '{a}' AND m.metric = '{metrica}' THEN m.value END)"
+            f' AS "{metrica}_{a}"'
+            for a in ASIGNACIONES for metrica in self.metricas())
+        repos = ',\n'.join(
+            f"  MAX(CASE WHEN p.assignment = '{a}' THEN p.{col} END) AS \"{nombre}_{a.capitalize()}\""
+            for nombre, col in (('Original_Repo', 'repo_original'), ('Sonar', 'project_key'), ('Sonar_Repo', 'repo_sonar'))
+            for a in ASIGNACIONES)
+        with self._lock, self.conexion:
+            self.conexion.execute('DROP VIEW IF EXISTS metricas_por_estudiante')
+            self.conexion.execute(
+                'CREATE VIEW metricas_por_estudiante AS\n'
+                'SELECT e.row_index, e.id AS "Id", e.semestre AS "Semestre", e.estudiante AS "Estudiante",\n'
+                '  e.sexo AS "Sexo", e.email AS "Email",\n'
+                f'{repos}' + (f',\n{columnas}' if columnas else '') + '\n'
+                'FROM estudiantes e\n'
+                'LEFT JOIN proyectos p ON p.row_index = e.row_index\n'
+                'LEFT JOIN medidas m ON m.project_key = p.project_key\n'
+                'GROUP BY e.row_index ORDER BY e.row_index')
+
+    def consultar(self, sql: str, params: Optional[Iterable] = None) -> pd.DataFrame:
+        """Ejecuta una consulta SQL de solo lectura y devuelve el resultado como DataFrame"""
+        with self._lock:
+            return pd.read_sql_query(sql, self.conexion, params=list(params or []))
+
+    def dataset_combinado(self) -> pd.DataFrame:
+        """Dataset en formato ancho ({metrica}_AP1 / {metrica}_AP2), indexado por row_index"""
+        return self.consultar('SELECT * FROM metricas_por_estudiante').set_index('row_index').rename_axis(None)
+
+    def cerrar(self):
+        self.conexion.close()
+
+
+def parsear_argumentos(argv=None):
+    parser = argparse.ArgumentParser(description="Carga y consulta del almacén analítico SQLite")
+    parser.add_argument("--db", default=RUTA_ALMACEN, help="Archivo SQLite del almacén")
+    parser.add_argument("--dataset", help="Dataset combinado de estudiantes con métricas ({metrica}_AP1/_AP2)")
+    parser.add_argument("--estudiantes", help="CSV de estudiantes (sin métricas)")
+    parser.add_argument("--metricas", help="CSV de métricas por proyecto (metricas_sonarcloud_raw.csv)")
+    parser.add_argument("--issues", help="CSV o Parquet de issues (issues_detallados_*.csv)")
+    parser.add_argument("--sep", help="Separador del CSV de issues (por defecto se detecta)")
+    parser.add_argument("--encoding", help="Codificación del CSV de issues (por defecto se detecta)")
+    parser.add_argument("--sql", help="Consulta a ejecutar tras la carga")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    from lector_issues import leer_issues_por_lotes
+
+    args = parsear_argumentos()
+    almacen = AlmacenAnalitico(args.db)
+    if args.estudiantes:
+        print(f"👥 Estudiantes cargados: {almacen.cargar_estudiantes(pd.read_csv(args.estudiantes))}")
+    if args.dataset:
+        df = pd.read_csv(args.dataset)
+        metricas = sorted({c[:-len('_AP1')] for c in df.columns if c.endswith('_AP1')}
+                          & {c[:-len('_AP2')] for c in df.columns if c.endswith('_AP2')},
+                          key=lambda m: df.columns.get_loc(f'{m}_AP1'))
+        print(f"📊 Medidas cargadas: {almacen.cargar_dataset_combinado(df, metricas)}")
+    if args.metricas:
+        print(f"📊 Medidas cargadas: {almacen.cargar_medidas(pd.read_csv(args.metricas))}")
+    if args.issues:
+        lotes = leer_issues_por_lotes(args.issues, sep=args.sep, encoding=args.encoding)
+        print(f"🐛 Issues cargados: {sum(almacen.cargar_issues(lote) for lote in lotes)}")
+    if args.sql:
+        print(almacen.consultar(args.sql).to_string(index=False))
+    almacen.cerrar()
@@ -0,0 +1,220 @@
+"""
+Almacén local de issues para sincronización incremental
+
+Guarda los issues en una base SQLite (una fila por `issue_key`) junto con la
+mayor `updateDate` recibido de cada `project_key`. En cada ejecución se piden
+los issues ordenados por fecha de actualización descendente
+(`s=UPDATE_DATE&asc=false`) y se deja de paginar en el primero que no es
+posterior a esa marca; los recibidos se guardan con upsert por `issue_key`.
+
+La relación estudiante/entrega -> proyecto va en su propia tabla
+(`proyectos`, como en almacen_analitico): un proyecto compartido por dos
+estudiantes se sincroniza una vez y se exporta con los dos.
+"""
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from particiones_issues import LIMITE_RESULTADOS, extraer_issues_particionado
+
+# Mismas columnas (y orden) que issues_detallados_*.csv
+COLUMNAS_ISSUES = [
+    'student_id', 'nombre', 'assignment', 'row_index', 'project_key',
+    'issue_key', 'rule', 'severity', 'type', 'message', 'component', 'line',
+    'status', 'creation_date', 'update_date', 'effort', 'debt', 'tags'
+]
+
+# Datos del estudiante y de la entrega (tabla proyectos); el resto son del issue (tabla issues)
+COLUMNAS_PROYECTO = ['student_id', 'nombre', 'assignment', 'row_index', 'project_key']
+COLUMNAS_ISSUE = [c for c in COLUMNAS_ISSUES if c not in COLUMNAS_PROYECTO or c == 'project_key']
+
+# Estados de los issues con resolución: el modo lote los excluye con resolved=false
+ESTADOS_RESUELTOS = ('RESOLVED', 'CLOSED')
+
+
+def aplanar_issue(issue: Dict, proyecto: Dict) -> Dict:
+    """Convierte un issue de la API en una fila con el formato de issues_detallados_*.csv"""
+    return {
+        'student_id': proyecto.get('student_id', ''),
+        'nombre': proyecto.get('nombre', ''),
+        'assignment': proyecto.get('assignment', ''),
+        'row_index': proyecto.get('row_index', ''),
+        'project_key': proyecto['project_key'],
+        'issue_key': issue.get('key', ''),
+        'rule': issue.get('rule', ''),
+        'severity': issue.get('severity', ''),
+        'type': issue.get('type', ''),
+        'message': issue.get('message', ''),
+        'component': issue.get('component', ''),
+        'line': issue.get('line', 0),
+        'status': issue.get('status', ''),
+        'creation_date': issue.get('creationDate', ''),
+        'update_date': issue.get('updateDate', ''),
+        'effort': issue.get('effort', ''),
+        'debt': issue.get('debt', ''),
+        'tags': ','.join(issue.get('tags', [])) if issue.get('tags') else ''
+    }
+
+
+class AlmacenIssues:
+    """
+    Almacén persistente de issues en SQLite
+
+    Args:
+        ruta (str): Archivo de la base de datos (se crea si no existe)
+    """
+
+    def __init__(self, ruta: str = '../data/issues.sqlite'):
+        self.ruta = ruta
+        self.conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self._lock = threading.Lock()
+        tipos = {'issue_key': 'TEXT PRIMARY KEY', 'line': 'INTEGER'}
+        columnas = ', '.join(f'{c} {tipos.get(c, "TEXT")}' for c in COLUMNAS_ISSUE)
+        with self.conexion:
+            # Las bases creadas antes de la tabla proyectos conservan columnas de estudiante en issues;
+            # ya no se escriben ni se leen
+            self.conexion.execute(f'CREATE TABLE IF NOT EXISTS issues ({columnas})')
+            self.conexion.execute(
+                'CREATE TABLE IF NOT EXISTS proyectos ('
+                'student_id TEXT, nombre TEXT, assignment TEXT NOT NULL, row_index INTEGER NOT NULL, '
+                'project_key TEXT NOT NULL, PRIMARY KEY (row_index, assignment))'
+            )
+            self.conexion.execute(
+                'CREATE TABLE IF NOT EXISTS sincronizaciones ('
+                'project_key TEXT PRIMARY KEY, ultima_sincronizacion TEXT NOT NULL)'
+            )
+
+    def ultima_sincronizacion(self, project_key: str) -> Optional[str]:
+        """Mayor updateDate recibido en la última sincronización del proyecto (None si nunca se sincronizó)"""
+        with self._lock:
+            fila = self.conexion.execute(
+                'SELECT ultima_sincronizacion FROM sincronizaciones WHERE project_key = ?', (project_key,)
+            ).fetchone()
+        return fila[0] if fila else None
+
+    def registrar_proyectos(self, proyectos: Iterable[Dict]):
+        """Upsert de la relación (row_index, assignment) -> project_key y datos del estudiante"""
+        columnas = ', '.join(COLUMNAS_PROYECTO)
+        marcadores = ', '.join('?' for _ in COLUMNAS_PROYECTO)
+        actualizacion = ', '.join(f'{c} = excluded.{c}' for c in COLUMNAS_PROYECTO if c not in ('row_index', 'assignment'))
+        valores = [tuple(str(p.get(c, '')) if c != 'row_index' else int(p[c]) for c in COLUMNAS_PROYECTO)
+                   for p in proyectos]
+        with self._lock, self.conexion:
+            self.conexion.executemany(
+                f'INSERT INTO proyectos ({columnas}) VALUES ({marcadores}) '
+                f'ON CONFLICT(row_index, assignment) DO UPDATE SET {actualizacion}',
+                valores
+            )
+
+    def guardar_proyecto(self, project_key: str, filas: Iterable[Dict], sincronizado_en: str) -> int:
+        """
+        Upsert de los issues de un proyecto y registro de su marca de sincronización
+
+        Ambas operaciones van en la misma transacción: si el proceso se
+        interrumpe, la marca no avanza y la siguiente ejecución repite la consulta.
+
+        Returns:
+            int: Número de issues insertados o actualizados
+        """
+        columnas = ', '.join(COLUMNAS_ISSUE)
+        marcadores = ', '.join('?' for _ in COLUMNAS_ISSUE)
+        actualizacion = ', '.join(f'{c} = excluded.{c}' for c in COLUMNAS_ISSUE if c != 'issue_key')
+        valores = [tuple(fila[c] for c in COLUMNAS_ISSUE) for fila in filas]
+
+        with self._lock, self.conexion:
+            self.conexion.executemany(
+                f'INSERT INTO issues ({columnas}) VALUES ({marcadores}) '
+                f'ON CONFLICT(issue_key) DO UPDATE SET {actualizacion}',
+                valores
+            )
+            self.conexion.execute(
+                'INSERT INTO sincronizaciones (project_key, ultima_sincronizacion) VALUES (?, ?) '
+                'ON CONFLICT(project_key) DO UPDATE SET ultima_sincronizacion = excluded.ultima_sincronizacion',
+                (project_key, sincronizado_en)
+            )
+        return len(valores)
+
+    def a_dataframe(self, project_keys: Optional[List[str]] = None, incluir_resueltos: bool = False) -> pd.DataFrame:
+        """
+        Issues almacenados como DataFrame, una fila por issue y estudiante/entrega del proyecto
+
+        Args:
+            project_keys (list): Solo estos proyectos (por defecto todos)
+            incluir_resueltos (bool): Incluir los issues RESOLVED/CLOSED. Por defecto
+                no, igual que la salida del modo lote (resolved=false)
+        """
+        seleccion = ', '.join(f'p.{c}' if c in COLUMNAS_PROYECTO else f'i.{c}' for c in COLUMNAS_ISSUES)
+        consulta = f'SELECT {seleccion} FROM issues i JOIN proyectos p ON p.project_key = i.project_key'
+        condiciones, params = [], []
+        if project_keys:
+            condiciones.append(f'p.project_key IN ({", ".join("?" for _ in project_keys)})')
+            params += list(project_keys)
+        if not incluir_resueltos:
+            condiciones.append(f'i.status NOT IN ({", ".join("?" for _ in ESTADOS_RESUELTOS)})')
+            params += list(ESTADOS_RESUELTOS)
+        if condiciones:
+            consulta += ' WHERE ' + ' AND '.join(condiciones)
+        consulta += ' ORDER BY p.row_index, p.assignment, i.issue_key'
+        with self._lock:
+            return pd.read_sql_query(consulta, self.conexion, params=params)
+
+    def cerrar(self):
+        self.conexion.close()
+
+
+def _fecha(valor: str) -> datetime:
+    return datetime.strptime(valor, '%Y-%m-%dT%H:%M:%S%z')
+
+
+def _issues_modificados(cliente, params: Dict, desde: str) -> Optional[List[Dict]]:
+    """
+    Issues con updateDate posterior a `desde`, del más reciente al más antiguo
+
+    Devuelve None si hay más de LIMITE_RESULTADOS cambios (la API no permite
+    seguir paginando y hay que descargar el proyecto completo).
+    """
+    marca = _fecha(desde)
+    issues = []
+    orden = {**params, 's': 'UPDATE_DATE', 'asc': 'false'}
+    for pagina in cliente.paginar('issues/search', orden, max_items=LIMITE_RESULTADOS):
+        for issue in pagina:
+            if _fecha(issue['updateDate']) <= marca:
+                return issues
+            issues.append(issue)
+    return issues if len(issues) < LIMITE_RESULTADOS else None
+
+
+def sincronizar_proyecto(almacen: AlmacenIssues, proyecto: Dict, cliente) -> int:
+    """
+    Sincroniza un proyecto pidiendo solo los issues nuevos o modificados
+
+    La API no filtra por fecha de actualización (no existe `updatedAfter`):
+    se ordena por updateDate descendente y se corta en el primer issue ya
+    visto. La marca que se guarda es el mayor updateDate recibido, no el
+    reloj local, así que no depende de la hora de esta máquina.
+
+    Args:
+        almacen (AlmacenIssues): Almacén local de issues
+        proyecto (dict): Proyecto con project_key y datos del estudiante
+        cliente (ClienteSonarCloud): Cliente HTTP a utilizar
+
+    Returns:
+        int: Número de issues recibidos (0 si no hubo cambios)
+    """
+    project_key = proyecto['project_key']
+    almacen.registrar_proyectos([proyecto])
+    desde = almacen.ultima_sincronizacion(project_key)
+
+    # Sin filtro de estado: los issues cerrados también deben actualizarse en el almacén
+    # (a_dataframe los excluye al exportar)
+    params = {'componentKeys': project_key}
+    issues = _issues_modificados(cliente, params, desde) if desde else None
+    if issues is None:
+        issues = extraer_issues_particionado(cliente, params)
+
+    marca = max((issue['updateDate'] for issue in issues), key=_fecha, default=desde)
+    filas = [aplanar_issue(issue, proyecto) for issue in issues]
+    return almacen.guardar_proyecto(project_key, filas, marca or '')
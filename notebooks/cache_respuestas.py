@@ -0,0 +1,172 @@
+"""
+Caché en disco de respuestas de la API de SonarCloud
+
+Al repetir los notebooks 1 y 2 o `extrae_issues.py` (tras un fallo o un
+cambio de código) se volvían a pedir todas las páginas de métricas e issues.
+Con esta caché cada respuesta correcta se guarda en un archivo JSON cuyo
+nombre es el hash de la URL del endpoint y de los parámetros normalizados,
+de modo que la misma consulta no vuelve a salir a la red.
+
+- Caducidad (`ttl`): las entradas más antiguas se consideran fallos de caché
+- Tamaño máximo (`max_bytes`): se expulsan las entradas usadas hace más tiempo (LRU)
+- Modo offline: solo se sirve desde la caché (también entradas caducadas) y
+  las consultas ausentes fallan en lugar de ir a la red, lo que permite
+  repetir análisis o pruebas con respuestas grabadas y sin conexión
+
+Uso: `ClienteSonarCloud(..., cache=CacheRespuestas('../data/cache_api', ttl=24 * 3600))`
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+DIRECTORIO_CACHE = "../data/cache_api"
+
+
+def normalizar_params(params: Optional[Dict]) -> Dict[str, str]:
+    """Parámetros como texto, sin valores None y ordenados por nombre"""
+    return {str(k): str(v) for k, v in sorted((params or {}).items()) if v is not None}
+
+
+class CacheRespuestas:
+    """
+    Caché de respuestas JSON en disco, direccionada por contenido de la consulta
+
+    Segura entre hilos; varios procesos pueden compartir el directorio (una
+    entrada borrada por otro proceso se trata como un fallo de caché).
+
+    Args:
+        directorio (str): Carpeta donde se guardan las respuestas
+        ttl (float): Segundos de validez de cada respuesta (None = sin caducidad)
+        max_bytes (int): Tamaño máximo total; al superarlo se expulsan las menos usadas
+        offline (bool): Servir solo desde la caché, sin peticiones a la red
+    """
+
+    def __init__(self, directorio: str = DIRECTORIO_CACHE, ttl: Optional[float] = None,
+                 max_bytes: int = 500 * 1024 ** 2, offline: bool = False):
+        self.directorio = directorio
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.aciertos = 0
+        self.fallos = 0
+        self._lock = threading.Lock()
+        # clave -> tamaño en bytes, de la menos a la más recientemente usada
+        self._entradas = OrderedDict()
+        self._bytes = 0
+        os.makedirs(directorio, exist_ok=True)
+        self._cargar_indice()
+
+    def _cargar_indice(self):
+        # La fecha de modificación hace de último uso (se actualiza en cada acierto)
+        encontrados = []
+        for sub in os.scandir(self.directorio):
+            if not sub.is_dir():
+                continue
+            for archivo in os.scandir(sub.path):
+                if archivo.name.endswith('.json'):
+                    info = archivo.stat()
+                    encontrados.append((info.st_mtime, archivo.name[:-len('.json')], info.st_size))
+        for _, clave, tamano in sorted(encontrados):
+            self._entradas[clave] = tamano
+            self._bytes += tamano
+
+    @staticmethod
+    def clave(url: str, params: Optional[Dict] = None) -> str:
+        """Hash SHA-256 de la URL y los parámetros normalizados"""
+        contenido = json.dumps([url.rstrip('/'), normalizar_params(params)], sort_keys=True)
+        return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+    def _ruta(self, clave: str) -> str:
+        return os.path.join(self.directorio, clave[:2], f"{clave}.json")
+
+    def obtener(self, url: str, params: Optional[Dict] = None) -> Optional[Dict]:
+        """
+        Devuelve la respuesta guardada para la consulta, o None si no hay una válida
+
+        En modo offline también se devuelven las entradas caducadas.
+        """
+        clave = self.clave(url, params)
+        ruta = self._ruta(clave)
+        entrada = self._leer(clave)
+        with self._lock:
+            if entrada is None:
+                self.fallos += 1
+                return None
+            self.aciertos += 1
+            if clave in self._entradas:
+                self._entradas.move_to_end(clave)
+        try:
+            os.utime(ruta)
+        except FileNotFoundError:
+            pass
+        return entrada['respuesta']
+
+    def contiene(self, url: str, params: Optional[Dict] = None) -> bool:
+        """True si obtener() devolvería una respuesta (no cuenta como acierto ni como uso)"""
+        return self._leer(self.clave(url, params)) is not None
+
+    def _leer(self, clave: str) -> Optional[Dict]:
+        # Entrada válida de la clave, o None si no existe, está corrupta o ha caducado
+        try:
+            with open(self._ruta(clave), encoding='utf-8') as f:
+                entrada = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            with self._lock:
+                self._olvidar(clave)
+            return None
+        if self.ttl is not None and not self.offline and time.time() - entrada['guardado'] > self.ttl:
+            return None
+        return entrada
+
+    def guardar(self, url: str, params: Optional[Dict], respuesta: Dict):
+        """Guarda la respuesta de una consulta (escritura atómica) y aplica el límite de tamaño"""
+        clave = self.clave(url, params)
+        ruta = self._ruta(clave)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        entrada = {'url': url, 'params': normalizar_params(params), 'guardado': time.time(),
+                   'respuesta': respuesta}
+        fd, temporal = tempfile.mkstemp(dir=os.path.dirname(ruta), suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(entrada, f, ensure_ascii=False, separators=(',', ':'))
+        tamano = os.path.getsize(temporal)
+        os.replace(temporal, ruta)
+
+        with self._lock:
+            self._olvidar(clave)
+            self._entradas[clave] = tamano
+            self._bytes += tamano
+            while self._bytes > self.max_bytes and len(self._entradas) > 1:
+                antigua, _ = next(iter(self._entradas.items()))
+                self._olvidar(antigua)
+                try:
+                    os.remove(self._ruta(antigua))
+                except FileNotFoundError:
+                    pass
+
+    def _olvidar(self, clave: str):
+        # Requiere tener el lock
+        tamano = self._entradas.pop(clave, None)
+        if tamano is not None:
+            self._bytes -= tamano
+
+    def limpiar(self):
+        """Elimina todas las entradas de la caché"""
+        with self._lock:
+            for clave in list(self._entradas):
+                try:
+                    os.remove(self._ruta(clave))
+                except FileNotFoundError:
+                    pass
+            self._entradas.clear()
+            self._bytes = 0
+
+    def estadisticas(self) -> Dict:
+        """Aciertos, fallos, número de entradas y tamaño total en bytes"""
+        with self._lock:
+            return {'aciertos': self.aciertos, 'fallos': self.fallos,
+                    'entradas': len(self._entradas), 'bytes': self._bytes}
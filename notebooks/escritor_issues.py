@@ -0,0 +1,155 @@
+"""
+Escritura incremental de issues a CSV
+
+En lugar de acumular todas las páginas en memoria y copiarlas luego a uno o
+varios DataFrames antes de exportar, cada página se aplana y se añade al
+archivo en cuanto llega, de modo que la memoria no crece con el número de
+issues. Las filas de cada proyecto se escriben primero en un archivo
+temporal y se vuelcan al CSV solo si el proyecto termina sin errores, para
+no dejar resultados parciales en la salida.
+
+`EscritorIssuesParquet` ofrece la misma interfaz con salida Parquet (ver
+formato_columnar); cada proyecto confirmado se escribe como un row group.
+"""
+import csv
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+
+from almacen_issues import COLUMNAS_ISSUES, aplanar_issue
+from formato_columnar import esquema_issues, pq, tabla_issues
+
+
+class _BloqueProyecto:
+    """Filas de un proyecto pendientes de confirmar (en un archivo temporal)"""
+
+    def __init__(self, archivo, columnas: List[str], sep: str):
+        self._writer = csv.DictWriter(archivo, fieldnames=columnas, delimiter=sep,
+                                      lineterminator='\n', extrasaction='ignore')
+        self.filas = 0
+
+    def escribir(self, issues: Iterable[Dict], proyecto: Dict) -> int:
+        """Aplana y escribe una página de issues; devuelve el número de filas escritas"""
+        filas = [aplanar_issue(issue, proyecto) for issue in issues]
+        self._writer.writerows(filas)
+        self.filas += len(filas)
+        return len(filas)
+
+
+class EscritorIssuesCSV:
+    """
+    Escritor de issues a CSV, página a página y seguro entre hilos
+
+    Args:
+        ruta (str): Archivo de salida (se sobrescribe)
+        columnas (list): Columnas a escribir, en orden (por defecto las de issues_detallados_*.csv)
+        encoding (str): Codificación del archivo
+        sep (str): Separador de campos
+    """
+
+    def __init__(self, ruta: str, columnas: Optional[List[str]] = None,
+                 encoding: str = 'utf-8-sig', sep: str = ','):
+        self.ruta = ruta
+        self.columnas = list(columnas or COLUMNAS_ISSUES)
+        self.sep = sep
+        self.filas = 0
+        # El BOM de utf-8-sig solo debe aparecer al principio del archivo final
+        self._encoding_temporal = 'utf-8' if encoding.lower().replace('_', '-') == 'utf-8-sig' else encoding
+        self._archivo = open(ruta, 'w', newline='', encoding=encoding)
+        self._lock = threading.Lock()
+        # Mismo fin de línea que DataFrame.to_csv
+        csv.DictWriter(self._archivo, fieldnames=self.columnas, delimiter=sep, lineterminator='\n').writeheader()
+
+    @contextmanager
+    def bloque_proyecto(self):
+        """
+        Agrupa las filas de un proyecto: se añaden al CSV al salir del bloque sin
+        excepciones y se descartan si hay un error
+
+        Yields:
+            _BloqueProyecto: Objeto con el método `escribir(issues, proyecto)`
+        """
+        with tempfile.TemporaryFile('w+', newline='', encoding=self._encoding_temporal) as temporal:
+            bloque = _BloqueProyecto(temporal, self.columnas, self.sep)
+            yield bloque
+            temporal.seek(0)
+            with self._lock:
+                shutil.copyfileobj(temporal, self._archivo)
+                self.filas += bloque.filas
+
+    def escribir(self, issues: Iterable[Dict], proyecto: Dict) -> int:
+        """Escribe directamente una página de issues de un proyecto"""
+        with self.bloque_proyecto() as bloque:
+            return bloque.escribir(issues, proyecto)
+
+    def cerrar(self):
+        self._archivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+class _BloqueProyectoParquet:
+    """Filas de un proyecto pendientes de confirmar (en memoria, solo las del proyecto)"""
+
+    def __init__(self):
+        self.pendientes = []
+        self.filas = 0
+
+    def escribir(self, issues: Iterable[Dict], proyecto: Dict) -> int:
+        filas = [aplanar_issue(issue, proyecto) for issue in issues]
+        self.pendientes.extend(filas)
+        self.filas += len(filas)
+        return len(filas)
+
+
+class EscritorIssuesParquet:
+    """
+    Escritor de issues a Parquet con la misma interfaz que EscritorIssuesCSV
+
+    Las categorías se guardan codificadas como diccionario y las fechas como
+    timestamps UTC. Requiere pyarrow.
+
+    Args:
+        ruta (str): Archivo de salida (se sobrescribe)
+        columnas (list): Columnas a escribir, en orden (por defecto las de issues_detallados_*.csv)
+        compresion (str): Códec de compresión de Parquet
+    """
+
+    def __init__(self, ruta: str, columnas: Optional[List[str]] = None, compresion: str = 'zstd'):
+        self.ruta = ruta
+        self.columnas = list(columnas or COLUMNAS_ISSUES)
+        self.filas = 0
+        self._esquema = esquema_issues(self.columnas)
+        self._writer = pq.ParquetWriter(ruta, self._esquema, compression=compresion)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def bloque_proyecto(self):
+        """Agrupa las filas de un proyecto; se escriben como un row group si no hay errores"""
+        bloque = _BloqueProyectoParquet()
+        yield bloque
+        if bloque.pendientes:
+            tabla = tabla_issues(bloque.pendientes, self._esquema)
+            with self._lock:
+                self._writer.write_table(tabla)
+                self.filas += bloque.filas
+
+    def escribir(self, issues: Iterable[Dict], proyecto: Dict) -> int:
+        """Escribe directamente una página de issues de un proyecto"""
+        with self.bloque_proyecto() as bloque:
+            return bloque.escribir(issues, proyecto)
+
+    def cerrar(self):
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
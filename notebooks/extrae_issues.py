@@ -17,11 +17,21 @@
 
 # %%
 # Importar librerías necesarias
-import requests
 import pandas as pd
 import json
-from collections import defaultdict
-import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from sonarcloud_cliente import ClienteSonarCloud, ErrorSonarCloud, LimitadorTasa
+from almacen_issues import AlmacenIssues, sincronizar_proyecto
+from particiones_issues import extraer_issues_particionado, recorrer_issues
+from escritor_issues import EscritorIssuesCSV, EscritorIssuesParquet
+from formato_columnar import guardar_parquet, leer_tabla
+from agrupaciones_issues import AgrupacionesIssues
+from cache_respuestas import DIRECTORIO_CACHE, CacheRespuestas
+from puntos_control import PuntoControlExtraccion
+from modelo_issues import ColeccionIssues, vistas_a_dataframe
+from instrumentacion import Instrumentacion, medir_etapa
 
 print("✅ Librerías importadas correctamente")
 
@@ -30,117 +40,308 @@ print("✅ Librerías importadas correctamente")
 SONARCLOUD_BASE_URL = "https://sonarcloud.io/api"
 ISSUES_ENDPOINT = f"{SONARCLOUD_BASE_URL}/issues/search"
 
-def extraer_issues_proyecto(project_key, max_issues=10000):
+# Cliente por defecto: 2 peticiones/s equivalen a la pausa fija de 0.5s entre páginas
+CLIENTE_SONAR = ClienteSonarCloud(SONARCLOUD_BASE_URL, limitador=LimitadorTasa(tasa=2.0, capacidad=1))
+
+def params_issues_abiertos(project_key):
+    """Parámetros de /api/issues/search para los issues no resueltos de un proyecto"""
+    return {
+        'componentKeys': project_key,
+        'resolved': 'false'  # Solo issues no resueltos
+    }
+
+def extraer_issues_proyecto(project_key, max_issues=None, cliente=None, verbose=True):
     """
     Extrae todos los issues de un proyecto de SonarCloud
     
+    Los proyectos con más de 10.000 issues (límite de la API por consulta) se
+    extraen por particiones de tipo/severidad/fecha (ver particiones_issues).
+    
     Args:
         project_key (str): Clave del proyecto en SonarCloud
-        max_issues (int): Número máximo de issues a extraer
+        max_issues (int): Número máximo de issues a devolver (None = todos)
+        cliente (ClienteSonarCloud): Cliente HTTP a utilizar (por defecto CLIENTE_SONAR)
+        verbose (bool): Mostrar el progreso página a página
     
     Returns:
         list: Lista de issues extraídos
+    
+    Raises:
+        ErrorSonarCloud: Si una página falla tras los reintentos (no se devuelven resultados parciales)
     """
-    all_issues = []
-    page = 1
-    page_size = 500  # Máximo permitido por SonarCloud
-    
-    print(f"🔍 Extrayendo issues del proyecto: {project_key}")
-    
-    while len(all_issues) < max_issues:
-        params = {
-            'componentKeys': project_key,
-            'p': page,
-            'ps': page_size,
-            'resolved': 'false'  # Solo issues no resueltos
-        }
-        
-        try:
-            response = requests.get(ISSUES_ENDPOINT, params=params)
-            
-            if response.status_code == 200:
-                data = response.json()
-                issues = data.get('issues', [])
-                
-                if not issues:
-                    break
-                
-                all_issues.extend(issues)
-                print(f"📄 Página {page}: {len(issues)} issues extraídos (Total: {len(all_issues)})")
-                
-                # Verificar si hay más páginas
-                total_issues = data.get('total', 0)
-                if len(all_issues) >= total_issues:
-                    break
-                
-                page += 1
-                time.sleep(0.5)  # Pausa para evitar rate limiting
-                
-            elif response.status_code == 404:
-                print(f"❌ Proyecto no encontrado: {project_key}")
-                break
-            else:
-                print(f"❌ Error {response.status_code}: {response.text}")
-                break
-                
-        except requests.exceptions.RequestException as e:
-            print(f"❌ Error de conexión: {e}")
-            break
-    
-    print(f"✅ Extracción completada: {len(all_issues)} issues totales")
+    cliente = cliente or CLIENTE_SONAR
+    params = params_issues_abiertos(project_key)
+    recibidos = []
+    
+    def mostrar_pagina(issues):
+        recibidos.append(len(issues))
+        if verbose:
+            print(f"📄 Página {len(recibidos)}: {len(issues)} issues extraídos (Total: {sum(recibidos)})")
+    
+    if verbose:
+        print(f"🔍 Extrayendo issues del proyecto: {project_key}")
+    
+    try:
+        all_issues = extraer_issues_particionado(cliente, params, progreso=mostrar_pagina)
+    except ErrorSonarCloud as e:
+        if e.status_code == 404:
+            print(f"❌ Proyecto no encontrado: {project_key}")
+            return []
+        raise
+    
+    if max_issues is not None:
+        all_issues = all_issues[:max_issues]
+    
+    if verbose:
+        print(f"✅ Extracción completada: {len(all_issues)} issues totales")
     return all_issues
 
-print("✅ Función de extracción definida")
+def volcar_issues_proyecto(proyecto, escritor, cliente=None, punto_control=None, instrumentacion=None, destinos=None):
+    """
+    Extrae los issues de un proyecto escribiendo cada página en cuanto llega
+    
+    A diferencia de extraer_issues_proyecto, no acumula los issues: la memoria
+    no depende del tamaño del proyecto. Si falla alguna página, las filas del
+    proyecto se descartan y no llegan al archivo.
+    
+    Args:
+        proyecto (dict): Proyecto con project_key y datos del estudiante
+        escritor (EscritorIssuesCSV): Destino de las filas aplanadas
+        cliente (ClienteSonarCloud): Cliente HTTP a utilizar (por defecto CLIENTE_SONAR)
+        punto_control (PuntoControlExtraccion): Si se indica, cada página se guarda en él
+            y las ya guardadas en una ejecución anterior no se vuelven a pedir
+        instrumentacion (Instrumentacion): Si se indica, la escritura de cada página cuenta en la etapa 'parse'
+        destinos (list): Estudiantes/entregas con este mismo project_key; cada página se escribe
+            una vez por cada uno (por defecto solo `proyecto`)
+    
+    Returns:
+        int: Número de issues del proyecto (las filas escritas son issues x destinos)
+    
+    Raises:
+        ErrorSonarCloud: Si una página falla tras los reintentos
+    """
+    cliente = cliente or CLIENTE_SONAR
+    params = params_issues_abiertos(proyecto['project_key'])
+    if punto_control is not None:
+        paginas = punto_control.recorrer(cliente, proyecto, params)
+    else:
+        paginas = recorrer_issues(cliente, params)
+    issues = 0
+    try:
+        with escritor.bloque_proyecto() as bloque:
+            for pagina in paginas:
+                with medir_etapa(instrumentacion, 'parse'):
+                    for destino in destinos or [proyecto]:
+                        bloque.escribir(pagina, destino)
+                issues += len(pagina)
+    except ErrorSonarCloud as e:
+        if e.status_code == 404:
+            print(f"❌ Proyecto no encontrado: {proyecto['project_key']}")
+            if punto_control is not None:
+                punto_control.marcar(proyecto)
+            return 0
+        if punto_control is not None:
+            punto_control.marcar(proyecto, completado=False, error=str(e))
+        raise
+    return issues
+
+print("✅ Funciones de extracción definidas")
+
+# %%
+def cargar_proyectos_csv(csv_path):
+    """
+    Obtiene la lista de proyectos (AP1 y AP2) del CSV de estudiantes
+    
+    Args:
+        csv_path (str): Ruta o URL del CSV con columnas Sonar_Ap1 y Sonar_Ap2
+    
+    Returns:
+        list: Lista de diccionarios con student_id, nombre, project_key, assignment y row_index
+    """
+    df = pd.read_csv(csv_path)
+    proyectos = []
+    
+    for index, row in df.iterrows():
+        for columna, assignment in (('Sonar_Ap1', 'AP1'), ('Sonar_Ap2', 'AP2')):
+            valor = row.get(columna)
+            if pd.notna(valor) and str(valor).strip():
+                proyectos.append({
+                    'student_id': row.get('ID', f'Student_{index}'),
+                    'nombre': row.get('Estudiante', 'Unknown'),
+                    'project_key': str(valor).strip(),
+                    'assignment': assignment,
+                    'row_index': index
+                })
+    
+    return proyectos
+
+def extraer_issues_cohorte(proyectos, max_workers=8, tasa=5.0, base_url=SONARCLOUD_BASE_URL, escritor=None,
+                           cache=None, punto_control=None, coleccion=None, instrumentacion=None):
+    """
+    Extrae en paralelo los issues de todos los proyectos de una cohorte
+    
+    Los hilos comparten un único LimitadorTasa, de modo que la tasa total de
+    peticiones no depende del número de workers. Un project_key que aparece en
+    varias filas del CSV (proyecto compartido) se descarga una sola vez y sus
+    issues se asignan a cada estudiante.
+    
+    Args:
+        proyectos (list): Proyectos devueltos por cargar_proyectos_csv
+        max_workers (int): Número de proyectos extraídos simultáneamente
+        tasa (float): Peticiones por segundo permitidas en total
+        base_url (str): URL base de la API
+        escritor (EscritorIssuesCSV): Si se indica, los issues se escriben página a
+            página en él y no se guardan en los resultados ('issues' queda vacío)
+        cache (CacheRespuestas): Caché de respuestas en disco (opcional)
+        punto_control (PuntoControlExtraccion): Guarda el avance página a página para
+            poder reanudar (requiere `escritor`)
+        coleccion (ColeccionIssues): Sin escritor, colección compacta donde se guardan los
+            issues (por defecto una nueva); 'issues' de cada proyecto es una vista sobre ella
+        instrumentacion (Instrumentacion): Registro de peticiones, etapas (fetch, parse) y
+            contadores de proyectos e issues (opcional)
+    
+    Returns:
+        list: Un diccionario por proyecto con sus datos, 'status', 'issues' e 'issues_count'
+    """
+    cliente = ClienteSonarCloud(base_url, limitador=LimitadorTasa(tasa=tasa, capacidad=max_workers),
+                                pool_size=max_workers, cache=cache, instrumentacion=instrumentacion)
+    resultados = [None] * len(proyectos)
+    # project_key -> índices de sus filas; el primero (orden del CSV) es el que se descarga y se
+    # guarda en el punto de control, así una reanudación elige el mismo
+    grupos = {}
+    for indice, proyecto in enumerate(proyectos):
+        grupos.setdefault(proyecto['project_key'], []).append(indice)
+    total = len(grupos)
+    
+    if punto_control is not None and escritor is None:
+        raise ValueError("El punto de control requiere un escritor")
+    if escritor is None and coleccion is None:
+        coleccion = ColeccionIssues()
+    
+    def extraer_compacto(indices):
+        # Los issues completos de la API solo viven mientras se guarda el proyecto en la colección
+        issues = extraer_issues_proyecto(proyectos[indices[0]]['project_key'], cliente=cliente, verbose=False)
+        with medir_etapa(instrumentacion, 'parse'):
+            return [coleccion.agregar(issues, proyectos[indice]) for indice in indices]
+    
+    def volcar(indices):
+        destinos = [proyectos[indice] for indice in indices]
+        cantidad = volcar_issues_proyecto(destinos[0], escritor, cliente, punto_control, instrumentacion, destinos)
+        return [[]] * len(indices), cantidad
+    
+    print(f"🚀 Extrayendo issues de {total} proyectos ({len(proyectos)} entregas) con {max_workers} workers "
+          f"({tasa} peticiones/s)")
+    
+    with medir_etapa(instrumentacion, 'fetch'), ThreadPoolExecutor(max_workers=max_workers) as pool:
+        if escritor is not None:
+            futuros = {pool.submit(volcar, indices): indices for indices in grupos.values()}
+        else:
+            futuros = {pool.submit(extraer_compacto, indices): indices for indices in grupos.values()}
+        for i, futuro in enumerate(as_completed(futuros), 1):
+            # Se guarda por índice para conservar el orden del CSV
+            indices = futuros[futuro]
+            project_key = proyectos[indices[0]]['project_key']
+            try:
+                resultado = futuro.result()
+            except ErrorSonarCloud as e:
+                # El proyecto se marca como fallido en lugar de guardar páginas incompletas
+                for indice in indices:
+                    resultados[indice] = {**proyectos[indice], 'status': 'error', 'error': str(e),
+                                          'issues': [], 'issues_count': 0}
+                print(f"  ❌ [{i}/{total}] {project_key}: {e}")
+                if instrumentacion is not None:
+                    instrumentacion.contar('proyectos_fallidos', len(indices))
+                continue
+            vistas, cantidad = resultado if escritor is not None else (resultado, len(resultado[0]))
+            for indice, vista in zip(indices, vistas):
+                resultados[indice] = {**proyectos[indice], 'status': 'success', 'issues': vista,
+                                      'issues_count': cantidad}
+            compartido = f" (compartido por {len(indices)} entregas)" if len(indices) > 1 else ""
+            print(f"  ✅ [{i}/{total}] {project_key}: {cantidad} issues{compartido}")
+            if instrumentacion is not None:
+                instrumentacion.contar('proyectos', len(indices))
+                instrumentacion.contar('issues', cantidad * len(indices))
+    
+    cliente.cerrar()
+    return resultados
+
+def issues_cohorte_a_dataframe(resultados):
+    """
+    Aplana los resultados de extraer_issues_cohorte con el formato de issues_detallados_*.csv
+    """
+    return vistas_a_dataframe(r['issues'] for r in resultados if r['status'] == 'success')
+
+def sincronizar_cohorte(proyectos, almacen, max_workers=8, tasa=5.0, base_url=SONARCLOUD_BASE_URL, cache=None,
+                        instrumentacion=None):
+    """
+    Sincronización incremental de una cohorte contra un AlmacenIssues
+    
+    Cada proyecto solo pide los issues creados o actualizados desde su última
+    sincronización y los guarda con upsert por issue_key.
+    
+    Args:
+        proyectos (list): Proyectos devueltos por cargar_proyectos_csv
+        almacen (AlmacenIssues): Almacén local de issues
+        max_workers (int): Número de proyectos sincronizados simultáneamente
+        tasa (float): Peticiones por segundo permitidas en total
+        base_url (str): URL base de la API
+        cache (CacheRespuestas): Caché de respuestas en disco (opcional)
+        instrumentacion (Instrumentacion): Registro de peticiones, etapa fetch y contadores (opcional)
+    
+    Returns:
+        dict: project_key -> número de issues recibidos, o el mensaje de error si falló
+    """
+    cliente = ClienteSonarCloud(base_url, limitador=LimitadorTasa(tasa=tasa, capacidad=max_workers),
+                                pool_size=max_workers, cache=cache, instrumentacion=instrumentacion)
+    # Claves repetidas en el CSV (mismo proyecto para dos estudiantes) se sincronizan una vez;
+    # la tabla proyectos del almacén las exporta con cada estudiante
+    almacen.registrar_proyectos(proyectos)
+    unicos = list({p['project_key']: p for p in proyectos}.values())
+    cambios = {}
+    
+    print(f"🔄 Sincronización incremental de {len(unicos)} proyectos")
+    
+    with medir_etapa(instrumentacion, 'fetch'), ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futuros = {pool.submit(sincronizar_proyecto, almacen, p, cliente): p for p in unicos}
+        for futuro in as_completed(futuros):
+            project_key = futuros[futuro]['project_key']
+            try:
+                cambios[project_key] = futuro.result()
+                print(f"  ✅ {project_key}: {cambios[project_key]} issues nuevos o actualizados")
+                if instrumentacion is not None:
+                    instrumentacion.contar('proyectos')
+                    instrumentacion.contar('issues', cambios[project_key])
+            except ErrorSonarCloud as e:
+                cambios[project_key] = str(e)
+                print(f"  ❌ {project_key}: {e}")
+                if instrumentacion is not None:
+                    instrumentacion.contar('proyectos_fallidos')
+    
+    cliente.cerrar()
+    return cambios
+
+print("✅ Funciones de extracción por lotes definidas")
 
 # %%
 def procesar_y_agrupar_issues(issues_data):
     """
     Procesa y agrupa los issues extraídos
     
+    Los issues se guardan una sola vez en una tabla; las agrupaciones se
+    calculan sobre ella sin copiar registros (ver agrupaciones_issues).
+    
     Args:
-        issues_data (list): Lista de issues de SonarCloud
+        issues_data (list | DataFrame): Lista de issues de SonarCloud, o un DataFrame
+            con el formato de issues_detallados_*.csv
     
     Returns:
-        dict: Diccionario con issues agrupados por diferentes categorías
+        AgrupacionesIssues: Issues agrupados por severidad, tipo, regla y archivo
+            (diccionario vacío si no hay issues)
     """
-    if not issues_data:
+    if len(issues_data) == 0:
         return {}
     
-    # Crear agrupaciones
-    agrupaciones = {
-        'por_severidad': defaultdict(list),
-        'por_tipo': defaultdict(list),
-        'por_regla': defaultdict(list),
-        'por_archivo': defaultdict(list)
-    }
-    
-    for issue in issues_data:
-        # Información básica del issue
-        issue_info = {
-            'key': issue.get('key', ''),
-            'message': issue.get('message', ''),
-            'severity': issue.get('severity', 'UNKNOWN'),
-            'type': issue.get('type', 'UNKNOWN'),
-            'rule': issue.get('rule', 'UNKNOWN'),
-            'component': issue.get('component', ''),
-            'line': issue.get('line', 'N/A'),
-            'status': issue.get('status', 'UNKNOWN')
-        }
-        
-        # Agrupar por severidad
-        agrupaciones['por_severidad'][issue_info['severity']].append(issue_info)
-        
-        # Agrupar por tipo
-        agrupaciones['por_tipo'][issue_info['type']].append(issue_info)
-        
-        # Agrupar por regla
-        agrupaciones['por_regla'][issue_info['rule']].append(issue_info)
-        
-        # Agrupar por archivo
-        archivo = issue_info['component'].split(':')[-1] if ':' in issue_info['component'] else issue_info['component']
-        agrupaciones['por_archivo'][archivo].append(issue_info)
-    
-    return agrupaciones
+    return AgrupacionesIssues(issues_data)
 
 def mostrar_resumen_agrupaciones(agrupaciones):
     """
@@ -156,25 +357,23 @@ def mostrar_resumen_agrupaciones(agrupaciones):
     
     # Resumen por severidad
     print("\n🔥 ISSUES POR SEVERIDAD:")
-    for severidad, issues in sorted(agrupaciones['por_severidad'].items()):
-        print(f"  • {severidad}: {len(issues)} issues")
+    for severidad, cantidad in sorted(agrupaciones.conteos('por_severidad').items()):
+        print(f"  • {severidad}: {cantidad} issues")
     
     # Resumen por tipo
     print("\n🏷️ ISSUES POR TIPO:")
-    for tipo, issues in sorted(agrupaciones['por_tipo'].items()):
-        print(f"  • {tipo}: {len(issues)} issues")
+    for tipo, cantidad in sorted(agrupaciones.conteos('por_tipo').items()):
+        print(f"  • {tipo}: {cantidad} issues")
     
     # Top 10 reglas más frecuentes
     print("\n📜 TOP 10 REGLAS MÁS FRECUENTES:")
-    reglas_ordenadas = sorted(agrupaciones['por_regla'].items(), key=lambda x: len(x[1]), reverse=True)
-    for i, (regla, issues) in enumerate(reglas_ordenadas[:10], 1):
-        print(f"  {i:2d}. {regla}: {len(issues)} issues")
+    for i, (regla, cantidad) in enumerate(agrupaciones.conteos('por_regla').head(10).items(), 1):
+        print(f"  {i:2d}. {regla}: {cantidad} issues")
     
     # Top 10 archivos más problemáticos
     print("\n📁 TOP 10 ARCHIVOS MÁS PROBLEMÁTICOS:")
-    archivos_ordenados = sorted(agrupaciones['por_archivo'].items(), key=lambda x: len(x[1]), reverse=True)
-    for i, (archivo, issues) in enumerate(archivos_ordenados[:10], 1):
-        print(f"  {i:2d}. {archivo}: {len(issues)} issues")
+    for i, (archivo, cantidad) in enumerate(agrupaciones.conteos('por_archivo').head(10).items(), 1):
+        print(f"  {i:2d}. {archivo}: {cantidad} issues")
 
 print("✅ Funciones de procesamiento y visualización definidas")
 
@@ -230,47 +429,189 @@ print("✅ Función de detalles definida")
 # 2. Ingresa el ProjectKey cuando se te solicite
 # 3. Espera a que se complete la extracción
 # 4. Revisa los resultados agrupados
+# 
+# **Modo lote:** para extraer toda una cohorte ejecuta el script desde la terminal:
+# `python extrae_issues.py --csv ../data/Estudiantes_2023-2024.csv --workers 8 --tasa 5`
+# 
+# Con `--incremental` solo se descargan los issues nuevos o actualizados desde la
+# última sincronización, que se guardan en `../data/issues.sqlite` (`--almacen`).
+# 
+# Con `--formato parquet` la salida se guarda en Parquet (requiere `pyarrow`), con
+# severidad, tipo, regla, estado y entrega como categorías y las fechas tipadas.
+# 
+# Con `--cache` las respuestas de la API se guardan en `../data/cache_api` y una
+# nueva ejecución solo pide lo que falte o haya caducado (`--cache-ttl`, en horas);
+# `--offline` trabaja solo con la caché, sin peticiones a la red.
+# 
+# El modo lote guarda su avance página a página en `<salida>.checkpoint/`. Si se
+# interrumpe, `--resume` vuelve a generar la salida con lo ya descargado y continúa
+# desde la última página guardada de cada proyecto.
+# 
+# `--metricas-json ejecucion.json` guarda el tiempo de cada etapa (fetch, parse,
+# group, report), las peticiones HTTP (latencias, bytes, reintentos), los contadores
+# y la memoria pico; `--progreso` muestra una línea de avance en vivo en stderr.
+
+# %%
+def parsear_argumentos(argv=None):
+    """Argumentos de línea de comandos para el modo lote"""
+    parser = argparse.ArgumentParser(description="Extracción de issues de SonarCloud")
+    parser.add_argument("--csv", help="CSV de estudiantes; activa el modo lote para toda la cohorte")
+    parser.add_argument("--workers", type=int, default=8, help="Proyectos extraídos en paralelo")
+    parser.add_argument("--tasa", type=float, default=5.0, help="Peticiones por segundo (compartidas entre workers)")
+    parser.add_argument("--salida", default="issues_cohorte.csv", help="CSV de salida del modo lote")
+    parser.add_argument("--formato", choices=["csv", "parquet"], default="csv",
+                        help="Formato de salida del modo lote (parquet requiere pyarrow)")
+    parser.add_argument("--base-url", default=SONARCLOUD_BASE_URL, help="URL base de la API de SonarCloud")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Modo lote incremental: solo pide issues nuevos o actualizados desde la última sincronización")
+    parser.add_argument("--almacen", default="../data/issues.sqlite", help="Base SQLite del modo incremental")
+    parser.add_argument("--cache", nargs="?", const=DIRECTORIO_CACHE, default=None,
+                        help=f"Guardar y reutilizar las respuestas de la API en disco (por defecto {DIRECTORIO_CACHE})")
+    parser.add_argument("--cache-ttl", type=float, default=24.0, help="Horas de validez de las respuestas en caché")
+    parser.add_argument("--cache-max-mb", type=float, default=500.0, help="Tamaño máximo de la caché en MB")
+    parser.add_argument("--offline", action="store_true", help="Servir solo desde la caché, sin acceder a la red")
+    parser.add_argument("--resume", action="store_true",
+                        help="Reanudar una extracción de cohorte interrumpida desde su punto de control")
+    parser.add_argument("--checkpoint", help="Directorio del punto de control (por defecto <salida>.checkpoint)")
+    parser.add_argument("--metricas-json", help="Guardar tiempos por etapa, peticiones HTTP y contadores en este JSON")
+    parser.add_argument("--progreso", action="store_true", help="Mostrar una línea de progreso en vivo (stderr)")
+    # parse_known_args: Jupyter añade sus propios argumentos al kernel
+    args, _ = parser.parse_known_args(argv)
+    if args.formato == "parquet" and args.salida.endswith(".csv"):
+        args.salida = args.salida[:-len(".csv")] + ".parquet"
+    if args.offline and args.cache is None:
+        args.cache = DIRECTORIO_CACHE
+    if args.checkpoint is None:
+        args.checkpoint = f"{args.salida}.checkpoint"
+    return args
+
+def crear_cache(args):
+    """CacheRespuestas según los argumentos, o None si no se pidió caché"""
+    if args.cache is None:
+        return None
+    return CacheRespuestas(args.cache, ttl=args.cache_ttl * 3600,
+                           max_bytes=int(args.cache_max_mb * 1024 ** 2), offline=args.offline)
+
+# Solo se leen argumentos al ejecutar como script o notebook (no al importar el módulo)
+ARGS = parsear_argumentos() if __name__ == "__main__" else None
+CACHE_API = crear_cache(ARGS) if ARGS is not None else None
+INSTRUMENTACION = Instrumentacion() if ARGS is not None else None
+if ARGS is not None and ARGS.progreso:
+    INSTRUMENTACION.iniciar_progreso()
 
 # %%
 # 🎯 EXTRACCIÓN PRINCIPAL
-# Solicitar ProjectKey al usuario
-project_key = input("🔑 Ingresa el ProjectKey del proyecto de SonarCloud: ").strip()
+if ARGS is not None and ARGS.csv and ARGS.incremental:
+    # Modo lote incremental: upsert en el almacén local y exportación del estado completo
+    proyectos = cargar_proyectos_csv(ARGS.csv)
+    almacen = AlmacenIssues(ARGS.almacen)
+    cambios = sincronizar_cohorte(proyectos, almacen, max_workers=ARGS.workers, tasa=ARGS.tasa,
+                                  base_url=ARGS.base_url, cache=CACHE_API, instrumentacion=INSTRUMENTACION)
+    with INSTRUMENTACION.etapa('report'):
+        df_cohorte = almacen.a_dataframe([p['project_key'] for p in proyectos])
+        almacen.cerrar()
+        if ARGS.formato == "parquet":
+            guardar_parquet(df_cohorte, ARGS.salida)
+        else:
+            df_cohorte.to_csv(ARGS.salida, index=False, encoding='utf-8-sig')
+    INSTRUMENTACION.contar('filas_exportadas', len(df_cohorte))
+    
+    actualizados = sum(v for v in cambios.values() if isinstance(v, int))
+    print(f"\n✅ Sincronización completada: {actualizados} issues nuevos o actualizados")
+    print(f"💾 Almacén: {ARGS.almacen} | Archivo generado: {ARGS.salida} ({len(df_cohorte)} issues)")
+    if CACHE_API is not None:
+        print(f"🗄️  Caché de API: {CACHE_API.estadisticas()}")
 
-if not project_key:
-    print("❌ ProjectKey no puede estar vacío")
-else:
-    print(f"\n🚀 Iniciando extracción para el proyecto: {project_key}")
-    print("-" * 60)
-    
-    # Extraer issues
-    issues_extraidos = extraer_issues_proyecto(project_key)
-    
-        # Crear DataFrame
-    df_issues = pd.DataFrame(issues_extraidos)
-    
-    # Nombre del archivo
-    nombre_archivo = f"General_issues_10.csv"
-    
-    # Guardar archivo
-    df_issues.to_csv(nombre_archivo, index=False, encoding='utf-8')
+elif ARGS is not None and ARGS.csv:
+    # Modo lote: todos los proyectos del CSV de estudiantes, escritos a disco página a página
+    proyectos = cargar_proyectos_csv(ARGS.csv)
+    punto_control = PuntoControlExtraccion(ARGS.checkpoint, reanudar=ARGS.resume)
+    if ARGS.resume:
+        previo = punto_control.resumen()
+        print(f"⏯️  Reanudando: {previo['completados']} proyectos terminados y {previo['a_medias']} a medias "
+              f"({previo['paginas']} páginas, {previo['issues']} issues guardados)")
+    clase_escritor = EscritorIssuesParquet if ARGS.formato == "parquet" else EscritorIssuesCSV
+    with clase_escritor(ARGS.salida) as escritor:
+        resultados_cohorte = extraer_issues_cohorte(proyectos, max_workers=ARGS.workers, tasa=ARGS.tasa,
+                                                    base_url=ARGS.base_url, escritor=escritor, cache=CACHE_API,
+                                                    punto_control=punto_control, instrumentacion=INSTRUMENTACION)
+    
+    fallidos = [r for r in resultados_cohorte if r['status'] != 'success']
+    print(f"\n✅ Extracción de cohorte completada: {escritor.filas} issues de {len(resultados_cohorte) - len(fallidos)} proyectos")
+    print(f"💾 Archivo generado: {ARGS.salida}")
+    if CACHE_API is not None:
+        print(f"🗄️  Caché de API: {CACHE_API.estadisticas()}")
+    if fallidos:
+        print(f"⚠️  {len(fallidos)} proyectos fallidos (no incluidos en el CSV):")
+        for r in fallidos:
+            print(f"  - {r['project_key']}: {r['error']}")
+        print(f"⏯️  Avance guardado en {ARGS.checkpoint}: repite con --resume para completar solo lo que falta")
+    else:
+        punto_control.eliminar()
+    globals()['ultimos_resultados_cohorte'] = resultados_cohorte
+    
+    if escritor.filas:
+        # Se releen solo las columnas necesarias para las agrupaciones
+        columnas = ['issue_key', 'message', 'severity', 'type', 'rule', 'component', 'line', 'status']
+        opciones = {} if ARGS.formato == "parquet" else {'encoding': 'utf-8-sig'}
+        with INSTRUMENTACION.etapa('parse'):
+            tabla_salida = leer_tabla(ARGS.salida, columnas, **opciones)
+        with INSTRUMENTACION.etapa('group'):
+            globals()['ultimas_agrupaciones'] = procesar_y_agrupar_issues(tabla_salida)
+        INSTRUMENTACION.contar('filas_agrupadas', len(tabla_salida))
+        with INSTRUMENTACION.etapa('report'):
+            mostrar_resumen_agrupaciones(ultimas_agrupaciones)
 
-    if issues_extraidos:
-        # Procesar y agrupar
-        agrupaciones = procesar_y_agrupar_issues(issues_extraidos)
-        
-        # Mostrar resumen
-        mostrar_resumen_agrupaciones(agrupaciones)
-        
-        print(f"\n✅ Extracción completada exitosamente!")
-        print(f"📊 Total de issues extraídos: {len(issues_extraidos)}")
+elif ARGS is not None:
+    # Solicitar ProjectKey al usuario
+    project_key = input("🔑 Ingresa el ProjectKey del proyecto de SonarCloud: ").strip()
+
+    if not project_key:
+        print("❌ ProjectKey no puede estar vacío")
+    else:
+        print(f"\n🚀 Iniciando extracción para el proyecto: {project_key}")
+        print("-" * 60)
         
-        # Guardar variables para uso posterior
-        globals()['ultimo_project_key'] = project_key
-        globals()['ultimos_issues'] = issues_extraidos
-        globals()['ultimas_agrupaciones'] = agrupaciones
+        # Extraer issues
+        cliente = ClienteSonarCloud(ARGS.base_url, limitador=LimitadorTasa(tasa=2.0, capacidad=1), cache=CACHE_API,
+                                    instrumentacion=INSTRUMENTACION)
+        try:
+            with INSTRUMENTACION.etapa('fetch'):
+                issues_extraidos = extraer_issues_proyecto(project_key, cliente=cliente)
+        except ErrorSonarCloud as e:
+            print(f"❌ Error: {e}")
+            issues_extraidos = []
+        INSTRUMENTACION.contar('issues', len(issues_extraidos))
         
-    else:
-        print("❌ No se pudieron extraer issues. Verifica el ProjectKey y tu conexión.")
+        # Guardar archivo (filas aplanadas, sin copia intermedia en un DataFrame)
+        nombre_archivo = f"General_issues_10.csv"
+        with INSTRUMENTACION.etapa('parse'), EscritorIssuesCSV(nombre_archivo, encoding='utf-8') as escritor:
+            escritor.escribir(issues_extraidos, {'project_key': project_key})
+
+        if issues_extraidos:
+            # Procesar y agrupar
+            with INSTRUMENTACION.etapa('group'):
+                agrupaciones = procesar_y_agrupar_issues(issues_extraidos)
+            
+            # Mostrar resumen
+            with INSTRUMENTACION.etapa('report'):
+                mostrar_resumen_agrupaciones(agrupaciones)
+            
+            print(f"\n✅ Extracción completada exitosamente!")
+            print(f"📊 Total de issues extraídos: {len(issues_extraidos)}")
+            
+            # Guardar variables para uso posterior
+            globals()['ultimo_project_key'] = project_key
+            globals()['ultimos_issues'] = issues_extraidos
+            globals()['ultimas_agrupaciones'] = agrupaciones
+            
+        else:
+            print("❌ No se pudieron extraer issues. Verifica el ProjectKey y tu conexión.")
+
+if INSTRUMENTACION is not None:
+    INSTRUMENTACION.detener_progreso()
+    if ARGS.metricas_json:
+        print(f"📈 Métricas de ejecución guardadas en: {INSTRUMENTACION.guardar(ARGS.metricas_json)}")
 
 # %% [markdown]
 # ## 🔍 Exploración Detallada
@@ -283,8 +624,7 @@ else:
 
 if 'ultimas_agrupaciones' in globals():
     print("🔥 Severidades disponibles:")
-    for severidad in sorted(ultimas_agrupaciones['por_severidad'].keys()):
-        count = len(ultimas_agrupaciones['por_severidad'][severidad])
+    for severidad, count in sorted(ultimas_agrupaciones.conteos('por_severidad').items()):
         print(f"  • {severidad} ({count} issues)")
     
     print("\n💡 Para ver detalles, ejecuta la siguiente línea cambiando 'MAJOR' por la severidad deseada:")
@@ -303,8 +643,7 @@ else:
 
 if 'ultimas_agrupaciones' in globals():
     print("🏷️ Tipos disponibles:")
-    for tipo in sorted(ultimas_agrupaciones['por_tipo'].keys()):
-        count = len(ultimas_agrupaciones['por_tipo'][tipo])
+    for tipo, count in sorted(ultimas_agrupaciones.conteos('por_tipo').items()):
         print(f"  • {tipo} ({count} issues)")
     
     print("\n💡 Para ver detalles, ejecuta la siguiente línea cambiando 'CODE_SMELL' por el tipo deseado:")
@@ -323,11 +662,10 @@ else:
 
 if 'ultimas_agrupaciones' in globals():
     print("📜 Top 15 reglas más frecuentes:")
-    reglas_ordenadas = sorted(ultimas_agrupaciones['por_regla'].items(), 
-                             key=lambda x: len(x[1]), reverse=True)
+    reglas_ordenadas = list(ultimas_agrupaciones.conteos('por_regla').items())
     
-    for i, (regla, issues) in enumerate(reglas_ordenadas[:150], 1):
-        print(f"  {i:2d}. {regla} ({len(issues)} issues)")
+    for i, (regla, count) in enumerate(reglas_ordenadas[:150], 1):
+        print(f"  {i:2d}. {regla} ({count} issues)")
     
     print("\n💡 Para ver detalles de una regla específica, copia el nombre de la regla y ejecuta:")
     print("mostrar_detalles_agrupacion(ultimas_agrupaciones, 'por_regla', 'NOMBRE_DE_LA_REGLA', 5)")
@@ -346,11 +684,10 @@ else:
 
 if 'ultimas_agrupaciones' in globals():
     print("📁 Top 15 archivos más problemáticos:")
-    archivos_ordenados = sorted(ultimas_agrupaciones['por_archivo'].items(), 
-                               key=lambda x: len(x[1]), reverse=True)
+    archivos_ordenados = list(ultimas_agrupaciones.conteos('por_archivo').items())
     
-    for i, (archivo, issues) in enumerate(archivos_ordenados[:150], 1):
-        print(f"  {i:2d}. {archivo} ({len(issues)} issues)")
+    for i, (archivo, count) in enumerate(archivos_ordenados[:150], 1):
+        print(f"  {i:2d}. {archivo} ({count} issues)")
     
     print("\n💡 Para ver detalles de un archivo específico, copia el nombre del archivo y ejecuta:")
     print("mostrar_detalles_agrupacion(ultimas_agrupaciones, 'por_archivo', 'NOMBRE_DEL_ARCHIVO', 5)")
@@ -372,41 +709,23 @@ else:
 # 💾 EXPORTAR RESULTADOS A CSV
 
 if 'ultimos_issues' in globals() and 'ultimo_project_key' in globals():
-    # Convertir issues a DataFrame
-    issues_para_csv = []
-    
-    for issue in ultimos_issues:
-        issue_data = {
-            'project_key': ultimo_project_key,
-            'issue_key': issue.get('key', ''),
-            'message': issue.get('message', ''),
-            'severity': issue.get('severity', ''),
-            'type': issue.get('type', ''),
-            'rule': issue.get('rule', ''),
-            'component': issue.get('component', ''),
-            'line': issue.get('line', ''),
-            'status': issue.get('status', ''),
-            'creation_date': issue.get('creationDate', ''),
-            'update_date': issue.get('updateDate', '')
-        }
-        issues_para_csv.append(issue_data)
-    
-    # Crear DataFrame
-    df_issues = pd.DataFrame(issues_para_csv)
+    columnas_exportacion = ['project_key', 'issue_key', 'message', 'severity', 'type', 'rule',
+                            'component', 'line', 'status', 'creation_date', 'update_date']
     
     # Nombre del archivo
     nombre_archivo = f"issues_{ultimo_project_key.replace(':', '_')}.csv"
     
-    # Guardar archivo
-    df_issues.to_csv(nombre_archivo, index=False, encoding='utf-8')
+    # Guardar archivo directamente desde la lista de issues
+    with EscritorIssuesCSV(nombre_archivo, columnas=columnas_exportacion, encoding='utf-8') as escritor:
+        escritor.escribir(ultimos_issues, {'project_key': ultimo_project_key})
     
     print(f"✅ Resultados exportados exitosamente a: {nombre_archivo}")
-    print(f"📊 Registros exportados: {len(df_issues)}")
-    print(f"📋 Columnas: {list(df_issues.columns)}")
+    print(f"📊 Registros exportados: {escritor.filas}")
+    print(f"📋 Columnas: {columnas_exportacion}")
     
     # Mostrar preview
     print("\n👀 Vista previa del archivo:")
-    print(df_issues.head())
+    print(pd.read_csv(nombre_archivo, nrows=5))
     
 else:
     print("❌ No hay datos para exportar. Primero extrae issues ejecutando la celda de extracción.")
@@ -444,4 +763,5 @@ else:
 
 # %%
 # 💾 EXPORTAR RESULTADOS A CSV
-mostrar_detalles_agrupacion(ultimas_agrupaciones, 'por_severidad', 'MAJOR', 5)
\ No newline at end of file
+if 'ultimas_agrupaciones' in globals():
+    mostrar_detalles_agrupacion(ultimas_agrupaciones, 'por_severidad', 'MAJOR', 5)
\ No newline at end of file
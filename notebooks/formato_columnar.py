@@ -0,0 +1,129 @@
+"""
+Salida columnar (Parquet) opcional para los datasets de issues y métricas
+
+Frente a los CSV (y sus variantes de separador y codificación), Parquet guarda
+tipos explícitos: las columnas categóricas (`severity`, `type`, `rule`,
+`status`, `assignment`) van codificadas como diccionario y las fechas de los
+issues como timestamps UTC. Los archivos ocupan menos y se pueden leer solo
+las columnas y filas necesarias.
+
+Requiere `pyarrow` (opcional): sin él, `PARQUET_DISPONIBLE` es False y las
+funciones de escritura lanzan ImportError con instrucciones de instalación.
+"""
+import os
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_DISPONIBLE = True
+except ImportError:
+    pa = pq = None
+    PARQUET_DISPONIBLE = False
+
+COLUMNAS_CATEGORICAS = ['severity', 'type', 'rule', 'status', 'assignment']
+COLUMNAS_FECHA = ['creation_date', 'update_date']
+COLUMNAS_ENTERAS = ['row_index', 'line']
+
+# Formato de fecha de la API de SonarCloud (p. ej. 2024-03-01T10:15:00+0000)
+FORMATO_FECHA_API = '%Y-%m-%dT%H:%M:%S%z'
+
+
+def _requerir_pyarrow():
+    if not PARQUET_DISPONIBLE:
+        raise ImportError("La salida Parquet requiere pyarrow: pip install pyarrow")
+
+
+def es_parquet(ruta: str) -> bool:
+    """True si la ruta tiene extensión de Parquet"""
+    return os.path.splitext(str(ruta))[1].lower() in ('.parquet', '.pq')
+
+
+def tipar_columnas(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Devuelve una copia con categorías y fechas tipadas
+
+    - Columnas categóricas -> dtype `category` (diccionario en Parquet)
+    - Fechas de creación/actualización -> datetime64 UTC
+    - row_index y line -> enteros con nulos (Int64)
+    """
+    df = df.copy()
+    for col in COLUMNAS_CATEGORICAS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    for col in COLUMNAS_FECHA:
+        if col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = pd.to_datetime(df[col], format=FORMATO_FECHA_API, utc=True, errors='coerce')
+    for col in COLUMNAS_ENTERAS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype('Int64')
+    return df
+
+
+def guardar_parquet(df: pd.DataFrame, ruta: str, compresion: str = 'zstd') -> str:
+    """
+    Guarda un DataFrame como Parquet con columnas tipadas
+
+    Args:
+        df (DataFrame): Datos a guardar (issues, métricas o dataset combinado)
+        ruta (str): Archivo de salida
+        compresion (str): Códec de compresión de Parquet
+
+    Returns:
+        str: Ruta del archivo generado
+    """
+    _requerir_pyarrow()
+    tipado = tipar_columnas(df)
+    # Columnas con mezcla de tipos (p. ej. IDs numéricos y texto) se guardan como texto
+    for col in tipado.columns:
+        if tipado[col].dtype == object:
+            tipado[col] = _como_texto(tipado[col])
+    tipado.to_parquet(ruta, index=False, compression=compresion)
+    return ruta
+
+
+def _como_texto(serie: pd.Series) -> pd.Series:
+    return serie.where(serie.isna(), serie.astype(str))
+
+
+def leer_tabla(ruta: str, columnas: Optional[List[str]] = None, filtros: Optional[List] = None,
+               **kwargs) -> pd.DataFrame:
+    """
+    Lee un dataset en Parquet o CSV según su extensión
+
+    Args:
+        ruta (str): Archivo (.parquet o .csv) o URL
+        columnas (list): Columnas a leer (por defecto todas)
+        filtros (list): Filtros de pyarrow, p. ej. [('assignment', '==', 'AP2')] (solo Parquet)
+        **kwargs: Argumentos adicionales para pd.read_csv
+
+    Returns:
+        DataFrame: Datos leídos
+    """
+    if es_parquet(ruta):
+        return pd.read_parquet(ruta, columns=columnas, filters=filtros)
+    if filtros:
+        raise ValueError("Los filtros solo se admiten al leer Parquet")
+    return pd.read_csv(ruta, usecols=columnas, **kwargs)
+
+
+def esquema_issues(columnas: List[str]):
+    """Esquema Arrow de las filas de issues aplanadas (ver almacen_issues.COLUMNAS_ISSUES)"""
+    _requerir_pyarrow()
+    tipos: Dict[str, object] = {
+        **{c: pa.dictionary(pa.int32(), pa.string()) for c in COLUMNAS_CATEGORICAS},
+        **{c: pa.timestamp('ms', tz='UTC') for c in COLUMNAS_FECHA},
+        **{c: pa.int64() for c in COLUMNAS_ENTERAS},
+    }
+    return pa.schema([(c, tipos.get(c, pa.string())) for c in columnas])
+
+
+def tabla_issues(filas: List[Dict], esquema) -> 'pa.Table':
+    """Convierte filas de issues aplanadas en una tabla Arrow con el esquema indicado"""
+    df = tipar_columnas(pd.DataFrame(filas, columns=esquema.names))
+    for campo in esquema:
+        if pa.types.is_string(campo.type):
+            df[campo.name] = _como_texto(df[campo.name].astype(object))
+    return pa.Table.from_pandas(df, schema=esquema, preserve_index=False, safe=False)
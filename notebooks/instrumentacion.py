@@ -0,0 +1,197 @@
+"""
+Instrumentación del pipeline: tiempos por etapa, contadores y peticiones HTTP
+
+Hasta ahora el progreso solo se veía en los `print` de cada función. Una
+`Instrumentacion` compartida por el cliente HTTP y los pasos del pipeline
+registra:
+
+- Etapas (fetch, parse, group, analyze, plot, report...): tiempo de pared
+  acumulado, número de llamadas y memoria pico del proceso al terminar
+- Peticiones HTTP por endpoint y código de estado, histograma de latencias,
+  bytes descargados, reintentos y aciertos de la caché de respuestas
+- Contadores libres (issues extraídos, filas procesadas, proyectos fallidos...)
+
+El resumen se guarda en JSON (`guardar`) y, opcionalmente, una línea de
+progreso en vivo se reescribe en stderr cada pocos segundos
+(`iniciar_progreso`). Todo es seguro entre hilos.
+
+Si una etapa se mide dentro de varios hilos a la vez (p. ej. parse por
+proyecto), su tiempo es la suma de las llamadas y puede superar al de pared.
+
+Uso:
+    instr = Instrumentacion()
+    cliente = ClienteSonarCloud(instrumentacion=instr)
+    with instr.etapa('fetch'):
+        ...
+    instr.contar('issues', len(issues))
+    instr.guardar('metricas_ejecucion.json')
+"""
+import json
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from typing import Dict, Optional, Union
+
+# Límites superiores (s) de los intervalos del histograma de latencias; el último intervalo es abierto
+LIMITES_LATENCIA = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def memoria_pico_mb() -> Optional[float]:
+    """Memoria residente máxima del proceso en MB (None si el sistema no la ofrece, p. ej. Windows)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux la expresa en KB y macOS en bytes
+    return round(pico / (1024 ** 2 if sys.platform == 'darwin' else 1024), 1)
+
+
+def etiquetas_histograma():
+    """Nombre de cada intervalo del histograma de latencias"""
+    return [f"<={limite}s" for limite in LIMITES_LATENCIA] + [f">{LIMITES_LATENCIA[-1]}s"]
+
+
+def medir_etapa(instrumentacion: Optional['Instrumentacion'], nombre: str):
+    """`instrumentacion.etapa(nombre)`, o un contexto vacío si no hay instrumentación"""
+    return instrumentacion.etapa(nombre) if instrumentacion is not None else nullcontext()
+
+
+class Instrumentacion:
+    """Registro de etapas, contadores y peticiones HTTP de una ejecución"""
+
+    def __init__(self):
+        self.inicio = datetime.now()
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+        self.etapas: Dict[str, Dict] = {}
+        self.contadores = Counter()
+        self.http: Dict[str, Dict] = {}
+        self._activas = Counter()
+        self._progreso: Optional[threading.Thread] = None
+        self._parar = threading.Event()
+
+    @contextmanager
+    def etapa(self, nombre: str):
+        """Mide el tiempo de pared del bloque y lo acumula en la etapa `nombre`"""
+        with self._lock:
+            self._activas[nombre] += 1
+        inicio = time.perf_counter()
+        try:
+            yield self
+        finally:
+            segundos = time.perf_counter() - inicio
+            memoria = memoria_pico_mb()
+            with self._lock:
+                self._activas[nombre] -= 1
+                registro = self.etapas.setdefault(nombre, {'segundos': 0.0, 'llamadas': 0, 'memoria_pico_mb': None})
+                registro['segundos'] += segundos
+                registro['llamadas'] += 1
+                registro['memoria_pico_mb'] = memoria
+
+    def contar(self, nombre: str, n: int = 1):
+        """Suma `n` al contador `nombre`"""
+        with self._lock:
+            self.contadores[nombre] += n
+
+    def registrar_peticion(self, endpoint: str, segundos: float, estado: Union[int, str], bytes_recibidos: int = 0):
+        """
+        Registra una petición HTTP (cada intento cuenta por separado)
+
+        Args:
+            endpoint (str): Ruta de la API (p. ej. 'issues/search')
+            segundos (float): Latencia de la petición
+            estado (int | str): Código HTTP, o 'error' si no hubo respuesta
+            bytes_recibidos (int): Tamaño del cuerpo de la respuesta
+        """
+        intervalo = next((i for i, limite in enumerate(LIMITES_LATENCIA) if segundos <= limite), len(LIMITES_LATENCIA))
+        with self._lock:
+            registro = self.http.setdefault(endpoint, {
+                'peticiones': 0, 'por_estado': Counter(), 'segundos': 0.0, 'max_s': 0.0,
+                'bytes': 0, 'histograma': [0] * (len(LIMITES_LATENCIA) + 1),
+            })
+            registro['peticiones'] += 1
+            registro['por_estado'][str(estado)] += 1
+            registro['segundos'] += segundos
+            registro['max_s'] = max(registro['max_s'], segundos)
+            registro['bytes'] += bytes_recibidos
+            registro['histograma'][intervalo] += 1
+
+    def _totales_http(self) -> Dict:
+        peticiones = sum(r['peticiones'] for r in self.http.values())
+        segundos = sum(r['segundos'] for r in self.http.values())
+        return {
+            'peticiones': peticiones, 'bytes': sum(r['bytes'] for r in self.http.values()),
+            'latencia_media_s': round(segundos / peticiones, 4) if peticiones else None,
+            'histograma': dict(zip(etiquetas_histograma(),
+                                   [sum(c) for c in zip(*(r['histograma'] for r in self.http.values()))]
+                                   or [0] * (len(LIMITES_LATENCIA) + 1))),
+        }
+
+    def resumen(self) -> Dict:
+        """Estado actual como diccionario serializable en JSON"""
+        with self._lock:
+            por_endpoint = {
+                endpoint: {
+                    'peticiones': r['peticiones'], 'por_estado': dict(r['por_estado']), 'bytes': r['bytes'],
+                    'latencia_media_s': round(r['segundos'] / r['peticiones'], 4), 'latencia_max_s': round(r['max_s'], 4),
+                    'histograma': dict(zip(etiquetas_histograma(), r['histograma'])),
+                }
+                for endpoint, r in self.http.items()
+            }
+            return {
+                'inicio': self.inicio.isoformat(timespec='seconds'),
+                'duracion_s': round(time.perf_counter() - self._t0, 3),
+                'memoria_pico_mb': memoria_pico_mb(),
+                'etapas': {nombre: {**r, 'segundos': round(r['segundos'], 3)} for nombre, r in self.etapas.items()},
+                'contadores': dict(self.contadores),
+                'http': {**self._totales_http(), 'reintentos': self.contadores.get('http_reintentos', 0),
+                         'por_endpoint': por_endpoint},
+            }
+
+    def guardar(self, ruta: str) -> str:
+        """Escribe el resumen en un archivo JSON"""
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump(self.resumen(), f, indent=2, ensure_ascii=False)
+        return ruta
+
+    def linea_progreso(self) -> str:
+        """Una línea con la etapa en curso, el tiempo transcurrido, las peticiones y los contadores"""
+        with self._lock:
+            activas = [nombre for nombre, n in self._activas.items() if n > 0]
+            http = self._totales_http()
+            contadores = ', '.join(f"{k}={v}" for k, v in self.contadores.items())
+        transcurrido = time.perf_counter() - self._t0
+        partes = [f"⏱️  {transcurrido:7.1f}s", f"etapa: {'+'.join(activas) or '-'}",
+                  f"{http['peticiones']} peticiones ({http['bytes'] / 1024 ** 2:.1f} MB)"]
+        if contadores:
+            partes.append(contadores)
+        return ' | '.join(partes)
+
+    def iniciar_progreso(self, intervalo: float = 2.0, flujo=None):
+        """Reescribe la línea de progreso en `flujo` (stderr por defecto) cada `intervalo` segundos"""
+        if self._progreso is not None:
+            return
+        flujo = flujo or sys.stderr
+        self._parar.clear()
+
+        def bucle():
+            while not self._parar.wait(intervalo):
+                flujo.write('\r' + self.linea_progreso().ljust(100))
+                flujo.flush()
+            flujo.write('\r' + self.linea_progreso().ljust(100) + '\n')
+            flujo.flush()
+
+        self._progreso = threading.Thread(target=bucle, daemon=True)
+        self._progreso.start()
+
+    def detener_progreso(self):
+        """Detiene la línea de progreso (escribe la última y un salto de línea)"""
+        if self._progreso is None:
+            return
+        self._parar.set()
+        self._progreso.join()
+        self._progreso = None
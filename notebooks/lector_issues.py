@@ -0,0 +1,173 @@
+"""
+Lectura por lotes de issues_detallados_*.csv (y de su versión Parquet)
+
+Cada extracción deja una copia completa de los issues, y las copias no
+comparten formato: las que llevan fecha son UTF-8 con BOM separadas por
+comas, e issues_detallados_latest.csv es Latin-1 separado por tabuladores.
+Leerlas enteras con `pd.read_csv` para agregar varios años de historial
+obliga a tener todas en memoria a la vez.
+
+`leer_issues_por_lotes` recorre un archivo en DataFrames de `tamano_lote`
+filas:
+
+- El separador y la codificación se detectan en los primeros bytes
+  (`detectar_formato_csv`) si no se indican
+- Solo se leen las columnas pedidas y las que usan los filtros; el CSV se
+  abre con `memory_map` y todo se lee como texto, así los tipos no cambian
+  de un lote a otro (row_index y line se devuelven como Int64)
+- Los filtros tienen el formato de pyarrow que ya acepta `leer_tabla`, p. ej.
+  `[('assignment', '==', 'AP2'), ('severity', 'in', ['BLOCKER', 'CRITICAL'])]`.
+  En CSV se aplican a cada lote antes de entregarlo; en Parquet los resuelve
+  pyarrow.dataset, que descarta los grupos de filas que no pueden cumplirlos
+
+`contar_issues_por_lotes` suma conteos sobre varios archivos (p. ej. issues
+por regla y entrega de todas las cohortes) con memoria constante.
+
+Uso:
+    for lote in leer_issues_por_lotes('../data/issues_detallados_latest.csv',
+                                      columnas=['project_key', 'rule'],
+                                      filtros=[('severity', 'in', ['BLOCKER', 'CRITICAL'])]):
+        ...
+    contar_issues_por_lotes(glob.glob('../data/issues_detallados_*.csv'), ['assignment', 'severity'])
+"""
+import codecs
+import os
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Union
+
+import pandas as pd
+
+from formato_columnar import COLUMNAS_ENTERAS, _requerir_pyarrow, es_parquet
+
+# Separadores candidatos; ante un empate gana el primero
+SEPARADORES = [',', '\t', ';', '|']
+BYTES_MUESTRA = 64 * 1024
+OPERADORES = ('==', '!=', 'in', 'not in')
+TAMANO_LOTE = 100_000
+
+
+class FormatoCSV(NamedTuple):
+    sep: str
+    encoding: str
+
+
+def detectar_formato_csv(ruta: str, bytes_muestra: int = BYTES_MUESTRA) -> FormatoCSV:
+    """
+    Separador y codificación de un CSV a partir de sus primeros bytes
+
+    La codificación es utf-8-sig si hay BOM, utf-8 si la muestra es UTF-8
+    válido y latin-1 en otro caso. El separador es el candidato que más se
+    repite en la cabecera (`,` si no aparece ninguno).
+    """
+    with open(ruta, 'rb') as f:
+        muestra = f.read(bytes_muestra)
+    if muestra.startswith(codecs.BOM_UTF8):
+        encoding = 'utf-8-sig'
+    else:
+        try:
+            # Decodificador incremental: un carácter cortado al final de la muestra no es un error
+            codecs.getincrementaldecoder('utf-8')().decode(muestra, final=False)
+            encoding = 'utf-8'
+        except UnicodeDecodeError:
+            encoding = 'latin-1'
+    lineas = muestra.decode(encoding, errors='replace').splitlines()
+    cabecera = lineas[0] if lineas else ''
+    sep = max(SEPARADORES, key=cabecera.count)
+    return FormatoCSV(sep if cabecera.count(sep) else ',', encoding)
+
+
+def _validar_filtros(filtros: List) -> List:
+    for filtro in filtros:
+        if len(filtro) != 3 or filtro[1] not in OPERADORES:
+            raise ValueError(f"Filtro no válido: {filtro!r} (se espera (columna, operador, valor) con operador en {OPERADORES})")
+    return filtros
+
+
+def _mascara(lote: pd.DataFrame, filtros: List) -> pd.Series:
+    # El CSV se lee como texto: los valores de los filtros se comparan como texto
+    mascara = pd.Series(True, index=lote.index)
+    for columna, operador, valor in filtros:
+        if operador in ('in', 'not in'):
+            coincide = lote[columna].isin([str(v) for v in valor])
+        else:
+            coincide = lote[columna] == str(valor)
+        mascara &= coincide.fillna(False) if operador in ('==', 'in') else ~coincide.fillna(False)
+    return mascara
+
+
+def _lotes_parquet(ruta: str, columnas: Optional[List[str]], filtros: List, tamano_lote: int) -> Iterator[pd.DataFrame]:
+    _requerir_pyarrow()
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+
+    expresion = pq.filters_to_expression(filtros) if filtros else None
+    for lote in ds.dataset(ruta, format='parquet').to_batches(columns=columnas, filter=expresion, batch_size=tamano_lote):
+        if lote.num_rows:
+            yield lote.to_pandas()
+
+
+def leer_issues_por_lotes(ruta: str, columnas: Optional[List[str]] = None, filtros: Optional[List] = None,
+                          tamano_lote: int = TAMANO_LOTE, sep: Optional[str] = None,
+                          encoding: Optional[str] = None) -> Iterator[pd.DataFrame]:
+    """
+    Recorre un archivo de issues en lotes de hasta `tamano_lote` filas
+
+    Args:
+        ruta (str): CSV (cualquier separador/codificación) o Parquet
+        columnas (list): Columnas a devolver (por defecto todas)
+        filtros (list): Tuplas (columna, operador, valor) con operador en
+            '==', '!=', 'in', 'not in'; deben cumplirse todas
+        tamano_lote (int): Filas leídas por lote (los lotes filtrados pueden tener menos)
+        sep (str): Separador del CSV (None = detectarlo)
+        encoding (str): Codificación del CSV (None = detectarla)
+
+    Yields:
+        DataFrame: Lotes no vacíos con índice 0..n-1
+    """
+    filtros = _validar_filtros(list(filtros or []))
+    if es_parquet(ruta):
+        yield from _lotes_parquet(ruta, columnas, filtros, tamano_lote)
+        return
+    local = os.path.exists(ruta)
+    if local and (sep is None or encoding is None):
+        formato = detectar_formato_csv(ruta)
+        sep, encoding = sep or formato.sep, encoding or formato.encoding
+    leer = None if columnas is None else list(dict.fromkeys([*columnas, *(f[0] for f in filtros)]))
+    with pd.read_csv(ruta, sep=sep or ',', encoding=encoding or 'utf-8-sig', usecols=leer, dtype=str,
+                     chunksize=tamano_lote, memory_map=local) as lector:
+        for lote in lector:
+            if filtros:
+                lote = lote[_mascara(lote, filtros)]
+            if columnas is not None:
+                lote = lote[list(columnas)]
+            if lote.empty:
+                continue
+            lote = lote.reset_index(drop=True)
+            for columna in COLUMNAS_ENTERAS:
+                if columna in lote.columns:
+                    lote[columna] = pd.to_numeric(lote[columna], errors='coerce').astype('Int64')
+            yield lote
+
+
+def leer_issues(ruta: str, columnas: Optional[List[str]] = None, filtros: Optional[List] = None, **kwargs) -> pd.DataFrame:
+    """Todos los lotes de `leer_issues_por_lotes` en un único DataFrame (solo las filas que cumplen los filtros)"""
+    lotes = list(leer_issues_por_lotes(ruta, columnas, filtros, **kwargs))
+    return pd.concat(lotes, ignore_index=True) if lotes else pd.DataFrame(columns=columnas)
+
+
+def contar_issues_por_lotes(rutas: Union[str, Iterable[str]], por: List[str], filtros: Optional[List] = None,
+                            tamano_lote: int = TAMANO_LOTE) -> pd.Series:
+    """
+    Número de issues por combinación de las columnas `por`, sumado sobre uno o varios archivos
+
+    Cada archivo se recorre por lotes, así que la memoria depende del número
+    de grupos y no del de issues. Un issue presente en varias copias cuenta
+    una vez por copia.
+    """
+    total = None
+    for ruta in [rutas] if isinstance(rutas, str) else rutas:
+        for lote in leer_issues_por_lotes(ruta, por, filtros, tamano_lote):
+            conteo = lote.groupby(por, dropna=False, observed=True).size()
+            total = conteo if total is None else total.add(conteo, fill_value=0)
+    if total is None:
+        return pd.Series(dtype='int64', name='issues')
+    return total.astype('int64').sort_index().rename('issues')
@@ -0,0 +1,129 @@
+"""
+Obtención de medidas de SonarCloud en lote
+
+`fetch_project_metrics` hacía una petición a /api/measures/component por
+proyecto. Aquí se aprovechan los endpoints de la API que devuelven medidas de
+muchos componentes a la vez:
+
+- /api/measures/search: medidas de hasta 100 proyectos en una sola petición
+  (`projectKeys`); el resultado se reparte después por proyecto
+- /api/measures/component_tree: medidas por archivo de un proyecto, paginadas
+  (500 componentes por página), para unirlas con la columna `component` de
+  los issues
+
+Los proyectos que /api/measures/search no devuelve (inexistentes, sin
+permiso o sin análisis) simplemente no aparecen en el resultado; quien llama
+decide si los consulta uno a uno para conocer el motivo.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional
+
+import pandas as pd
+
+from sonarcloud_cliente import ErrorSonarCloud
+
+logger = logging.getLogger(__name__)
+
+# Máximo de proyectos por petición que admite /api/measures/search
+MAX_PROYECTOS_BUSQUEDA = 100
+
+# Columnas fijas de las medidas por archivo (después van las métricas)
+COLUMNAS_ARCHIVO = ['project_key', 'component', 'path', 'language']
+
+
+def dividir_lotes(claves: List[str], tamano: int = MAX_PROYECTOS_BUSQUEDA) -> List[List[str]]:
+    """Claves únicas (en orden de aparición) agrupadas en lotes de `tamano`"""
+    unicas = list(dict.fromkeys(claves))
+    return [unicas[i:i + tamano] for i in range(0, len(unicas), tamano)]
+
+
+def params_busqueda(lote: List[str], metricas: List[str]) -> Dict:
+    """Parámetros de /api/measures/search para un lote de proyectos"""
+    return {'projectKeys': ','.join(lote), 'metricKeys': ','.join(metricas)}
+
+
+def obtener_medidas_lote(cliente, claves: List[str], metricas: List[str],
+                         tamano_lote: int = MAX_PROYECTOS_BUSQUEDA) -> Dict[str, Dict[str, Optional[str]]]:
+    """
+    Medidas de muchos proyectos con una petición por lote
+
+    Un lote que falla (p. ej. HTTP 400 por una clave mal formada) se registra
+    y sus proyectos quedan fuera del resultado, igual que los que la API no
+    devuelve.
+
+    Args:
+        cliente (ClienteSonarCloud): Cliente HTTP a utilizar
+        claves (list): project_key de los proyectos (se ignoran los duplicados)
+        metricas (list): Métricas a pedir
+        tamano_lote (int): Proyectos por petición (100 como máximo)
+
+    Returns:
+        dict: project_key -> {métrica: valor como texto, o None si el proyecto no la tiene}
+    """
+    if tamano_lote > MAX_PROYECTOS_BUSQUEDA:
+        raise ValueError(f"/api/measures/search admite como máximo {MAX_PROYECTOS_BUSQUEDA} proyectos por petición")
+
+    medidas = {}
+    for lote in dividir_lotes(claves, tamano_lote):
+        try:
+            data = cliente.get('measures/search', params_busqueda(lote, metricas))
+        except ErrorSonarCloud as e:
+            logger.warning(f"Lote de {len(lote)} proyectos sin medidas en bloque: {e}")
+            continue
+        for medida in data.get('measures', []):
+            proyecto = medidas.setdefault(medida['component'], dict.fromkeys(metricas))
+            proyecto[medida['metric']] = medida.get('value')
+    return medidas
+
+
+def recorrer_medidas_archivos(cliente, project_key: str, metricas: List[str], qualifiers: str = 'FIL',
+                              page_size: int = 500) -> Iterator[Dict]:
+    """
+    Medidas por archivo de un proyecto (/api/measures/component_tree, paginado)
+
+    Args:
+        cliente (ClienteSonarCloud): Cliente HTTP a utilizar
+        project_key (str): Proyecto a recorrer
+        metricas (list): Métricas a pedir
+        qualifiers (str): Tipos de componente (FIL = archivos, UTS = archivos de test)
+        page_size (int): Componentes por página (500 es el máximo)
+
+    Yields:
+        dict: project_key, component, path, language y una clave por métrica
+    """
+    params = {'component': project_key, 'metricKeys': ','.join(metricas),
+              'qualifiers': qualifiers, 'strategy': 'leaves'}
+    for componentes in cliente.paginar('measures/component_tree', params, clave='components', page_size=page_size):
+        for componente in componentes:
+            fila = {'project_key': project_key, 'component': componente['key'],
+                    'path': componente.get('path'), 'language': componente.get('language'),
+                    **dict.fromkeys(metricas)}
+            fila.update({m['metric']: m.get('value') for m in componente.get('measures', [])})
+            yield fila
+
+
+def medidas_archivos(cliente, claves: List[str], metricas: List[str], max_workers: int = 4,
+                     **kwargs) -> pd.DataFrame:
+    """
+    Medidas por archivo de varios proyectos, recorridos en paralelo
+
+    Los proyectos que fallan se registran y se omiten.
+
+    Returns:
+        DataFrame: Una fila por archivo (COLUMNAS_ARCHIVO + métricas numéricas);
+            `component` coincide con la columna del mismo nombre de los issues
+    """
+    def uno(clave):
+        try:
+            return list(recorrer_medidas_archivos(cliente, clave, metricas, **kwargs))
+        except ErrorSonarCloud as e:
+            logger.warning(f"Sin medidas por archivo para {clave}: {e}")
+            return []
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        filas = [fila for filas_proyecto in pool.map(uno, list(dict.fromkeys(claves))) for fila in filas_proyecto]
+
+    df = pd.DataFrame(filas, columns=COLUMNAS_ARCHIVO + list(metricas))
+    df[list(metricas)] = df[list(metricas)].apply(pd.to_numeric, errors='coerce')
+    return df
@@ -0,0 +1,274 @@
+"""
+Representación compacta en memoria de colecciones de issues
+
+Cada issue de la API es un diccionario completo (con `flows`, `textRange`,
+`impacts`...) y las filas aplanadas repiten miles de veces las mismas
+cadenas (regla, severidad, componente, prefijo del proyecto...). Para
+mantener en un solo proceso historiales de varias cohortes, ColeccionIssues
+guarda solo los campos de issues_detallados_*.csv en columnas respaldadas
+por `array`:
+
+- Los textos repetidos (regla, severidad, tipo, mensaje, estado, fechas,
+  esfuerzo, deuda y etiquetas) se codifican como diccionario: cada valor
+  distinto se guarda una vez y cada issue ocupa un entero de 4 bytes
+- `component` se separa una sola vez en proyecto y archivo, ambos codificados
+- Los datos del estudiante y la entrega se guardan una vez por proyecto
+- Solo `issue_key` (único por issue) y `line` se guardan por fila
+
+Las filas se reconstruyen bajo demanda con el formato de aplanar_issue, y
+a_dataframe() genera el DataFrame de issues_detallados_*.csv sin pasar por
+diccionarios intermedios.
+"""
+import sys
+import threading
+from array import array
+from collections.abc import Sequence
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from almacen_issues import COLUMNAS_ISSUES
+
+# Datos de la fila del CSV de estudiantes y la entrega (uno por proyecto)
+CAMPOS_PROYECTO = ['student_id', 'nombre', 'assignment', 'row_index', 'project_key']
+
+# Campos de texto codificados como diccionario: columna -> campo de la API
+CAMPOS_CODIFICADOS = {
+    'rule': 'rule', 'severity': 'severity', 'type': 'type', 'message': 'message', 'status': 'status',
+    'creation_date': 'creationDate', 'update_date': 'updateDate', 'effort': 'effort', 'debt': 'debt',
+}
+
+# Código de archivo de los componentes sin separador "proyecto:ruta"
+SIN_ARCHIVO = -1
+
+# Línea ausente (None) en la columna de enteros
+LINEA_NULA = -2 ** 63
+
+
+class Diccionario:
+    """Valores distintos de una columna de texto y su código (orden de primera aparición)"""
+
+    __slots__ = ('valores', '_codigos')
+
+    def __init__(self):
+        self.valores: List[str] = []
+        self._codigos: Dict[str, int] = {}
+
+    def codigo(self, valor) -> int:
+        codigo = self._codigos.get(valor)
+        if codigo is None:
+            codigo = len(self.valores)
+            if isinstance(valor, str):
+                valor = sys.intern(valor)
+            self._codigos[valor] = codigo
+            self.valores.append(valor)
+        return codigo
+
+    def __len__(self):
+        return len(self.valores)
+
+
+def _separar_componente(componente: str):
+    # "org_proyecto:src/Archivo.cs" -> ("org_proyecto", "src/Archivo.cs"); sin ':' no hay archivo
+    prefijo, separador, archivo = componente.partition(':')
+    return prefijo, (archivo if separador else None)
+
+
+class ColeccionIssues(Sequence):
+    """
+    Issues de uno o varios proyectos en columnas compactas
+
+    Segura entre hilos para añadir; los issues de cada llamada a agregar()
+    quedan contiguos y se pueden consultar con la vista que devuelve.
+    Se recorre como una secuencia de filas con el formato de aplanar_issue.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._proyectos: List[tuple] = []
+        self._codigo_proyecto: Dict[tuple, int] = {}
+        self._diccionarios = {campo: Diccionario() for campo in (*CAMPOS_CODIFICADOS, 'tags', 'prefijo', 'archivo')}
+        self._columnas = {campo: array('i') for campo in (*CAMPOS_CODIFICADOS, 'tags', 'prefijo', 'archivo', 'proyecto')}
+        self._claves: List[str] = []
+        self._lineas = array('q')
+
+    def __len__(self):
+        return len(self._claves)
+
+    def _codigo_de_proyecto(self, proyecto: Dict) -> int:
+        datos = tuple(proyecto.get(campo, '') for campo in CAMPOS_PROYECTO)
+        codigo = self._codigo_proyecto.get(datos)
+        if codigo is None:
+            codigo = self._codigo_proyecto[datos] = len(self._proyectos)
+            self._proyectos.append(datos)
+        return codigo
+
+    def _agregar_fila(self, proyecto: int, clave: str, componente: str, linea, tags: str, valores: Dict):
+        # Requiere tener el lock
+        columnas, diccionarios = self._columnas, self._diccionarios
+        columnas['proyecto'].append(proyecto)
+        for campo, valor in valores.items():
+            columnas[campo].append(diccionarios[campo].codigo(valor))
+        columnas['tags'].append(diccionarios['tags'].codigo(tags))
+        prefijo, archivo = _separar_componente(componente)
+        columnas['prefijo'].append(diccionarios['prefijo'].codigo(prefijo))
+        columnas['archivo'].append(SIN_ARCHIVO if archivo is None else diccionarios['archivo'].codigo(archivo))
+        self._lineas.append(LINEA_NULA if linea is None else int(linea))
+        self._claves.append(clave)
+
+    def agregar(self, issues: Iterable[Dict], proyecto: Dict) -> 'VistaIssues':
+        """
+        Añade issues tal como los devuelve /api/issues/search
+
+        Args:
+            issues (iterable): Issues de la API (se descartan los campos no usados)
+            proyecto (dict): Datos del proyecto (student_id, nombre, assignment, row_index, project_key)
+
+        Returns:
+            VistaIssues: Vista sobre los issues añadidos
+        """
+        with self._lock:
+            inicio = len(self)
+            codigo = self._codigo_de_proyecto(proyecto)
+            for issue in issues:
+                self._agregar_fila(
+                    codigo, issue.get('key', ''), issue.get('component', ''), issue.get('line', 0),
+                    ','.join(issue.get('tags', [])) if issue.get('tags') else '',
+                    {campo: issue.get(campo_api, '') for campo, campo_api in CAMPOS_CODIFICADOS.items()})
+            return VistaIssues(self, inicio, len(self))
+
+    def agregar_filas(self, filas: Iterable[Dict]) -> 'VistaIssues':
+        """Añade filas aplanadas (formato de aplanar_issue o de issues_detallados_*.csv)"""
+        with self._lock:
+            inicio = len(self)
+            for fila in filas:
+                self._agregar_fila(
+                    self._codigo_de_proyecto(fila), fila['issue_key'], fila['component'], fila['line'],
+                    fila['tags'], {campo: fila[campo] for campo in CAMPOS_CODIFICADOS})
+            return VistaIssues(self, inicio, len(self))
+
+    @classmethod
+    def desde_dataframe(cls, df: pd.DataFrame) -> 'ColeccionIssues':
+        """Colección a partir de un DataFrame con el formato de issues_detallados_*.csv"""
+        coleccion = cls()
+        df = df.reindex(columns=COLUMNAS_ISSUES).astype(object)
+        df = df.where(df.notna(), '')
+        df['line'] = df['line'].where(df['line'] != '', None)
+        coleccion.agregar_filas(df.to_dict('records'))
+        return coleccion
+
+    def _componente(self, i: int) -> str:
+        prefijo = self._diccionarios['prefijo'].valores[self._columnas['prefijo'][i]]
+        archivo = self._columnas['archivo'][i]
+        return prefijo if archivo == SIN_ARCHIVO else f"{prefijo}:{self._diccionarios['archivo'].valores[archivo]}"
+
+    def fila(self, i: int) -> Dict:
+        """Issue i con el formato de aplanar_issue"""
+        fila = dict(zip(CAMPOS_PROYECTO, self._proyectos[self._columnas['proyecto'][i]]))
+        fila['issue_key'] = self._claves[i]
+        for campo in CAMPOS_CODIFICADOS:
+            fila[campo] = self._diccionarios[campo].valores[self._columnas[campo][i]]
+        linea = self._lineas[i]
+        fila.update(component=self._componente(i), line=None if linea == LINEA_NULA else linea,
+                    tags=self._diccionarios['tags'].valores[self._columnas['tags'][i]])
+        return {columna: fila[columna] for columna in COLUMNAS_ISSUES}
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return [self.fila(i) for i in range(*indice.indices(len(self)))]
+        if indice < 0:
+            indice += len(self)
+        if not 0 <= indice < len(self):
+            raise IndexError(indice)
+        return self.fila(indice)
+
+    def a_dataframe(self, inicio: int = 0, fin: Optional[int] = None, categorias: bool = False) -> pd.DataFrame:
+        """
+        Issues [inicio, fin) con el formato de issues_detallados_*.csv
+
+        Args:
+            inicio (int): Primera fila
+            fin (int): Fila siguiente a la última (por defecto, hasta el final)
+            categorias (bool): Devolver los campos codificados como `category` en lugar de texto
+
+        Returns:
+            DataFrame: Columnas COLUMNAS_ISSUES
+        """
+        with self._lock:
+            fin = len(self) if fin is None else fin
+            # Slicing de array copia solo el rango (el búfer original sigue admitiendo append)
+            codigos = {campo: np.frombuffer(columna[inicio:fin], dtype=np.int32)
+                       for campo, columna in self._columnas.items()}
+            lineas = np.frombuffer(self._lineas[inicio:fin], dtype=np.int64)
+            vocabularios = {campo: list(d.valores) for campo, d in self._diccionarios.items()}
+            proyectos = list(self._proyectos)
+            claves = self._claves[inicio:fin]
+
+        def decodificar(campo):
+            if categorias:
+                return pd.Categorical.from_codes(codigos[campo], categories=vocabularios[campo])
+            return np.asarray(vocabularios[campo], dtype=object)[codigos[campo]]
+
+        datos = {}
+        for j, campo in enumerate(CAMPOS_PROYECTO):
+            datos[campo] = np.asarray([p[j] for p in proyectos], dtype=object)[codigos['proyecto']]
+        datos['issue_key'] = claves
+        for campo in CAMPOS_CODIFICADOS:
+            datos[campo] = decodificar(campo)
+        prefijos = np.asarray(vocabularios['prefijo'], dtype=object)[codigos['prefijo']]
+        archivos = np.asarray(vocabularios['archivo'] + [None], dtype=object)[codigos['archivo']]
+        datos['component'] = [p if a is None else f"{p}:{a}" for p, a in zip(prefijos, archivos)]
+        nulas = lineas == LINEA_NULA
+        datos['line'] = np.where(nulas, np.nan, lineas) if nulas.any() else lineas
+        datos['tags'] = decodificar('tags')
+
+        df = pd.DataFrame(datos, columns=COLUMNAS_ISSUES)
+        columnas_texto = [c for c in df.columns if df[c].dtype == object]
+        df[columnas_texto] = df[columnas_texto].infer_objects()
+        return df
+
+    def memoria(self) -> Dict[str, int]:
+        """Bytes aproximados ocupados por columnas, diccionarios y claves"""
+        columnas = sum(c.itemsize * len(c) for c in self._columnas.values()) + self._lineas.itemsize * len(self._lineas)
+        diccionarios = sum(sys.getsizeof(v) for d in self._diccionarios.values() for v in d.valores)
+        claves = sys.getsizeof(self._claves) + sum(sys.getsizeof(c) for c in self._claves)
+        return {'columnas': columnas, 'diccionarios': diccionarios, 'claves': claves,
+                'total': columnas + diccionarios + claves}
+
+    def resumen_diccionarios(self) -> Dict[str, int]:
+        """Número de valores distintos de cada campo codificado"""
+        return {campo: len(diccionario) for campo, diccionario in self._diccionarios.items()}
+
+
+class VistaIssues(Sequence):
+    """Issues contiguos de una ColeccionIssues (p. ej. los de un proyecto), sin copiarlos"""
+
+    def __init__(self, coleccion: ColeccionIssues, inicio: int, fin: int):
+        self.coleccion = coleccion
+        self.inicio = inicio
+        self.fin = fin
+
+    def __len__(self):
+        return self.fin - self.inicio
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return [self.coleccion.fila(self.inicio + i) for i in range(*indice.indices(len(self)))]
+        if indice < 0:
+            indice += len(self)
+        if not 0 <= indice < len(self):
+            raise IndexError(indice)
+        return self.coleccion.fila(self.inicio + indice)
+
+    def a_dataframe(self, categorias: bool = False) -> pd.DataFrame:
+        """Issues de la vista con el formato de issues_detallados_*.csv"""
+        return self.coleccion.a_dataframe(self.inicio, self.fin, categorias=categorias)
+
+
+def vistas_a_dataframe(vistas: Iterable[VistaIssues], categorias: bool = False) -> pd.DataFrame:
+    """Issues de varias vistas (p. ej. los proyectos correctos de una cohorte) en un solo DataFrame"""
+    partes = [vista.a_dataframe(categorias=categorias) for vista in vistas if len(vista)]
+    if not partes:
+        return pd.DataFrame(columns=COLUMNAS_ISSUES)
+    return pd.concat(partes, ignore_index=True)
@@ -0,0 +1,511 @@
+"""
+Panel HTTP local sobre los resultados del análisis
+
+Los resultados solo se consultaban en los Markdown y PNG de `outputs/`, que
+se regeneran completos en cada ejecución. Este servidor carga una sola vez
+el dataset de estudiantes con métricas, los CSV resultados_*.csv y
+(opcionalmente) el archivo de issues, y responde consultas en JSON:
+
+- /api/resultados/<tabla>        Filas de resultados_<tabla>.csv (metricas, metricas_fdr,
+                                 metricas_por_Semestre, issues, medidas_repetidas...).
+                                 Cualquier parámetro con nombre de columna filtra por igualdad;
+                                 además significativas=1, orden=<columna> y limite=N
+- /api/agrupaciones/<nombre>     Issues por grupo de la cohorte (por_severidad, por_tipo,
+                                 por_regla, por_archivo); assignment=AP1 y limite=N
+- /api/estudiantes               Estudiantes (row_index, datos básicos y número de issues)
+- /api/estudiantes/<row_index>   Métricas AP1/AP2 del estudiante e issues por severidad y tipo
+- /api/estudiantes/<row_index>/issues?agrupacion=por_regla&grupo=...&max=10
+                                 Detalle de un grupo de issues del estudiante (la vista de
+                                 mostrar_detalles_agrupacion); sin grupo, los grupos disponibles
+- /figuras/<metrica>.png         Boxplot AP1 vs AP2 con las líneas de cada estudiante, dibujado
+                                 al pedirlo; columna=Semestre&valor=... lo restringe a un subgrupo
+- /api/estado                    Tiempos de carga y aciertos/fallos de la caché
+- POST /api/recargar             Vuelve a leer los archivos y vacía la caché
+
+Las respuestas correctas se guardan en una caché LRU en memoria (por ruta y
+parámetros normalizados), así que repetir una consulta o una figura no
+vuelve a calcular nada. Los datos no cambian mientras el servidor está en
+marcha; POST /api/recargar carga una copia nueva y la sustituye (junto con el
+vaciado de la caché) de una vez, sin que las consultas en curso mezclen datos.
+
+Uso:
+    python panel_resultados.py --dataset ../data/Estudiantes_2023-2024_con_metricas_sonarcloud.csv \\
+        --resultados ../outputs --issues ../data/issues_detallados_latest.csv --puerto 8050
+
+    with ServidorPanel(DatosPanel(dataset, '../outputs', issues), puerto=0) as servidor:
+        urllib.request.urlopen(servidor.url + '/api/resultados/metricas_fdr?significativas=1')
+"""
+import argparse
+import glob
+import io
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlparse
+
+import numpy as np
+import pandas as pd
+
+from agrupaciones_issues import DIMENSIONES, AgrupacionesIssues
+from cache_respuestas import normalizar_params
+from formato_columnar import leer_tabla
+from lector_issues import leer_issues
+
+# Columnas de issues que necesita el panel (las de agrupaciones_issues más el enlace con el estudiante)
+COLUMNAS_PANEL = ['row_index', 'assignment', 'project_key', 'issue_key', 'rule', 'severity', 'type', 'message',
+                  'component', 'line', 'status']
+
+# Datos del estudiante que se muestran (el resto de columnas no numéricas, como Email, no se publican)
+CAMPOS_ESTUDIANTE = ['Id', 'Semestre', 'Estudiante', 'Sexo', 'Sonar_Ap1', 'Sonar_Ap2']
+
+COLUMNA_ENTREGA = re.compile(r'^(?P<metrica>.+)_(?P<entrega>AP\d+)$')
+
+TIPO_JSON = 'application/json; charset=utf-8'
+
+
+class ErrorConsulta(Exception):
+    """Consulta no válida o recurso inexistente (se responde con `codigo` y el mensaje en JSON)"""
+
+    def __init__(self, codigo: int, mensaje: str, **detalles):
+        super().__init__(mensaje)
+        self.codigo = codigo
+        self.detalles = {'error': mensaje, **detalles}
+
+
+class CacheLRU:
+    """
+    Caché en memoria de respuestas ya generadas, expulsando las usadas hace más tiempo
+
+    Segura entre hilos. Se limita por número de entradas y por bytes.
+    """
+
+    def __init__(self, max_entradas: int = 256, max_bytes: int = 64 * 1024 ** 2):
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self.aciertos = 0
+        self.fallos = 0
+        self._lock = threading.Lock()
+        self._entradas: 'OrderedDict[Tuple, Tuple[str, bytes]]' = OrderedDict()
+        self._bytes = 0
+
+    def obtener(self, clave: Tuple) -> Optional[Tuple[str, bytes]]:
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                self.fallos += 1
+                return None
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return entrada
+
+    def guardar(self, clave: Tuple, tipo: str, cuerpo: bytes):
+        with self._lock:
+            if clave in self._entradas:
+                self._bytes -= len(self._entradas.pop(clave)[1])
+            self._entradas[clave] = (tipo, cuerpo)
+            self._bytes += len(cuerpo)
+            while self._entradas and (len(self._entradas) > self.max_entradas or self._bytes > self.max_bytes):
+                _, (_, expulsado) = self._entradas.popitem(last=False)
+                self._bytes -= len(expulsado)
+
+    def vaciar(self):
+        with self._lock:
+            self._entradas.clear()
+            self._bytes = 0
+
+    def estado(self) -> Dict:
+        with self._lock:
+            return {'entradas': len(self._entradas), 'bytes': self._bytes, 'aciertos': self.aciertos,
+                    'fallos': self.fallos, 'max_entradas': self.max_entradas, 'max_bytes': self.max_bytes}
+
+
+def _registros(df: pd.DataFrame) -> List[Dict]:
+    # NaN / NA -> None para que el JSON sea válido
+    return df.astype(object).where(df.notna(), None).to_dict('records')
+
+
+def _escalar(valor):
+    # Escalares de numpy a Python y NaN / NA -> None (json.dumps escribiría NaN, que no es JSON válido)
+    if pd.isna(valor):
+        return None
+    return valor.item() if isinstance(valor, np.generic) else valor
+
+
+def _json_por_defecto(valor):
+    if isinstance(valor, np.generic):
+        valor = valor.item()
+        return None if isinstance(valor, float) and math.isnan(valor) else valor
+    if valor is pd.NA:
+        return None
+    raise TypeError(f"{type(valor).__name__} no es serializable en JSON")
+
+
+def a_json(datos) -> bytes:
+    return json.dumps(datos, ensure_ascii=False, default=_json_por_defecto).encode('utf-8')
+
+
+class DatosPanel:
+    """
+    Datos que sirve el panel, cargados una vez
+
+    Args:
+        dataset (str): CSV/Parquet de estudiantes con columnas {metrica}_AP1/_AP2
+        resultados (str): Directorio con los resultados_*.csv de 6_Analisis_Metricas_de_Calidad.py
+        issues (str): Archivo de issues (issues_detallados_*.csv o .parquet), opcional
+    """
+
+    def __init__(self, dataset: str, resultados: str = '../outputs', issues: Optional[str] = None):
+        self.rutas = {'dataset': dataset, 'resultados': resultados, 'issues': issues}
+        self.cargar()
+
+    def cargar(self):
+        tiempos = {}
+        inicio = time.perf_counter()
+        self.estudiantes = leer_tabla(self.rutas['dataset'])
+        self.metricas = [m for m, entregas in self._entregas().items() if len(entregas) >= 2]
+        tiempos['dataset_s'] = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        self.resultados: Dict[str, pd.DataFrame] = {}
+        for ruta in sorted(glob.glob(os.path.join(self.rutas['resultados'], 'resultados_*.csv'))):
+            nombre = os.path.basename(ruta)[len('resultados_'):-len('.csv')]
+            self.resultados[nombre] = pd.read_csv(ruta)
+        tiempos['resultados_s'] = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        self.issues = pd.DataFrame(columns=COLUMNAS_PANEL)
+        if self.rutas['issues']:
+            self.issues = leer_issues(self.rutas['issues'], COLUMNAS_PANEL)
+        # Posiciones de los issues de cada estudiante (row_index = fila del dataset)
+        self._issues_estudiante = self.issues.groupby('row_index', sort=False).indices if len(self.issues) else {}
+        self.agrupaciones = AgrupacionesIssues(self.issues)
+        tiempos['issues_s'] = time.perf_counter() - inicio
+        self.tiempos_carga = {k: round(v, 3) for k, v in tiempos.items()}
+
+    def _entregas(self) -> Dict[str, List[str]]:
+        entregas: Dict[str, List[str]] = {}
+        for columna in self.estudiantes.columns:
+            coincide = COLUMNA_ENTREGA.match(columna)
+            if coincide:
+                entregas.setdefault(coincide['metrica'], []).append(coincide['entrega'])
+        return entregas
+
+    def issues_estudiante(self, fila: int) -> pd.DataFrame:
+        return self.issues.iloc[self._issues_estudiante.get(fila, [])]
+
+    def fila_estudiante(self, fila: int) -> pd.Series:
+        if not 0 <= fila < len(self.estudiantes):
+            raise ErrorConsulta(404, f"Estudiante {fila} no encontrado", estudiantes=len(self.estudiantes))
+        return self.estudiantes.iloc[fila]
+
+
+def _entero(params: Dict[str, str], nombre: str, defecto: Optional[int]) -> Optional[int]:
+    if nombre not in params:
+        return defecto
+    try:
+        return int(params[nombre])
+    except ValueError:
+        raise ErrorConsulta(400, f"'{nombre}' debe ser un entero")
+
+
+def _filtrar(df: pd.DataFrame, params: Dict[str, str]) -> pd.DataFrame:
+    # Parámetros con nombre de columna: igualdad (comparada como texto, como llega en la URL)
+    for columna, valor in params.items():
+        if columna in df.columns:
+            df = df[df[columna].astype(str) == valor]
+    return df
+
+
+def _agrupacion(agrupaciones: AgrupacionesIssues, nombre: str):
+    if nombre not in DIMENSIONES:
+        raise ErrorConsulta(404, f"Tipo de agrupación '{nombre}' no encontrado", disponibles=list(DIMENSIONES))
+    return agrupaciones[nombre]
+
+
+def _conteos(agrupacion, limite: Optional[int]) -> Dict[str, int]:
+    conteos = agrupacion.conteos()
+    return {str(k): int(v) for k, v in (conteos.head(limite) if limite else conteos).items()}
+
+
+class Panel:
+    """Rutas del panel: cada una devuelve (tipo de contenido, cuerpo) o lanza ErrorConsulta"""
+
+    def __init__(self, datos: DatosPanel, cache: Optional[CacheLRU] = None):
+        self.datos = datos
+        self.cache = cache if cache is not None else CacheLRU()
+        self._lock_figuras = threading.Lock()
+        # Protege el cambio de datos: cada consulta usa los datos vigentes al empezar y su respuesta
+        # solo se guarda en la caché si siguen vigentes al terminar
+        self._lock_datos = threading.Lock()
+        self._version = 0
+
+    def responder(self, ruta: str, params: Dict[str, str]) -> Tuple[str, bytes, bool]:
+        """(tipo, cuerpo, desde_cache) de una consulta GET"""
+        if ruta == '/api/recargar':
+            raise ErrorConsulta(405, "/api/recargar requiere POST")
+        if ruta == '/api/estado':
+            return TIPO_JSON, a_json(self.estado()), False
+        clave = (ruta, tuple(normalizar_params(params).items()))
+        guardada = self.cache.obtener(clave)
+        if guardada is not None:
+            return guardada[0], guardada[1], True
+        with self._lock_datos:
+            datos, version = self.datos, self._version
+        tipo, cuerpo = self._generar(datos, ruta, params)
+        with self._lock_datos:
+            if version == self._version:
+                self.cache.guardar(clave, tipo, cuerpo)
+        return tipo, cuerpo, False
+
+    def recargar(self) -> Dict:
+        """Vuelve a leer los archivos y sustituye los datos y la caché de una vez"""
+        nuevos = DatosPanel(**self.datos.rutas)
+        with self._lock_datos:
+            self.datos = nuevos
+            self._version += 1
+            self.cache.vaciar()
+        return self.estado()
+
+    def estado(self) -> Dict:
+        datos = self.datos
+        return {'carga': datos.tiempos_carga, 'cache': self.cache.estado(),
+                'tablas': sorted(datos.resultados), 'estudiantes': len(datos.estudiantes),
+                'issues': len(datos.issues), 'metricas': datos.metricas}
+
+    def _generar(self, datos: DatosPanel, ruta: str, params: Dict[str, str]) -> Tuple[str, bytes]:
+        partes = [unquote(p) for p in ruta.strip('/').split('/')]
+        if partes == ['']:
+            return 'text/html; charset=utf-8', self._indice(datos)
+        if partes[0] == 'figuras' and len(partes) == 2 and partes[1].endswith('.png'):
+            return 'image/png', self.figura(datos, partes[1][:-len('.png')], params)
+        if partes[0] != 'api' or len(partes) < 2:
+            raise ErrorConsulta(404, f"Ruta no encontrada: {ruta}")
+        if partes[1] == 'resultados' and len(partes) == 3:
+            return TIPO_JSON, a_json(self.resultados(datos, partes[2], params))
+        if partes[1] == 'agrupaciones' and len(partes) == 3:
+            return TIPO_JSON, a_json(self.agrupacion_cohorte(datos, partes[2], params))
+        if partes[1] == 'estudiantes':
+            if len(partes) == 2:
+                return TIPO_JSON, a_json(self.lista_estudiantes(datos))
+            fila = _entero({'row_index': partes[2]}, 'row_index', None)
+            if len(partes) == 3:
+                return TIPO_JSON, a_json(self.estudiante(datos, fila))
+            if len(partes) == 4 and partes[3] == 'issues':
+                return TIPO_JSON, a_json(self.detalle_issues(datos, fila, params))
+        raise ErrorConsulta(404, f"Ruta no encontrada: {ruta}")
+
+    def resultados(self, datos: DatosPanel, tabla: str, params: Dict[str, str]) -> Dict:
+        if tabla not in datos.resultados:
+            raise ErrorConsulta(404, f"Tabla '{tabla}' no encontrada", disponibles=sorted(datos.resultados))
+        df = _filtrar(datos.resultados[tabla], params)
+        if params.get('significativas') in ('1', 'true', 'si') and 'significant_fdr' in df.columns:
+            df = df[df['significant_fdr'].astype(str) == 'True']
+        orden = params.get('orden')
+        if orden:
+            if orden not in df.columns:
+                raise ErrorConsulta(400, f"Columna de orden '{orden}' no encontrada")
+            df = df.sort_values(orden, kind='stable')
+        total = len(df)
+        limite = _entero(params, 'limite', None)
+        return {'tabla': tabla, 'total': total, 'filas': _registros(df.head(limite) if limite else df)}
+
+    def agrupacion_cohorte(self, datos: DatosPanel, nombre: str, params: Dict[str, str]) -> Dict:
+        agrupaciones = datos.agrupaciones
+        if 'assignment' in params:
+            agrupaciones = AgrupacionesIssues(datos.issues[datos.issues['assignment'] == params['assignment']])
+        agrupacion = _agrupacion(agrupaciones, nombre)
+        return {'agrupacion': nombre, 'assignment': params.get('assignment'), 'grupos': len(agrupacion),
+                'conteos': _conteos(agrupacion, _entero(params, 'limite', None))}
+
+    def lista_estudiantes(self, datos: DatosPanel) -> List[Dict]:
+        campos = [c for c in CAMPOS_ESTUDIANTE if c in datos.estudiantes.columns]
+        filas = datos.estudiantes[campos].copy()
+        filas.insert(0, 'row_index', range(len(filas)))
+        filas['issues'] = [len(datos._issues_estudiante.get(i, [])) for i in range(len(filas))]
+        return _registros(filas)
+
+    def estudiante(self, datos: DatosPanel, fila: int) -> Dict:
+        registro = datos.fila_estudiante(fila)
+        issues = datos.issues_estudiante(fila)
+        por_entrega = {}
+        for entrega, grupo in issues.groupby('assignment', sort=True):
+            por_entrega[entrega] = {'total': len(grupo),
+                                    'por_severidad': grupo['severity'].value_counts().to_dict(),
+                                    'por_tipo': grupo['type'].value_counts().to_dict()}
+        metricas = {m: {e: _escalar(registro.get(f'{m}_{e}')) for e in ('AP1', 'AP2')} for m in datos.metricas}
+        return {'row_index': fila,
+                'estudiante': {c: _escalar(registro[c]) for c in CAMPOS_ESTUDIANTE if c in registro.index},
+                'metricas': metricas, 'issues': por_entrega}
+
+    def detalle_issues(self, datos: DatosPanel, fila: int, params: Dict[str, str]) -> Dict:
+        """Equivalente a mostrar_detalles_agrupacion sobre los issues de un estudiante"""
+        datos.fila_estudiante(fila)
+        issues = datos.issues_estudiante(fila)
+        if 'assignment' in params:
+            issues = issues[issues['assignment'] == params['assignment']]
+        nombre = params.get('agrupacion', 'por_severidad')
+        agrupacion = _agrupacion(AgrupacionesIssues(issues), nombre)
+        grupo = params.get('grupo')
+        if grupo is None:
+            return {'row_index': fila, 'agrupacion': nombre, 'grupos': _conteos(agrupacion, None)}
+        if grupo not in agrupacion:
+            raise ErrorConsulta(404, f"Grupo '{grupo}' no encontrado en '{nombre}'", disponibles=[str(g) for g in agrupacion])
+        max_issues = _entero(params, 'max', 10)
+        seleccion = agrupacion[grupo]
+        return {'row_index': fila, 'agrupacion': nombre, 'grupo': grupo, 'total': len(seleccion),
+                'mostrando': min(max_issues, len(seleccion)), 'issues': list(seleccion[:max_issues])}
+
+    def figura(self, datos: DatosPanel, metrica: str, params: Dict[str, str]) -> bytes:
+        """Boxplot AP1 vs AP2 de una métrica con una línea por estudiante"""
+        if metrica not in datos.metricas:
+            raise ErrorConsulta(404, f"Métrica '{metrica}' no encontrada", disponibles=datos.metricas)
+        df = datos.estudiantes
+        if 'columna' in params:
+            if params['columna'] not in df.columns:
+                raise ErrorConsulta(400, f"Columna '{params['columna']}' no encontrada")
+            df = df[df[params['columna']].astype(str) == params.get('valor', '')]
+        pares = df[[f'{metrica}_AP1', f'{metrica}_AP2']].apply(pd.to_numeric, errors='coerce').dropna()
+        if pares.empty:
+            raise ErrorConsulta(404, f"Sin pares AP1/AP2 para '{metrica}' con ese filtro")
+        # Figure sin pyplot: no hay estado global compartido entre los hilos del servidor
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        with self._lock_figuras:
+            figura = Figure(figsize=(5, 4), dpi=100)
+            FigureCanvasAgg(figura)
+            ejes = figura.add_subplot()
+            ejes.plot([1, 2], pares.T.values, color='grey', alpha=0.3, linewidth=0.8)
+            ejes.boxplot([pares.iloc[:, 0], pares.iloc[:, 1]], positions=[1, 2], widths=0.4)
+            ejes.set_xticks([1, 2], ['AP1', 'AP2'])
+            filtro = f" ({params['columna']}={params.get('valor', '')})" if 'columna' in params else ''
+            ejes.set_title(f"{metrica}{filtro}, n={len(pares)}")
+            figura.tight_layout()
+            salida = io.BytesIO()
+            figura.savefig(salida, format='png')
+        return salida.getvalue()
+
+    def _indice(self, datos: DatosPanel) -> bytes:
+        enlaces = [f'<li><a href="/api/resultados/{t}">resultados_{t}</a></li>' for t in sorted(datos.resultados)]
+        enlaces += [f'<li><a href="/api/agrupaciones/{n}">{n}</a></li>' for n in DIMENSIONES]
+        enlaces += ['<li><a href="/api/estudiantes">estudiantes</a></li>', '<li><a href="/api/estado">estado</a></li>']
+        enlaces += [f'<li><a href="/figuras/{m}.png">{m}.png</a></li>' for m in datos.metricas]
+        return ("<!DOCTYPE html><html><head><meta charset='utf-8'><title>Panel de resultados</title></head>"
+                f"<body><h1>Panel de resultados</h1><ul>{''.join(enlaces)}</ul></body></html>").encode('utf-8')
+
+
+class _Manejador(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    panel: Panel
+
+    def log_message(self, *args):
+        pass
+
+    def _enviar(self, codigo: int, tipo: str, cuerpo: bytes, cache: str, permitido: Optional[str] = None):
+        self.send_response(codigo)
+        self.send_header('Content-Type', tipo)
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.send_header('X-Cache', cache)
+        if permitido:
+            self.send_header('Allow', permitido)
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        try:
+            tipo, cuerpo, desde_cache = self.panel.responder(url.path, params)
+        except ErrorConsulta as e:
+            return self._enviar(e.codigo, TIPO_JSON, a_json(e.detalles), 'MISS', 'POST' if e.codigo == 405 else None)
+        except Exception as e:
+            return self._enviar(500, TIPO_JSON, a_json({'error': f"{type(e).__name__}: {e}"}), 'MISS')
+        self._enviar(200, tipo, cuerpo, 'HIT' if desde_cache else 'MISS')
+
+    def do_POST(self):
+        # El cuerpo no se usa, pero se consume para poder reutilizar la conexión
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        ruta = urlparse(self.path).path
+        if ruta != '/api/recargar':
+            return self._enviar(405, TIPO_JSON, a_json({'error': f"{ruta} solo admite GET"}), 'MISS', 'GET')
+        try:
+            estado = self.panel.recargar()
+        except Exception as e:
+            return self._enviar(500, TIPO_JSON, a_json({'error': f"{type(e).__name__}: {e}"}), 'MISS')
+        self._enviar(200, TIPO_JSON, a_json(estado), 'MISS')
+
+
+class ServidorPanel:
+    """
+    Panel en un hilo (por defecto solo en 127.0.0.1)
+
+    Args:
+        datos (DatosPanel): Datos ya cargados
+        puerto (int): Puerto (0 = uno libre)
+        host (str): Interfaz en la que escuchar
+        cache (CacheLRU): Caché de respuestas (por defecto 256 entradas / 64 MB)
+    """
+
+    def __init__(self, datos: DatosPanel, puerto: int = 8050, host: str = '127.0.0.1', cache: Optional[CacheLRU] = None):
+        self.panel = Panel(datos, cache)
+        manejador = type('Manejador', (_Manejador,), {'panel': self.panel})
+        self._http = ThreadingHTTPServer((host, puerto), manejador)
+        self._http.daemon_threads = True
+        self._hilo: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, puerto = self._http.server_address[:2]
+        return f"http://{host}:{puerto}"
+
+    def iniciar(self) -> 'ServidorPanel':
+        self._hilo = threading.Thread(target=self._http.serve_forever, daemon=True)
+        self._hilo.start()
+        return self
+
+    def servir(self):
+        """Atiende peticiones en el hilo actual hasta Ctrl+C"""
+        try:
+            self._http.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._http.server_close()
+
+    def detener(self):
+        self._http.shutdown()
+        self._http.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.detener()
+
+
+def parsear_argumentos(argv=None):
+    parser = argparse.ArgumentParser(description="Panel HTTP local sobre los resultados del análisis")
+    parser.add_argument("--dataset", default="../data/Estudiantes_2023-2024_con_metricas_sonarcloud.csv",
+                        help="CSV/Parquet de estudiantes con métricas ({metrica}_AP1/_AP2)")
+    parser.add_argument("--resultados", default="../outputs", help="Directorio con los resultados_*.csv")
+    parser.add_argument("--issues", help="CSV o Parquet de issues (issues_detallados_*.csv) para el detalle por estudiante")
+    parser.add_argument("--host", default="127.0.0.1", help="Interfaz en la que escuchar")
+    parser.add_argument("--puerto", type=int, default=8050, help="Puerto HTTP")
+    parser.add_argument("--cache-entradas", type=int, default=256, help="Respuestas guardadas en la caché LRU")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parsear_argumentos()
+    datos = DatosPanel(args.dataset, args.resultados, args.issues)
+    print(f"📂 Datos cargados: {len(datos.estudiantes)} estudiantes, {len(datos.resultados)} tablas de resultados, "
+          f"{len(datos.issues)} issues ({datos.tiempos_carga})")
+    servidor = ServidorPanel(datos, args.puerto, args.host, CacheLRU(args.cache_entradas))
+    print(f"🌐 Panel en {servidor.url} (Ctrl+C para terminar)")
+    servidor.servir()
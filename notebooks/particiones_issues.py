@@ -0,0 +1,230 @@
+"""
+Extracción completa de issues por encima del límite de 10.000 resultados
+
+`/api/issues/search` no devuelve más allá del resultado 10.000 de una misma
+consulta, por lo que los proyectos grandes quedaban truncados en silencio.
+Este módulo divide la consulta en particiones que quedan por debajo del
+límite, usando los conteos de facetas (tipo y severidad) y, si no basta,
+rangos de fecha de creación bisecados. Las particiones se descargan en
+paralelo y las páginas se deduplican por `key` a medida que llegan.
+"""
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from sonarcloud_cliente import FORMATO_FECHA_SONAR
+
+logger = logging.getLogger(__name__)
+
+# Máximo de resultados accesibles por consulta en /api/issues/search
+LIMITE_RESULTADOS = 10000
+
+# Facetas por las que se particiona, en orden (el nombre coincide con el parámetro de filtro)
+DIMENSIONES_FACETAS = ['types', 'severities']
+
+# Límite inferior de la bisección por fechas de creación
+FECHA_MINIMA = datetime(2000, 1, 1, tzinfo=timezone.utc)
+
+
+def contar_issues(cliente, params: Dict, facetas: Optional[List[str]] = None) -> Dict:
+    """
+    Consulta barata (una página de un elemento) para obtener total y facetas
+
+    Returns:
+        dict: {'total': int, 'facetas': {faceta: {valor: conteo}}}
+    """
+    consulta = {**params, 'p': 1, 'ps': 1}
+    if facetas:
+        consulta['facets'] = ','.join(facetas)
+    return _resumen_respuesta(cliente.get('issues/search', consulta))
+
+
+def _resumen_respuesta(data: Dict) -> Dict:
+    facetas = {
+        f['property']: {v['val']: v['count'] for v in f.get('values', [])}
+        for f in data.get('facets', [])
+    }
+    total = data.get('paging', {}).get('total', data.get('total', 0))
+    return {'total': total, 'facetas': facetas}
+
+
+def _particionar_fechas(cliente, params: Dict, limite: int, desde: datetime, hasta: datetime) -> List[Dict]:
+    """Bisección del rango [desde, hasta) de fechas de creación hasta quedar bajo el límite"""
+    sub = {**params,
+           'createdAfter': desde.strftime(FORMATO_FECHA_SONAR),
+           'createdBefore': hasta.strftime(FORMATO_FECHA_SONAR)}
+    total = contar_issues(cliente, sub)['total']
+    if total == 0:
+        return []
+    if total <= limite:
+        return [sub]
+    if hasta - desde <= timedelta(seconds=1):
+        logger.warning(f"Partición de 1s con {total} issues (> {limite}); se truncará")
+        return [sub]
+    medio = desde + (hasta - desde) / 2
+    return (_particionar_fechas(cliente, params, limite, desde, medio)
+            + _particionar_fechas(cliente, params, limite, medio, hasta))
+
+
+def planificar_particiones(cliente, params: Dict, total: int, facetas: Optional[Dict] = None,
+                           limite: int = LIMITE_RESULTADOS) -> List[Dict]:
+    """
+    Divide una consulta en particiones con un máximo de `limite` resultados cada una
+
+    Args:
+        cliente (ClienteSonarCloud): Cliente HTTP a utilizar
+        params (dict): Parámetros de la consulta original
+        total (int): Número de resultados de la consulta original
+        facetas (dict): Conteos de facetas ya conocidos para `params` (evita repetir consultas)
+        limite (int): Máximo de resultados por partición
+
+    Returns:
+        list: Parámetros de cada partición (disjuntas entre sí)
+    """
+    if total <= limite:
+        return [params] if total > 0 else []
+
+    facetas = facetas or {}
+    for dimension in DIMENSIONES_FACETAS:
+        if dimension in params:
+            continue
+        conteos = facetas.get(dimension)
+        if conteos is None:
+            conteos = contar_issues(cliente, params, [dimension])['facetas'].get(dimension, {})
+        particiones = []
+        for valor, conteo in conteos.items():
+            particiones += planificar_particiones(cliente, {**params, dimension: valor}, conteo, limite=limite)
+        return particiones
+
+    # Agotadas las facetas: rangos de fecha de creación
+    return _particionar_fechas(cliente, params, limite, FECHA_MINIMA, datetime.now(timezone.utc))
+
+
+def recorrer_issues(cliente, params: Dict, max_workers: int = 4, page_size: int = 500,
+                    limite: int = LIMITE_RESULTADOS) -> Iterator[List[Dict]]:
+    """
+    Recorre página a página todos los issues de una consulta, particionándola si supera el límite
+
+    La primera página se pide con facetas: si la consulta cabe en el límite se
+    sigue paginando normalmente sin peticiones extra; si no, las facetas sirven
+    para planificar las particiones, que se descargan en paralelo. Las páginas
+    pasan por una cola acotada, de modo que la memoria no crece con el total.
+
+    Args:
+        cliente (ClienteSonarCloud): Cliente HTTP a utilizar
+        params (dict): Parámetros de /api/issues/search (p. ej. componentKeys)
+        max_workers (int): Particiones descargadas simultáneamente
+        page_size (int): Tamaño de página
+        limite (int): Máximo de resultados por consulta
+
+    Yields:
+        list: Issues de cada página, sin duplicados (por `key`)
+    """
+    for _, issues in recorrer_paginas(cliente, params, max_workers, page_size, limite):
+        yield issues
+
+
+def recorrer_paginas(cliente, params: Dict, max_workers: int = 4, page_size: int = 500,
+                     limite: int = LIMITE_RESULTADOS,
+                     pagina_inicial: int = 1) -> Iterator[Tuple[Optional[int], List[Dict]]]:
+    """
+    Como recorrer_issues, pero indicando el número de página de cada una
+
+    Permite retomar una extracción interrumpida (ver puntos_control): si la
+    consulta cabe en el límite, las páginas se numeran desde `pagina_inicial`
+    y las anteriores no se piden. Si hay que particionar, las páginas no tienen
+    un orden estable, se recorre la consulta completa y el número es None.
+
+    Yields:
+        tuple: (número de página o None, issues de la página)
+    """
+    if pagina_inicial > 1 and contar_issues(cliente, params)['total'] > limite:
+        # Una página posterior al resultado `limite` devuelve HTTP 400: antes de retomar se
+        # comprueba el total y, si hay que particionar, se empieza desde la primera página
+        pagina_inicial = 1
+    primera = cliente.get('issues/search', {**params, 'p': pagina_inicial, 'ps': page_size,
+                                            'facets': ','.join(DIMENSIONES_FACETAS)})
+    resumen = _resumen_respuesta(primera)
+
+    if resumen['total'] <= limite:
+        issues = primera.get('issues', [])
+        if not issues:
+            return
+        yield pagina_inicial, issues
+        if (pagina_inicial - 1) * page_size + len(issues) < resumen['total']:
+            siguientes = cliente.paginar('issues/search', params, page_size=page_size,
+                                         pagina_inicial=pagina_inicial + 1)
+            for numero, issues in enumerate(siguientes, pagina_inicial + 1):
+                yield numero, issues
+        return
+
+    particiones = planificar_particiones(cliente, params, resumen['total'], resumen['facetas'], limite)
+    logger.info(f"{resumen['total']} issues divididos en {len(particiones)} particiones")
+
+    cola = queue.Queue(maxsize=max_workers * 2)
+    detener = threading.Event()
+    fin = object()
+
+    def poner(item):
+        while not detener.is_set():
+            try:
+                cola.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def descargar(particion):
+        try:
+            for pagina in cliente.paginar('issues/search', particion, page_size=page_size):
+                if detener.is_set():
+                    return
+                poner(pagina)
+        except Exception as e:
+            poner(e)
+        finally:
+            poner(fin)
+
+    vistos = set()
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        for particion in particiones:
+            pool.submit(descargar, particion)
+        pendientes = len(particiones)
+        while pendientes:
+            item = cola.get()
+            if item is fin:
+                pendientes -= 1
+                continue
+            if isinstance(item, Exception):
+                raise item
+            nuevos = [issue for issue in item if issue.get('key') not in vistos]
+            vistos.update(issue.get('key') for issue in nuevos)
+            if nuevos:
+                yield None, nuevos
+    finally:
+        # También si el consumidor abandona el generador o hay un error
+        detener.set()
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def extraer_issues_particionado(cliente, params: Dict, max_workers: int = 4, page_size: int = 500,
+                                limite: int = LIMITE_RESULTADOS,
+                                progreso: Optional[Callable[[List[Dict]], None]] = None) -> List[Dict]:
+    """
+    Extrae en una lista todos los issues de una consulta (ver recorrer_issues)
+
+    Args:
+        progreso (callable): Se invoca con la lista de issues de cada página recibida
+
+    Returns:
+        list: Issues sin duplicados (por `key`)
+    """
+    issues = []
+    for pagina in recorrer_issues(cliente, params, max_workers, page_size, limite):
+        issues.extend(pagina)
+        if progreso:
+            progreso(pagina)
+    return issues
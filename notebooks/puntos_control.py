@@ -0,0 +1,186 @@
+"""
+Puntos de control para extracciones de issues de una cohorte
+
+Si la extracción de una cohorte se interrumpía (error de red, reinicio del
+kernel...) se perdía todo lo descargado. Con un PuntoControlExtraccion cada
+página recibida se añade al registro del proyecto (un archivo JSON Lines con
+los issues tal como los devuelve la API) y el estado de la extracción
+(páginas guardadas y proyectos terminados) se reescribe de forma atómica en
+`estado.json`. Al reanudar:
+
+- Los proyectos terminados se reproducen desde su registro, sin peticiones
+- Los proyectos a medias continúan desde la página siguiente a la última guardada
+- Los proyectos que hubo que particionar (más de 10.000 issues) se repiten
+  completos, ya que sus páginas no tienen un orden estable
+
+Estructura del directorio:
+    estado.json            Estado de todos los proyectos (escritura atómica)
+    paginas/<hash>.jsonl   Una línea por página recibida de cada proyecto
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from typing import Dict, Iterator, List
+
+from particiones_issues import recorrer_paginas
+
+VERSION_ESTADO = 1
+
+
+class PuntoControlExtraccion:
+    """
+    Estado persistente y reanudable de la extracción de issues de una cohorte
+
+    Seguro entre hilos (cada proyecto debe extraerlo un único hilo a la vez).
+
+    Args:
+        directorio (str): Carpeta del punto de control
+        reanudar (bool): Continuar desde el estado guardado; si es False se empieza de cero
+        page_size (int): Tamaño de página (debe coincidir con el de la extracción a reanudar)
+    """
+
+    def __init__(self, directorio: str, reanudar: bool = False, page_size: int = 500):
+        self.directorio = directorio
+        self.page_size = page_size
+        self._ruta_estado = os.path.join(directorio, 'estado.json')
+        self._lock = threading.Lock()
+
+        if not reanudar and os.path.exists(directorio):
+            shutil.rmtree(directorio)
+        os.makedirs(os.path.join(directorio, 'paginas'), exist_ok=True)
+
+        if os.path.exists(self._ruta_estado):
+            with open(self._ruta_estado, encoding='utf-8') as f:
+                self._estado = json.load(f)
+            if self._estado.get('page_size') != page_size:
+                raise ValueError(f"El punto de control usa page_size={self._estado.get('page_size')}, "
+                                 f"no {page_size}; no se puede reanudar")
+        else:
+            self._estado = {'version': VERSION_ESTADO, 'page_size': page_size, 'proyectos': {}}
+            self._guardar_estado()
+
+    @staticmethod
+    def clave(proyecto: Dict) -> str:
+        """Identificador de un proyecto de la cohorte (fila del CSV, entrega y project_key)"""
+        return f"{proyecto.get('row_index', '')}|{proyecto.get('assignment', '')}|{proyecto['project_key']}"
+
+    def _ruta_paginas(self, clave: str) -> str:
+        nombre = hashlib.sha1(clave.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.directorio, 'paginas', f"{nombre}.jsonl")
+
+    def _guardar_estado(self):
+        # Requiere tener el lock (o no haber otros hilos): escritura en temporal + os.replace
+        fd, temporal = tempfile.mkstemp(dir=self.directorio, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self._estado, f, ensure_ascii=False)
+        os.replace(temporal, self._ruta_estado)
+
+    def info(self, proyecto: Dict) -> Dict:
+        """Estado de un proyecto: páginas y filas guardadas, si terminó y el último error"""
+        with self._lock:
+            return dict(self._estado['proyectos'].get(
+                self.clave(proyecto), {'paginas': 0, 'issues': 0, 'bytes': 0, 'completado': False}))
+
+    def completado(self, proyecto: Dict) -> bool:
+        return self.info(proyecto)['completado']
+
+    def paginas_guardadas(self, proyecto: Dict) -> Iterator[List[Dict]]:
+        """Páginas registradas de un proyecto (se ignora lo escrito tras el último estado guardado)"""
+        info = self.info(proyecto)
+        if not info['paginas']:
+            return
+        with open(self._ruta_paginas(self.clave(proyecto)), 'rb') as f:
+            contenido = f.read(info['bytes'])
+        for linea in contenido.splitlines():
+            yield json.loads(linea)
+
+    def guardar_pagina(self, proyecto: Dict, issues: List[Dict]):
+        """Añade una página al registro del proyecto y actualiza el estado"""
+        clave = self.clave(proyecto)
+        info = self.info(proyecto)
+        linea = json.dumps(issues, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+        with open(self._ruta_paginas(clave), 'ab') as f:
+            # Descarta una línea a medio escribir de una ejecución interrumpida
+            f.truncate(info['bytes'])
+            f.write(linea)
+        with self._lock:
+            self._estado['proyectos'][clave] = {
+                **info, 'paginas': info['paginas'] + 1, 'issues': info['issues'] + len(issues),
+                'bytes': info['bytes'] + len(linea)
+            }
+            self._guardar_estado()
+
+    def reiniciar(self, proyecto: Dict):
+        """Descarta las páginas guardadas de un proyecto"""
+        clave = self.clave(proyecto)
+        with self._lock:
+            self._estado['proyectos'][clave] = {'paginas': 0, 'issues': 0, 'bytes': 0, 'completado': False}
+            self._guardar_estado()
+
+    def marcar(self, proyecto: Dict, completado: bool = True, error: str = None):
+        """Marca un proyecto como terminado, o registra el error que lo interrumpió"""
+        clave = self.clave(proyecto)
+        info = self.info(proyecto)
+        info.pop('error', None)
+        if error is not None:
+            info['error'] = error
+        with self._lock:
+            self._estado['proyectos'][clave] = {**info, 'completado': completado}
+            self._guardar_estado()
+
+    def recorrer(self, cliente, proyecto: Dict, params: Dict) -> Iterator[List[Dict]]:
+        """
+        Todas las páginas de issues de un proyecto, guardando cada página nueva
+
+        Reproduce las páginas ya guardadas y pide a la API solo las que faltan.
+        El proyecto queda marcado como terminado al agotar el generador; si se
+        produce un error, las páginas guardadas se conservan para reanudar.
+
+        Args:
+            cliente (ClienteSonarCloud): Cliente HTTP a utilizar
+            proyecto (dict): Proyecto de la cohorte (project_key, assignment, row_index...)
+            params (dict): Parámetros de /api/issues/search
+
+        Yields:
+            list: Issues de cada página
+        """
+        info = self.info(proyecto)
+        if info['completado']:
+            yield from self.paginas_guardadas(proyecto)
+            return
+
+        # Las páginas guardadas se reproducen solo cuando se sabe que la consulta se puede
+        # continuar (la primera página nueva viene numerada); si no, se empieza de cero
+        pendiente_reproducir = info['paginas'] > 0
+        nuevas = recorrer_paginas(cliente, params, page_size=self.page_size, pagina_inicial=info['paginas'] + 1)
+        for numero, issues in nuevas:
+            if pendiente_reproducir:
+                if numero is None:
+                    self.reiniciar(proyecto)
+                else:
+                    yield from self.paginas_guardadas(proyecto)
+                pendiente_reproducir = False
+            self.guardar_pagina(proyecto, issues)
+            yield issues
+        if pendiente_reproducir:
+            yield from self.paginas_guardadas(proyecto)
+        self.marcar(proyecto)
+
+    def resumen(self) -> Dict:
+        """Proyectos terminados, a medias y con error, y páginas e issues guardados"""
+        with self._lock:
+            proyectos = list(self._estado['proyectos'].values())
+        return {
+            'completados': sum(p['completado'] for p in proyectos),
+            'a_medias': sum(not p['completado'] and p['paginas'] > 0 for p in proyectos),
+            'con_error': sum('error' in p for p in proyectos),
+            'paginas': sum(p['paginas'] for p in proyectos),
+            'issues': sum(p['issues'] for p in proyectos),
+        }
+
+    def eliminar(self):
+        """Borra el punto de control (p. ej. tras una extracción completa sin errores)"""
+        shutil.rmtree(self.directorio, ignore_errors=True)
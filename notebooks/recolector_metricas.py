@@ -0,0 +1,109 @@
+"""
+Recolección asíncrona de métricas de SonarCloud
+
+Sustituye el esquema de lotes fijos con pausas entre lotes: se mantienen
+`max_en_vuelo` peticiones simultáneas bajo un límite de tasa global y cada
+resultado se entrega en cuanto termina, de modo que un proyecto lento solo
+ocupa su propio hueco en lugar de bloquear todo su lote.
+
+Las peticiones se siguen haciendo con el cliente compartido (reintentos,
+backoff y Retry-After) en un pool de hilos acotado; asyncio coordina la
+concurrencia, la tasa y la entrega de resultados.
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+from sonarcloud_cliente import LimitadorTasa
+
+
+async def recolectar(proyectos: List[Dict], obtener: Callable[[Dict], Dict], max_en_vuelo: int = 8,
+                     tasa: Optional[float] = 5.0,
+                     al_completar: Optional[Callable[[Dict], None]] = None,
+                     requiere_peticion: Optional[Callable[[Dict], bool]] = None) -> List[Dict]:
+    """
+    Ejecuta `obtener(proyecto)` para todos los proyectos con concurrencia acotada
+
+    Args:
+        proyectos (list): Proyectos a consultar
+        obtener (callable): Función bloqueante que devuelve el resultado de un proyecto
+        max_en_vuelo (int): Peticiones simultáneas como máximo
+        tasa (float): Inicios de petición por segundo en total (None = sin límite)
+        al_completar (callable): Se invoca con cada resultado en cuanto termina
+        requiere_peticion (callable): Si devuelve False para un proyecto (p. ej. su
+            respuesta ya está en la caché), este no consume cupo del límite de tasa
+
+    Returns:
+        list: Resultados en el mismo orden que `proyectos`
+    """
+    limitador = LimitadorTasa(tasa, capacidad=max_en_vuelo) if tasa else None
+    semaforo = asyncio.Semaphore(max_en_vuelo)
+    loop = asyncio.get_running_loop()
+    resultados = [None] * len(proyectos)
+
+    with ThreadPoolExecutor(max_workers=max_en_vuelo) as pool:
+        async def uno(indice, proyecto):
+            async with semaforo:
+                if limitador is not None and (requiere_peticion is None or requiere_peticion(proyecto)):
+                    await limitador.adquirir_async()
+                return indice, await loop.run_in_executor(pool, obtener, proyecto)
+
+        for futuro in asyncio.as_completed([uno(i, p) for i, p in enumerate(proyectos)]):
+            indice, resultado = await futuro
+            resultados[indice] = resultado
+            if al_completar is not None:
+                al_completar(resultado)
+
+    return resultados
+
+
+def recolectar_sincrono(*args, **kwargs) -> List[Dict]:
+    """Versión bloqueante de recolectar() para scripts (en notebooks usar `await recolectar(...)`)"""
+    return asyncio.run(recolectar(*args, **kwargs))
+
+
+class CombinadorMetricas:
+    """
+    Incorpora los resultados al dataset de estudiantes a medida que llegan
+
+    Equivale a unir al final las métricas de AP1 y AP2 por `row_index`
+    (columnas `{metrica}_AP1` y luego `{metrica}_AP2`), sin esperar a que
+    termine la recolección.
+
+    Args:
+        df_estudiantes (DataFrame): Dataset original (índice = row_index)
+        metricas (list): Métricas a incorporar
+        asignaciones (tuple): Sufijos de las entregas
+    """
+
+    def __init__(self, df_estudiantes: pd.DataFrame, metricas: List[str], asignaciones=('AP1', 'AP2')):
+        self.metricas = list(metricas)
+        self.df = df_estudiantes.copy()
+        for asignacion in asignaciones:
+            for metrica in self.metricas:
+                self.df[f'{metrica}_{asignacion}'] = pd.Series(None, index=self.df.index, dtype=object)
+        self.recibidos = 0
+        self.exitosos = 0
+        self._inicio = time.monotonic()
+
+    def agregar(self, resultado: Dict):
+        """Incorpora un resultado de fetch_project_metrics (los fallidos solo se cuentan)"""
+        self.recibidos += 1
+        if resultado.get('status') != 'success':
+            return
+        self.exitosos += 1
+        fila = resultado['row_index']
+        for metrica in self.metricas:
+            self.df.at[fila, f"{metrica}_{resultado['assignment']}"] = resultado.get(metrica)
+
+    def resultado(self) -> pd.DataFrame:
+        """Dataset combinado con las columnas de métricas tipadas"""
+        return self.df.infer_objects()
+
+    def progreso(self, total: int) -> str:
+        transcurrido = time.monotonic() - self._inicio
+        return (f"{self.recibidos}/{total} proyectos ({self.exitosos} con métricas) "
+                f"en {transcurrido:.1f}s")
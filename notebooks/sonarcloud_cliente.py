@@ -0,0 +1,253 @@
+"""
+Cliente HTTP compartido para la API de SonarCloud
+
+Centraliza lo que antes repetía cada notebook con `requests.get` y bucles de
+reintentos propios:
+- Sesión con conexiones keep-alive reutilizables (pool de conexiones)
+- Reintentos con backoff exponencial y jitter ante errores de conexión y 5xx
+- Respeto de la cabecera `Retry-After` en respuestas HTTP 429
+- Limitador de tasa tipo token bucket compartido entre hilos
+- Errores explícitos (`ErrorSonarCloud`) en lugar de resultados parciales
+- Caché opcional de respuestas en disco, con modo offline (ver cache_respuestas)
+- Registro opcional de latencias, bytes y reintentos (ver instrumentacion)
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterator, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+SONARCLOUD_BASE_URL = "https://sonarcloud.io/api"
+
+# Formato de fecha aceptado por los filtros de fecha de la API (createdAfter, createdBefore...)
+FORMATO_FECHA_SONAR = '%Y-%m-%dT%H:%M:%S+0000'
+
+# Códigos que justifican reintentar la petición
+CODIGOS_REINTENTABLES = {429, 500, 502, 503, 504}
+
+
+class ErrorSonarCloud(Exception):
+    """Error definitivo de la API tras agotar los reintentos (o no reintentable)"""
+
+    def __init__(self, mensaje: str, status_code: Optional[int] = None):
+        super().__init__(mensaje)
+        self.status_code = status_code
+
+
+class LimitadorTasa:
+    """
+    Limitador de tasa tipo token bucket, compartido entre hilos
+
+    Cada petición consume un token; los tokens se reponen a razón de
+    `tasa` por segundo hasta un máximo de `capacidad`.
+    """
+    def __init__(self, tasa, capacidad=1):
+        self.tasa = float(tasa)
+        self.capacidad = float(capacidad)
+        self._tokens = self.capacidad
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _intentar(self) -> float:
+        """Consume un token si hay alguno; si no, devuelve los segundos que faltan para el siguiente"""
+        with self._lock:
+            ahora = time.monotonic()
+            self._tokens = min(self.capacidad, self._tokens + (ahora - self._ultimo) * self.tasa)
+            self._ultimo = ahora
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.tasa
+
+    def adquirir(self):
+        """Bloquea hasta que haya un token disponible y lo consume"""
+        while True:
+            espera = self._intentar()
+            if not espera:
+                return
+            time.sleep(espera)
+
+    async def adquirir_async(self):
+        """Como adquirir(), pero cede el bucle de eventos mientras espera"""
+        while True:
+            espera = self._intentar()
+            if not espera:
+                return
+            await asyncio.sleep(espera)
+
+
+def parsear_retry_after(valor: Optional[str]) -> Optional[float]:
+    """Convierte la cabecera Retry-After (segundos o fecha HTTP) a segundos de espera"""
+    if not valor:
+        return None
+    try:
+        return max(0.0, float(valor))
+    except ValueError:
+        pass
+    try:
+        fecha = parsedate_to_datetime(valor)
+        return max(0.0, fecha.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class ClienteSonarCloud:
+    """
+    Cliente de la API de SonarCloud con sesión persistente y reintentos
+
+    Args:
+        base_url (str): URL base de la API (p. ej. https://sonarcloud.io/api)
+        token (str): Token de SonarCloud; se envía como autenticación básica
+        headers (dict): Cabeceras adicionales para todas las peticiones
+        timeout (float): Timeout por petición en segundos
+        max_reintentos (int): Reintentos ante errores transitorios
+        backoff_base (float): Espera base en segundos del backoff exponencial
+        backoff_max (float): Espera máxima entre reintentos
+        limitador (LimitadorTasa): Limitador de tasa compartido (opcional)
+        pool_size (int): Conexiones keep-alive que se mantienen abiertas
+        cache (CacheRespuestas): Caché de respuestas en disco (opcional)
+        instrumentacion (Instrumentacion): Registro de peticiones, latencias y reintentos (opcional)
+    """
+
+    def __init__(self, base_url: str = SONARCLOUD_BASE_URL, token: Optional[str] = None,
+                 headers: Optional[Dict] = None, timeout: float = 30, max_reintentos: int = 5,
+                 backoff_base: float = 1.0, backoff_max: float = 60.0,
+                 limitador: Optional[LimitadorTasa] = None, pool_size: int = 10, cache=None,
+                 instrumentacion=None):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.max_reintentos = max_reintentos
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.limitador = limitador
+        self.cache = cache
+        self.instrumentacion = instrumentacion
+
+        self.sesion = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.sesion.mount('https://', adaptador)
+        self.sesion.mount('http://', adaptador)
+        if token:
+            self.sesion.auth = (token, '')
+        if headers:
+            self.sesion.headers.update(headers)
+
+    def _espera_backoff(self, intento: int) -> float:
+        """Backoff exponencial con jitter completo"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** intento)))
+
+    def get(self, endpoint: str, params: Optional[Dict] = None) -> Dict:
+        """
+        Realiza un GET y devuelve el JSON de la respuesta
+
+        Args:
+            endpoint (str): Ruta relativa a base_url (p. ej. 'issues/search')
+            params (dict): Parámetros de la consulta
+
+        Returns:
+            dict: Cuerpo JSON de la respuesta
+
+        Raises:
+            ErrorSonarCloud: Si la respuesta no es 200 tras los reintentos, o si
+                la consulta no está en la caché en modo offline
+        """
+        url = f"{self.base_url}/{endpoint.lstrip('/')}"
+        if self.cache is not None:
+            data = self.cache.obtener(url, params)
+            if data is not None:
+                if self.instrumentacion is not None:
+                    self.instrumentacion.contar('cache_aciertos')
+                return data
+            if self.cache.offline:
+                raise ErrorSonarCloud(f"Sin respuesta en caché para {endpoint} (modo offline)")
+        ultimo_error = None
+
+        for intento in range(self.max_reintentos + 1):
+            if self.limitador is not None:
+                self.limitador.adquirir()
+            if intento > 0 and self.instrumentacion is not None:
+                self.instrumentacion.contar('http_reintentos')
+            inicio = time.perf_counter()
+            try:
+                response = self.sesion.get(url, params=params, timeout=self.timeout)
+            except requests.exceptions.RequestException as e:
+                if self.instrumentacion is not None:
+                    self.instrumentacion.registrar_peticion(endpoint, time.perf_counter() - inicio, 'error')
+                ultimo_error = ErrorSonarCloud(f"Error de conexión en {endpoint}: {e}")
+                espera = self._espera_backoff(intento)
+                logger.warning(f"{ultimo_error} (intento {intento + 1}, reintento en {espera:.1f}s)")
+            else:
+                if self.instrumentacion is not None:
+                    self.instrumentacion.registrar_peticion(endpoint, time.perf_counter() - inicio,
+                                                            response.status_code, len(response.content))
+                if response.status_code == 200:
+                    data = response.json()
+                    if self.cache is not None:
+                        self.cache.guardar(url, params, data)
+                    return data
+
+                ultimo_error = ErrorSonarCloud(
+                    f"HTTP {response.status_code} en {endpoint}: {response.text[:200]}",
+                    response.status_code
+                )
+                if response.status_code not in CODIGOS_REINTENTABLES:
+                    raise ultimo_error
+
+                retry_after = parsear_retry_after(response.headers.get('Retry-After'))
+                espera = retry_after if retry_after is not None else self._espera_backoff(intento)
+                logger.warning(f"HTTP {response.status_code} en {endpoint} (intento {intento + 1}, reintento en {espera:.1f}s)")
+
+            if intento < self.max_reintentos:
+                time.sleep(espera)
+
+        raise ultimo_error
+
+    def en_cache(self, endpoint: str, params: Optional[Dict] = None) -> bool:
+        """True si get(endpoint, params) se puede servir desde la caché sin acceder a la red"""
+        return self.cache is not None and self.cache.contiene(f"{self.base_url}/{endpoint.lstrip('/')}", params)
+
+    def paginar(self, endpoint: str, params: Optional[Dict] = None, clave: str = 'issues',
+                page_size: int = 500, max_items: Optional[int] = None,
+                pagina_inicial: int = 1) -> Iterator[List[Dict]]:
+        """
+        Recorre todas las páginas de un endpoint paginado (p/ps)
+
+        Args:
+            endpoint (str): Ruta relativa a base_url
+            params (dict): Parámetros fijos de la consulta
+            clave (str): Clave de la lista de elementos en la respuesta
+            page_size (int): Tamaño de página (500 es el máximo de SonarCloud)
+            max_items (int): Máximo de elementos a recorrer
+            pagina_inicial (int): Primera página a pedir (las anteriores se dan por recorridas)
+
+        Yields:
+            list: Elementos de cada página, en orden
+
+        Raises:
+            ErrorSonarCloud: Si alguna página falla; nunca se devuelve un resultado parcial en silencio
+        """
+        page = pagina_inicial
+        vistos = (pagina_inicial - 1) * page_size
+        while max_items is None or vistos < max_items:
+            data = self.get(endpoint, {**(params or {}), 'p': page, 'ps': page_size})
+            items = data.get(clave, [])
+            if not items:
+                break
+            yield items
+            vistos += len(items)
+
+            total = data.get('paging', {}).get('total', data.get('total', 0))
+            if vistos >= total:
+                break
+            page += 1
+
+    def cerrar(self):
+        """Cierra las conexiones del pool"""
+        self.sesion.close()
@@ -0,0 +1,9 @@
+"""Los módulos de notebooks/ y benchmarks/ se importan por nombre, como desde los notebooks"""
+import os
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for carpeta in ('notebooks', 'benchmarks'):
+    ruta = os.path.join(RAIZ, carpeta)
+    if ruta not in sys.path:
+        sys.path.insert(0, ruta)
@@ -0,0 +1,53 @@
+"""Sincronización incremental de almacen_issues.py contra la API simulada"""
+import pytest
+
+from almacen_issues import AlmacenIssues, sincronizar_proyecto
+from servidor_simulado import ServidorSimulado, issues_proyecto
+from sonarcloud_cliente import ClienteSonarCloud
+
+ISSUES = 1200  # tres páginas de 500
+PROYECTO = {'student_id': 'Student_0', 'nombre': 'Estudiante 0', 'assignment': 'AP1', 'row_index': 0,
+            'project_key': 'incremental'}
+
+
+@pytest.fixture
+def servidor():
+    with ServidorSimulado(issues_por_proyecto=ISSUES) as s:
+        yield s
+
+
+@pytest.fixture
+def almacen(tmp_path):
+    almacen = AlmacenIssues(str(tmp_path / 'issues.sqlite'))
+    yield almacen
+    almacen.cerrar()
+
+
+def test_segunda_sincronizacion_pide_solo_los_cambios(servidor, almacen):
+    cliente = ClienteSonarCloud(servidor.url)
+    originales = issues_proyecto('incremental', ISSUES)
+
+    assert sincronizar_proyecto(almacen, PROYECTO, cliente) == ISSUES
+    # La marca es el mayor updateDate recibido, no la hora local
+    assert almacen.ultima_sincronizacion('incremental') == max(i['updateDate'] for i in originales)
+
+    cerrados = [originales[3]['key'], originales[700]['key']]
+    servidor.modificar_issues('incremental', cerrados, status='CLOSED', updateDate='2025-06-01T00:00:00+0000')
+    servidor.modificar_issues('incremental', [originales[10]['key']], severity='BLOCKER',
+                              updateDate='2025-06-02T00:00:00+0000')
+    antes = servidor.consultas_proyecto['incremental']
+
+    assert sincronizar_proyecto(almacen, PROYECTO, cliente) == 3
+    assert servidor.consultas_proyecto['incremental'] - antes == 1
+    assert almacen.ultima_sincronizacion('incremental') == '2025-06-02T00:00:00+0000'
+
+    df = almacen.a_dataframe()
+    assert len(df) == ISSUES - 2 and not df['issue_key'].isin(cerrados).any()
+    assert df.loc[df['issue_key'] == originales[10]['key'], 'severity'].item() == 'BLOCKER'
+    assert len(almacen.a_dataframe(incluir_resueltos=True)) == ISSUES
+
+    # Sin cambios: una sola página y la marca no se mueve
+    antes = servidor.consultas_proyecto['incremental']
+    assert sincronizar_proyecto(almacen, PROYECTO, cliente) == 0
+    assert servidor.consultas_proyecto['incremental'] - antes == 1
+    assert almacen.ultima_sincronizacion('incremental') == '2025-06-02T00:00:00+0000'
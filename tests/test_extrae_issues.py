@@ -0,0 +1,72 @@
+"""Modo lote de extrae_issues.py contra la API simulada (benchmarks/servidor_simulado.py)"""
+import time
+
+import pandas as pd
+import pytest
+
+from escritor_issues import EscritorIssuesCSV
+from extrae_issues import extraer_issues_cohorte
+from servidor_simulado import ServidorSimulado
+
+ISSUES = 1200  # tres páginas de 500
+
+
+def proyecto(row_index, assignment, project_key):
+    return {'student_id': f'Student_{row_index}', 'nombre': f'Estudiante {row_index}', 'project_key': project_key,
+            'assignment': assignment, 'row_index': row_index}
+
+
+# Fila 1 AP1 comparte proyecto con la fila 0 AP1; el proyecto de la fila 2 AP1 falla
+COHORTE = [proyecto(0, 'AP1', 'compartido'), proyecto(0, 'AP2', 'p0-ap2'),
+           proyecto(1, 'AP1', 'compartido'), proyecto(1, 'AP2', 'p1-ap2'),
+           proyecto(2, 'AP1', 'roto'), proyecto(2, 'AP2', 'p2-ap2')]
+
+
+@pytest.fixture
+def servidor():
+    with ServidorSimulado(issues_por_proyecto=ISSUES, errores={'roto': 403}) as s:
+        yield s
+
+
+def test_cohorte_en_memoria(servidor):
+    resultados = extraer_issues_cohorte(COHORTE, max_workers=4, tasa=1000, base_url=servidor.url)
+
+    assert [r['project_key'] for r in resultados] == [p['project_key'] for p in COHORTE]
+    assert [r['status'] for r in resultados] == ['success'] * 4 + ['error', 'success']
+    for r in resultados:
+        esperado = 0 if r['project_key'] == 'roto' else ISSUES
+        assert r['issues_count'] == esperado
+        assert len(r['issues']) == esperado
+    # Cada estudiante recibe sus propias filas del proyecto compartido
+    compartidos = [r['issues'].a_dataframe() for r in resultados if r['project_key'] == 'compartido']
+    assert [set(df['row_index']) for df in compartidos] == [{0}, {1}]
+    # ...pero el proyecto se pide una sola vez (las mismas consultas que uno no compartido)
+    assert servidor.consultas_proyecto['compartido'] == servidor.consultas_proyecto['p0-ap2'] == 3
+    assert servidor.consultas_proyecto['roto'] == 1
+
+
+def test_cohorte_a_archivo(servidor, tmp_path):
+    salida = tmp_path / 'issues.csv'
+    with EscritorIssuesCSV(str(salida)) as escritor:
+        resultados = extraer_issues_cohorte(COHORTE, max_workers=4, tasa=1000, base_url=servidor.url,
+                                            escritor=escritor)
+
+    assert [r['issues_count'] for r in resultados] == [ISSUES] * 4 + [0, ISSUES]
+    df = pd.read_csv(salida, encoding='utf-8-sig')
+    filas = df.groupby(['row_index', 'assignment']).size().to_dict()
+    assert filas == {(0, 'AP1'): ISSUES, (0, 'AP2'): ISSUES, (1, 'AP1'): ISSUES, (1, 'AP2'): ISSUES, (2, 'AP2'): ISSUES}
+    assert servidor.consultas_proyecto['compartido'] == 3
+
+
+def test_limitador_compartido_entre_workers(servidor):
+    # 8 proyectos x 3 páginas = 24 peticiones; el bucket arranca con `max_workers` tokens
+    proyectos = [proyecto(i, 'AP1', f'p{i}') for i in range(8)]
+    tasa, workers = 40.0, 4
+    inicio = time.perf_counter()
+    resultados = extraer_issues_cohorte(proyectos, max_workers=workers, tasa=tasa, base_url=servidor.url)
+    transcurrido = time.perf_counter() - inicio
+
+    assert all(r['status'] == 'success' for r in resultados)
+    peticiones = sum(servidor.consultas_proyecto.values())
+    assert peticiones == 24
+    assert transcurrido >= (peticiones - workers) / tasa
@@ -0,0 +1,81 @@
+"""Matrices de issues por proyecto de 6_Analisis_Metricas_de_Calidad.py"""
+import importlib.util
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture(scope='module')
+def analisis():
+    # El nombre del script empieza por un dígito: se carga por ruta
+    ruta = Path(__file__).resolve().parents[1] / '6_Analisis_Metricas_de_Calidad.py'
+    spec = importlib.util.spec_from_file_location('analisis_metricas', ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = modulo
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def issue(student, project, key, rule, archivo, tags=''):
+    return {'student_id': student, 'project_key': project, 'issue_key': key, 'rule': rule,
+            'component': f'{project}:src/{archivo}', 'tags': tags}
+
+
+# Los estudiantes 1 y 2 comparten el proyecto 'compartido': sus issues aparecen una vez por estudiante
+ISSUES = pd.DataFrame([
+    issue('1', 'compartido', 'c1', 'S100', 'A.cs', 'convention'),
+    issue('1', 'compartido', 'c2', 'S100', 'B.cs', 'convention,unused'),
+    issue('1', 'compartido', 'c3', 'S200', 'Vista.cshtml'),
+    issue('2', 'compartido', 'c1', 'S100', 'A.cs', 'convention'),
+    issue('2', 'compartido', 'c2', 'S100', 'B.cs', 'convention,unused'),
+    issue('2', 'compartido', 'c3', 'S200', 'Vista.cshtml'),
+    issue('3', 'propio', 'p1', 'S200', 'C.cs', 'unused'),
+], columns=['student_id', 'project_key', 'issue_key', 'rule', 'component', 'tags'])
+
+ESPERADO = {
+    'rule': {'compartido': {'S100': 2, 'S200': 1}, 'propio': {'S200': 1}},
+    'extension': {'compartido': {'.cs': 2, '.cshtml': 1}, 'propio': {'.cs': 1}},
+    'tag': {'compartido': {'convention': 2, 'unused': 1}, 'propio': {'unused': 1}},
+}
+
+
+def conteos(im, dim):
+    m = im.matrix(dim).toarray()
+    nombres = im.feature_names(dim)
+    return {p: {nombres[j]: int(m[i, j]) for j in np.flatnonzero(m[i])} for p, i in im.projects.items()}
+
+
+def test_issue_compartido_cuenta_una_vez(analisis):
+    im = analisis.build_issue_matrices([ISSUES])
+
+    assert im.n_issues == 4
+    for dim, esperado in ESPERADO.items():
+        assert conteos(im, dim) == esperado
+
+
+def test_por_bloques_igual_que_completo(analisis):
+    completo = analisis.build_issue_matrices([ISSUES])
+    # El segundo estudiante del proyecto compartido llega en otro bloque, y un bloque queda vacío tras deduplicar
+    por_bloques = analisis.build_issue_matrices([ISSUES.iloc[:2], ISSUES.iloc[2:4], ISSUES.iloc[4:6], ISSUES.iloc[6:]])
+
+    assert por_bloques.n_issues == completo.n_issues
+    for dim in analisis.ISSUE_DIMENSIONS:
+        assert conteos(por_bloques, dim) == conteos(completo, dim)
+
+
+def test_proyecto_sin_issues_tiene_fila_de_ceros(analisis):
+    im = analisis.build_issue_matrices([ISSUES])
+    dataset = pd.DataFrame({'Sonar_Ap1': ['compartido', 'compartido', 'sin_issues'],
+                            'Sonar_Ap2': ['propio', None, 'propio']})
+
+    filas = analisis.project_rows(dataset, im)
+
+    assert filas['AP1'][0] == filas['AP1'][1] == im.projects['compartido']
+    assert np.isnan(filas['AP2'][1])  # sin clave de proyecto: NaN, no ceros
+    cero = int(filas['AP1'][2])
+    for dim in analisis.ISSUE_DIMENSIONS:
+        m = im.matrix(dim)
+        assert m.shape[0] == len(im.projects) and m[cero].nnz == 0
@@ -0,0 +1,90 @@
+"""Panel HTTP de panel_resultados.py en 127.0.0.1 sobre un conjunto de datos pequeño"""
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pandas as pd
+import pytest
+
+from panel_resultados import DatosPanel, ServidorPanel
+
+
+def escribir_datos(directorio, bugs_ap2):
+    pd.DataFrame({'Id': [1, 2, 3], 'Estudiante': ['Ana', 'Luis', 'Marta'],
+                  'bugs_AP1': [5, 3, 8], 'bugs_AP2': bugs_ap2}).to_csv(directorio / 'dataset.csv', index=False)
+    pd.DataFrame({'metric': ['bugs'], 'mean_ap1': [16 / 3], 'mean_ap2': [sum(bugs_ap2) / 3]}).to_csv(
+        directorio / 'resultados_metricas.csv', index=False)
+
+
+def pedir(url, metodo='GET'):
+    """(código, cabeceras, cuerpo JSON), también para respuestas de error"""
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, method=metodo, data=b'' if metodo == 'POST' else None)) as r:
+            return r.status, r.headers, json.loads(r.read())
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, json.loads(e.read())
+
+
+@pytest.fixture
+def servidor(tmp_path):
+    escribir_datos(tmp_path, [2, 3, 4])
+    with ServidorPanel(DatosPanel(str(tmp_path / 'dataset.csv'), str(tmp_path)), puerto=0) as s:
+        yield s
+
+
+def test_cache_de_respuestas(servidor):
+    codigo, cabeceras, cuerpo = pedir(servidor.url + '/api/resultados/metricas')
+    assert codigo == 200 and cabeceras['X-Cache'] == 'MISS' and cuerpo['total'] == 1
+    codigo, cabeceras, repetido = pedir(servidor.url + '/api/resultados/metricas')
+    assert codigo == 200 and cabeceras['X-Cache'] == 'HIT' and repetido == cuerpo
+
+    codigo, _, estudiante = pedir(servidor.url + '/api/estudiantes/1')
+    assert codigo == 200 and estudiante['metricas']['bugs'] == {'AP1': 3, 'AP2': 3}
+
+
+@pytest.mark.parametrize('ruta, metodo, esperado', [
+    ('/api/estudiantes/abc', 'GET', 400),
+    ('/api/estudiantes/999', 'GET', 404),
+    ('/api/recargar', 'GET', 405),
+    ('/api/estudiantes', 'POST', 405),
+])
+def test_errores(servidor, ruta, metodo, esperado):
+    codigo, cabeceras, _ = pedir(servidor.url + ruta, metodo)
+    assert codigo == esperado
+    if esperado == 405:
+        assert cabeceras['Allow'] == ('POST' if metodo == 'GET' else 'GET')
+    # Los errores no se guardan en la caché
+    assert pedir(servidor.url + ruta, metodo)[1]['X-Cache'] == 'MISS'
+
+
+def test_consulta_durante_recarga_no_se_guarda(servidor, tmp_path):
+    panel = servidor.panel
+    generar = panel._generar
+    empezada, continuar = threading.Event(), threading.Event()
+
+    def generar_lento(datos, ruta, params):
+        # La primera consulta genera su respuesta con los datos antiguos y espera a la recarga
+        if not empezada.is_set():
+            empezada.set()
+            continuar.wait(5)
+        return generar(datos, ruta, params)
+
+    panel._generar = generar_lento
+    respuestas = []
+    consulta = threading.Thread(target=lambda: respuestas.append(pedir(servidor.url + '/api/resultados/metricas')))
+    consulta.start()
+    assert empezada.wait(5)
+
+    escribir_datos(tmp_path, [1, 1, 1])
+    codigo, _, estado = pedir(servidor.url + '/api/recargar', 'POST')
+    assert codigo == 200 and estado['cache']['entradas'] == 0
+    continuar.set()
+    consulta.join(5)
+
+    codigo, cabeceras, antigua = respuestas[0]
+    assert codigo == 200 and cabeceras['X-Cache'] == 'MISS' and antigua['filas'][0]['mean_ap2'] == 3
+    # La respuesta con datos antiguos no quedó en la caché: la siguiente se genera con los nuevos
+    codigo, cabeceras, nueva = pedir(servidor.url + '/api/resultados/metricas')
+    assert cabeceras['X-Cache'] == 'MISS' and nueva['filas'][0]['mean_ap2'] == 1
+    assert pedir(servidor.url + '/api/resultados/metricas')[1]['X-Cache'] == 'HIT'
@@ -0,0 +1,45 @@
+"""Reanudación de puntos_control.py contra la API simulada"""
+from itertools import islice
+
+from puntos_control import PuntoControlExtraccion
+from servidor_simulado import ServidorSimulado
+from sonarcloud_cliente import ClienteSonarCloud
+
+PROYECTO = {'row_index': 0, 'assignment': 'AP1', 'project_key': 'reanudable'}
+PARAMS = {'componentKeys': 'reanudable'}
+
+
+def interrumpir(directorio, cliente, paginas):
+    """Extrae `paginas` páginas y abandona la extracción, como un kernel reiniciado"""
+    punto = PuntoControlExtraccion(directorio)
+    extraccion = punto.recorrer(cliente, PROYECTO, PARAMS)
+    list(islice(extraccion, paginas))
+    extraccion.close()
+    assert punto.info(PROYECTO)['paginas'] == paginas
+
+
+def test_reanudar_proyecto_particionado(tmp_path):
+    # Más de 10.000 issues: la página 23 quedaría fuera del límite, hay que repetir particionando
+    with ServidorSimulado(issues_por_proyecto=12000) as servidor:
+        cliente = ClienteSonarCloud(servidor.url)
+        interrumpir(str(tmp_path), cliente, 22)
+
+        punto = PuntoControlExtraccion(str(tmp_path), reanudar=True)
+        claves = [issue['key'] for pagina in punto.recorrer(cliente, PROYECTO, PARAMS) for issue in pagina]
+
+    assert len(claves) == len(set(claves)) == 12000
+    assert punto.completado(PROYECTO)
+
+
+def test_reanudar_desde_la_pagina_siguiente(tmp_path):
+    with ServidorSimulado(issues_por_proyecto=3000) as servidor:
+        cliente = ClienteSonarCloud(servidor.url)
+        interrumpir(str(tmp_path), cliente, 3)
+        antes = servidor.consultas_proyecto['reanudable']
+
+        punto = PuntoControlExtraccion(str(tmp_path), reanudar=True)
+        claves = [issue['key'] for pagina in punto.recorrer(cliente, PROYECTO, PARAMS) for issue in pagina]
+        # Consulta del total y páginas 4, 5 y 6: las tres primeras salen del registro
+        assert servidor.consultas_proyecto['reanudable'] - antes == 4
+
+    assert claves == [f'reanudable-{i:07d}' for i in range(3000)]